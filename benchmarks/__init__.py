@@ -0,0 +1,3 @@
+"""
+Benchmarks for the power system simulation package
+"""
@@ -0,0 +1,114 @@
+"""
+asv benchmarks of the study stages on synthetic grids of increasing size.
+
+Run with ``asv run`` from the root of the repository, the time_* benchmarks record the wall time
+and the peakmem_* benchmarks the peak memory of every stage for every size.
+"""
+
+import os
+import tempfile
+
+from benchmarks.synthetic_grid import write_case
+from power_system_simulation.graph_processing import GraphProcessor
+from power_system_simulation.power_grid_calculation import PowerGridCalculation
+from power_system_simulation.power_system_simulation import (
+    ev_penetration_level,
+    graph_processor_arguments,
+    input_data_validity_check,
+    n1_calculation,
+    optimal_tap_position,
+)
+
+# name: (n_nodes, n_feeders, n_loads, n_timesteps)
+SIZES = {
+    "small": (50, 4, 50, 96 * 7),
+    "medium": (500, 10, 500, 96 * 30),
+    "large": (2000, 20, 2000, 96 * 90),
+}
+
+
+class StageBenchmarks:
+    """
+    Time and peak memory of the graph processing, the time series power flow, the EV penetration study,
+    the optimal tap position and the N-1 calculation.
+    """
+
+    params = list(SIZES)
+    param_names = ["size"]
+    timeout = 3600
+
+    def setup_cache(self):
+        """
+        Write one synthetic case per size to a temporary directory, shared by all the benchmarks.
+        """
+        directory = tempfile.mkdtemp(prefix="pss_benchmark_")
+        return {size: write_case(os.path.join(directory, size), *shape) for size, shape in SIZES.items()}
+
+    def setup(self, cases, size):
+        """
+        Load the case of the given size.
+        """
+        self.paths = cases[size]
+        self.checker = input_data_validity_check(self.paths["network"])
+        self.checker.check_grid(self.paths["meta"])
+        self.graph_arguments = graph_processor_arguments(self.checker.grid, self.checker.meta)
+        self.first_feeder = self.checker.meta["lv_feeders"][0]
+
+    def _time_series(self):
+        pgc = PowerGridCalculation()
+        pgc.construct_pgm(self.paths["network"])
+        pgc.creat_batch_update_dataset(self.paths["active"], self.paths["reactive"])
+        return pgc.time_series_power_flow_calculation()
+
+    def _ev_penetration(self):
+        paths = self.paths
+        study = ev_penetration_level(paths["network"], paths["active"], paths["reactive"], paths["ev"], paths["meta"])
+        return study.calculate(0.5)
+
+    def _optimal_tap(self):
+        study = optimal_tap_position(self.paths["network"], self.paths["active"], self.paths["reactive"])
+        return study.find_optimal_tap_position("minimize_line_losses")
+
+    def _n1(self):
+        paths = self.paths
+        study = n1_calculation(paths["network"], paths["meta"], paths["active"], paths["reactive"])
+        return study.n1_calculate(self.first_feeder)
+
+    def time_graph_processor(self, cases, size):
+        GraphProcessor(*self.graph_arguments)
+
+    def peakmem_graph_processor(self, cases, size):
+        GraphProcessor(*self.graph_arguments)
+
+    def time_time_series_power_flow(self, cases, size):
+        self._time_series()
+
+    def peakmem_time_series_power_flow(self, cases, size):
+        self._time_series()
+
+    def time_ev_penetration_level(self, cases, size):
+        self._ev_penetration()
+
+    def peakmem_ev_penetration_level(self, cases, size):
+        self._ev_penetration()
+
+    def time_optimal_tap_position(self, cases, size):
+        self._optimal_tap()
+
+    def peakmem_optimal_tap_position(self, cases, size):
+        self._optimal_tap()
+
+    def time_n1_calculation(self, cases, size):
+        self._n1()
+
+    def peakmem_n1_calculation(self, cases, size):
+        self._n1()
+
+
+class ImportBenchmarks:
+    """
+    Import time of the package in a fresh interpreter, the heavy dependencies are imported lazily.
+    """
+
+    def timeraw_import_power_system_simulation(self):
+        return "import power_system_simulation.power_system_simulation"
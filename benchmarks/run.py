@@ -0,0 +1,97 @@
+"""
+Standalone runner of the benchmarks, for use without asv.
+
+    python -m benchmarks.run --sizes small medium --output benchmark_results.json
+
+Every stage is run once per size, the wall time and the peak of the memory allocated through Python
+(tracemalloc, this includes the numpy arrays but not the internal memory of power-grid-model) are recorded.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.benchmarks import SIZES, StageBenchmarks
+from benchmarks.synthetic_grid import write_case
+
+STAGES = {
+    "graph_processor": "time_graph_processor",
+    "time_series_power_flow": "time_time_series_power_flow",
+    "ev_penetration_level": "time_ev_penetration_level",
+    "optimal_tap_position": "time_optimal_tap_position",
+    "n1_calculation": "time_n1_calculation",
+}
+
+
+def measure(function, *args) -> dict:
+    """
+    Run a function once and return its wall time in seconds and its peak traced memory in MB.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    function(*args)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": seconds, "peak_mb": peak / 1e6}
+
+
+def import_time(repeat: int = 5) -> float:
+    """
+    Best wall time in seconds of importing the package in a fresh interpreter.
+    """
+    code = (
+        "import time; start = time.perf_counter(); import power_system_simulation.power_system_simulation; "
+        "print(time.perf_counter() - start)"
+    )
+    times = [float(subprocess.check_output([sys.executable, "-c", code])) for _ in range(repeat)]
+    return min(times)
+
+
+def run(sizes: list, stages: list, directory: str) -> dict:
+    """
+    Generate the cases and measure every stage for every size.
+
+    Returns:
+    dict: {size: {stage: {"seconds": ..., "peak_mb": ...}}}
+    """
+    benchmark = StageBenchmarks()
+    cases = {size: write_case(os.path.join(directory, size), *SIZES[size]) for size in sizes}
+    results = {}
+    for size in sizes:
+        benchmark.setup(cases, size)
+        results[size] = {}
+        for stage in stages:
+            result = measure(getattr(benchmark, STAGES[stage]), cases, size)
+            results[size][stage] = result
+            print(f"{size:>8} {stage:<24} {result['seconds']:10.3f} s {result['peak_mb']:10.1f} MB")
+    return results
+
+
+def main():
+    """
+    Command line entry of the standalone benchmark runner.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", default=["small", "medium"], choices=list(SIZES))
+    parser.add_argument("--stages", nargs="+", default=list(STAGES), choices=list(STAGES))
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--import-time", action="store_true", help="also measure the import time of the package")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory(prefix="pss_benchmark_") as directory:
+        results = run(args.sizes, args.stages, directory)
+    if args.import_time:
+        results["import_seconds"] = import_time()
+        print(f"{'import':>8} {'power_system_simulation':<24} {results['import_seconds']:10.3f} s")
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
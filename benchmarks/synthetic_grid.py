@@ -0,0 +1,209 @@
+"""
+Generator of synthetic radial LV grids and load profiles for the benchmarks
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+MV_SOURCE_NODE = 0
+LV_BUSBAR = 1
+SOURCE_ID = 2
+TRANSFORMER_ID = 3
+
+
+def generate_grid(n_nodes: int, n_feeders: int, n_loads: int, seed: int = 0):
+    """
+    Generate a radial LV grid which passes all the input data validity checks:
+    1.  An MV source node with a source, and one transformer to the LV busbar.
+    2.  The LV nodes are divided over the feeders. Every feeder is a random tree starting at the LV busbar,
+        each new node is connected to a random node of the same feeder.
+    3.  The loads are connected to random LV nodes.
+    4.  Between the last nodes of neighbouring feeders a disabled tie line is added,
+        which are the alternatives for the N-1 calculation.
+
+    Args:
+    n_nodes (int): Number of LV nodes, excluding the LV busbar.
+    n_feeders (int): Number of LV feeders.
+    n_loads (int): Number of sym_loads.
+    seed (int): Seed of the random generator.
+
+    Returns:
+    tuple: The grid in the PGM JSON input format (dict) and the meta data (dict).
+    """
+    rng = np.random.default_rng(seed)
+    next_id = TRANSFORMER_ID + 1
+    node_ids = np.arange(next_id, next_id + n_nodes)
+    next_id += n_nodes
+
+    nodes = [{"id": MV_SOURCE_NODE, "u_rated": 10500}, {"id": LV_BUSBAR, "u_rated": 400}]
+    nodes += [{"id": int(node), "u_rated": 400} for node in node_ids]
+
+    lines = []
+    feeders = []
+    feeder_ends = []
+    for feeder_nodes in np.array_split(node_ids, n_feeders):
+        for i, node in enumerate(feeder_nodes):
+            from_node = LV_BUSBAR if i == 0 else int(feeder_nodes[rng.integers(0, i)])
+            if i == 0:
+                feeders.append(next_id)
+            lines.append(_line(next_id, from_node, int(node), 1))
+            next_id += 1
+        feeder_ends.append(int(feeder_nodes[-1]))
+    for from_node, to_node in zip(feeder_ends[:-1], feeder_ends[1:]):
+        lines.append(_line(next_id, from_node, to_node, 0))
+        next_id += 1
+
+    load_nodes = rng.choice(node_ids, n_loads)
+    sym_loads = [
+        {"id": next_id + i, "node": int(node), "status": 1, "type": 0, "p_specified": 0, "q_specified": 0}
+        for i, node in enumerate(load_nodes)
+    ]
+
+    # size the transformer to the number of loads, about 10 kVA per load
+    sn = max(630000.0, 10000.0 * n_loads)
+    grid = {
+        "version": "1.0",
+        "type": "input",
+        "is_batch": False,
+        "attributes": {},
+        "data": {
+            "node": nodes,
+            "source": [{"id": SOURCE_ID, "node": MV_SOURCE_NODE, "status": 1, "u_ref": 1.05, "sk": 200000000}],
+            "transformer": [
+                {
+                    "id": TRANSFORMER_ID,
+                    "from_node": MV_SOURCE_NODE,
+                    "to_node": LV_BUSBAR,
+                    "from_status": 1,
+                    "to_status": 1,
+                    "u1": 10750,
+                    "u2": 420,
+                    "sn": sn,
+                    "uk": 0.041,
+                    "pk": 0.008 * sn,
+                    "i0": 0.01,
+                    "p0": 0.0012 * sn,
+                    "winding_from": 2,
+                    "winding_to": 1,
+                    "clock": 5,
+                    "tap_side": 0,
+                    "tap_pos": 3,
+                    "tap_min": 5,
+                    "tap_max": 1,
+                    "tap_nom": 3,
+                    "tap_size": 250,
+                }
+            ],
+            "sym_load": sym_loads,
+            "line": lines,
+        },
+    }
+    meta = {
+        "mv_source_node": MV_SOURCE_NODE,
+        "lv_busbar": LV_BUSBAR,
+        "transformer": TRANSFORMER_ID,
+        "lv_feeders": feeders,
+        "source": SOURCE_ID,
+    }
+    return grid, meta
+
+
+def _line(line_id: int, from_node: int, to_node: int, status: int) -> dict:
+    """
+    A short LV cable segment.
+    """
+    return {
+        "id": line_id,
+        "from_node": from_node,
+        "to_node": to_node,
+        "from_status": status,
+        "to_status": status,
+        "r1": 0.002,
+        "x1": 0.001,
+        "c1": 1e-7,
+        "tan1": 0.0,
+        "r0": 0.008,
+        "x0": 0.004,
+        "c0": 1e-7,
+        "tan0": 0.0,
+        "i_n": 1000.0,
+    }
+
+
+def generate_profiles(load_ids, n_timesteps: int, n_ev_profiles: int = None, seed: int = 0):
+    """
+    Generate synthetic 15 minute load profiles in the same format as the parquet input files:
+    1.  The active power follows a daily shape with random noise per load.
+    2.  The reactive power is a random fraction of the active power.
+    3.  Every EV profile charges once per day with 11 kW, starting in the evening for 1 to 4 hours.
+
+    Args:
+    load_ids (list): IDs of the sym_loads.
+    n_timesteps (int): Number of timesteps.
+    n_ev_profiles (int): Number of EV charging profiles, by default the number of loads.
+    seed (int): Seed of the random generator.
+
+    Returns:
+    tuple: The active, reactive and EV profiles as DataFrames.
+    """
+    rng = np.random.default_rng(seed)
+    n_loads = len(load_ids)
+    n_ev_profiles = n_loads if n_ev_profiles is None else n_ev_profiles
+    timestamps = pd.date_range("2025-01-01", periods=n_timesteps, freq="15min", name="Timestamp")
+    hour = timestamps.hour.to_numpy() + timestamps.minute.to_numpy() / 60.0
+
+    daily_shape = 0.6 + 0.4 * np.sin((hour - 12.0) / 24.0 * 2.0 * np.pi) ** 2
+    active = 1000.0 * daily_shape[:, None] * rng.uniform(0.5, 1.5, size=(n_timesteps, n_loads))
+    reactive = active * rng.uniform(-0.2, 0.2, size=(1, n_loads))
+    columns = pd.Index(np.asarray(load_ids, dtype=np.int32), name="Load ID")
+    df_active = pd.DataFrame(active, index=timestamps, columns=columns)
+    df_reactive = pd.DataFrame(reactive, index=timestamps, columns=columns)
+
+    ev = np.zeros((n_timesteps, n_ev_profiles))
+    day = (timestamps - timestamps[0]).days.to_numpy()
+    for profile in range(n_ev_profiles):
+        start = rng.uniform(17.0, 23.0, size=day.max() + 1)[day]
+        duration = rng.uniform(1.0, 4.0, size=day.max() + 1)[day]
+        ev[(hour >= start) & (hour < start + duration), profile] = 11000.0
+    df_ev = pd.DataFrame(
+        ev, index=timestamps, columns=pd.Index(np.arange(n_ev_profiles), name="EV Profile Sequence Number")
+    )
+    return df_active, df_reactive, df_ev
+
+
+def write_case(directory: str, n_nodes: int, n_feeders: int, n_loads: int, n_timesteps: int, seed: int = 0) -> dict:
+    """
+    Generate a grid with its profiles and write them to a directory, in the same layout as tests/data/small_network.
+
+    Args:
+    directory (str): The output directory, created if it does not exist.
+    n_nodes (int), n_feeders (int), n_loads (int): Size of the grid, see generate_grid.
+    n_timesteps (int): Length of the profiles.
+    seed (int): Seed of the random generator.
+
+    Returns:
+    dict: Paths of the network, meta data, active, reactive and EV profile files.
+    """
+    os.makedirs(directory, exist_ok=True)
+    grid, meta = generate_grid(n_nodes, n_feeders, n_loads, seed)
+    load_ids = [load["id"] for load in grid["data"]["sym_load"]]
+    df_active, df_reactive, df_ev = generate_profiles(load_ids, n_timesteps, seed=seed)
+
+    paths = {
+        "network": os.path.join(directory, "input_network_data.json"),
+        "meta": os.path.join(directory, "meta_data.json"),
+        "active": os.path.join(directory, "active_power_profile.parquet"),
+        "reactive": os.path.join(directory, "reactive_power_profile.parquet"),
+        "ev": os.path.join(directory, "ev_active_power_profile.parquet"),
+    }
+    with open(paths["network"], "w") as file:
+        json.dump(grid, file)
+    with open(paths["meta"], "w") as file:
+        json.dump(meta, file)
+    df_active.to_parquet(paths["active"])
+    df_reactive.to_parquet(paths["reactive"])
+    df_ev.to_parquet(paths["ev"])
+    return paths
@@ -0,0 +1,233 @@
+"""
+Asyncio interface of the studies, for example for a web backend
+
+    queue = StudyQueue(max_workers=2)
+    job = queue.optimal_tap(case, "minimize_line_losses")
+    job.add_progress_callback(lambda done, total: print(f"{done}/{total} tap positions"))
+    optimal_tap_pos = await job
+
+A case is a dict with the paths of the input files, with the keys of a manifest case of the command line runner:
+"network", "meta", "active" and "reactive". A study is submitted to a bounded thread pool and returns a Job,
+which can be awaited, reports its progress in the event loop and can be cancelled.
+The calculations run in worker threads: power-grid-model and pyarrow release the GIL while they calculate,
+and the progress and cancellation state is shared with the worker without serialization.
+A study which is already running for the same case and parameters is not submitted again,
+the same Job is returned to every requester. The job counts its requesters,
+it is only cancelled when every requester has cancelled it.
+"""
+
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from power_system_simulation.power_grid_calculation import PowerGridCalculation
+from power_system_simulation.power_system_simulation import n1_calculation, optimal_tap_position
+
+
+class JobCancelledError(Exception):
+    """
+    The job was cancelled, raised in the worker thread to stop the calculation.
+    """
+
+
+class Job:
+    """
+    Awaitable handle of a submitted study.
+    Awaiting the job returns the result of the study, or raises asyncio.CancelledError if the job was cancelled.
+    Cancelling a task which awaits the job does not cancel the job, which can be shared by several requesters.
+    """
+
+    def __init__(self, key: tuple, loop: asyncio.AbstractEventLoop):
+        self.key = key
+        self.progress = None
+        self.requesters = 1
+        self._loop = loop
+        self._future = loop.create_future()
+        self._cancelled = threading.Event()
+        self._callbacks = []
+
+    def __await__(self):
+        return asyncio.shield(self._future).__await__()
+
+    def add_progress_callback(self, callback):
+        """
+        Call callback(done, total) in the event loop whenever the study reports progress.
+        """
+        self._callbacks.append(callback)
+
+    def cancel(self):
+        """
+        Cancel the job for one requester. When the last requester cancels, the job is cancelled:
+        the awaiting requesters are released at once, the worker stops at its next progress report.
+        """
+        self.requesters -= 1
+        if self.requesters <= 0:
+            self.cancel_all()
+
+    def cancel_all(self):
+        """
+        Cancel the job for all its requesters.
+        """
+        self._cancelled.set()
+        self._future.cancel()
+
+    def cancelled(self) -> bool:
+        """
+        Whether the job was cancelled.
+        """
+        return self._cancelled.is_set()
+
+    def done(self) -> bool:
+        """
+        Whether the job has finished, was cancelled or failed.
+        """
+        return self._future.done()
+
+    def report(self, done: int, total: int):
+        """
+        Progress function of the worker thread.
+
+        Raises:
+        JobCancelledError if the job was cancelled.
+        """
+        if self._cancelled.is_set():
+            raise JobCancelledError(f"Job {self.key} was cancelled")
+        self._loop.call_soon_threadsafe(self._notify, done, total)
+
+    def _notify(self, done: int, total: int):
+        self.progress = (done, total)
+        for callback in self._callbacks:
+            callback(done, total)
+
+    def _finish(self, future: asyncio.Future):
+        if self._future.done():
+            return
+        if future.cancelled() or isinstance(future.exception(), JobCancelledError):
+            self._future.cancel()
+        elif future.exception() is not None:
+            self._future.set_exception(future.exception())
+        else:
+            self._future.set_result(future.result())
+
+
+class StudyQueue:
+    """
+    Submit studies to a bounded pool of worker threads, see the module documentation.
+    Must be used from a running event loop.
+
+    Args:
+    max_workers (int): The maximum number of studies which run at the same time, the others wait in the queue.
+    engine (str): The power flow engine of the studies.
+    """
+
+    def __init__(self, max_workers: int = None, engine: str = "power_grid_model"):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.engine = engine
+        self.jobs = {}
+
+    def submit(self, key: tuple, function) -> Job:
+        """
+        Run function(progress) in a worker thread, unless a job with the same key is already running.
+
+        Args:
+        key (tuple): Identifies the case, the study and its parameters.
+        function (callable): The blocking study, called with the progress function of the job.
+
+        Returns:
+        Job: The new job or the running job with the same key, with one more requester.
+        """
+        if key in self.jobs:
+            self.jobs[key].requesters += 1
+            return self.jobs[key]
+        loop = asyncio.get_running_loop()
+        job = Job(key, loop)
+
+        def run():
+            if job.cancelled():
+                raise JobCancelledError(f"Job {key} was cancelled")
+            return function(job.report)
+
+        self.jobs[key] = job
+        job._future.add_done_callback(lambda _: self.jobs.pop(key, None))
+        loop.run_in_executor(self.executor, run).add_done_callback(job._finish)
+        return job
+
+    @staticmethod
+    def _key(study: str, case: dict, **parameters) -> tuple:
+        paths = tuple(case.get(name) for name in ["network", "meta", "active", "reactive"])
+        return (study, paths, json.dumps(parameters, sort_keys=True, default=str))
+
+    def time_series(self, case: dict, chunk_size: int = 96, **options) -> Job:
+        """
+        Time series power flow calculation, see PowerGridCalculation.time_series_power_flow_calculation.
+        The progress is reported after every chunk of timesteps.
+
+        Args:
+        case (dict): Paths of the network data and the active and reactive load profiles.
+        chunk_size (int): The number of timesteps per progress report.
+        options: Extra arguments of PowerGridCalculation, for example precision.
+
+        Returns:
+        Job: Awaitable, with the node and line result tables.
+        """
+
+        def function(progress):
+            pgc = PowerGridCalculation(engine=self.engine, **options)
+            pgc.construct_pgm(case["network"])
+            pgc.creat_batch_update_dataset(case["active"], case["reactive"])
+            return pgc.time_series_power_flow_calculation(chunk_size=chunk_size, progress=progress)
+
+        return self.submit(self._key("time_series", case, chunk_size=chunk_size, **options), function)
+
+    def optimal_tap(self, case: dict, optimization_criteria: str, **options) -> Job:
+        """
+        Optimal tap position, see optimal_tap_position.find_optimal_tap_position.
+        The progress is reported after every tap position.
+
+        Args:
+        case (dict): Paths of the network data and the active and reactive load profiles.
+        optimization_criteria (str): The optimization criteria.
+        options: Extra arguments of optimal_tap_position, for example precision.
+
+        Returns:
+        Job: Awaitable, with the optimal tap position.
+        """
+
+        def function(progress):
+            tap = optimal_tap_position(case["network"], case["active"], case["reactive"], engine=self.engine, **options)
+            return tap.find_optimal_tap_position(optimization_criteria, progress=progress)
+
+        return self.submit(self._key("optimal_tap", case, criteria=optimization_criteria, **options), function)
+
+    def n1(self, case: dict, line_id: int, incremental: bool = False, **options) -> Job:
+        """
+        N-1 calculation, see n1_calculation.n1_calculate.
+        The progress is reported after every alternative line.
+
+        Args:
+        case (dict): Paths of the network data, the meta data and the active and reactive load profiles.
+        line_id (int): The line to disconnect.
+        incremental (bool): Reuse the base case for the lines outside of the fundamental cycle.
+        options: Extra arguments of n1_calculation, for example precision.
+
+        Returns:
+        Job: Awaitable, with the table of the alternatives.
+        """
+
+        def function(progress):
+            n1 = n1_calculation(
+                case["network"], case["meta"], case["active"], case["reactive"], engine=self.engine, **options
+            )
+            return n1.n1_calculate(line_id, incremental=incremental, progress=progress)
+
+        return self.submit(self._key("n1", case, line_id=line_id, incremental=incremental, **options), function)
+
+    def shutdown(self, cancel: bool = True):
+        """
+        Stop the worker threads, by default cancel the running jobs of all their requesters first.
+        """
+        if cancel:
+            for job in list(self.jobs.values()):
+                job.cancel_all()
+        self.executor.shutdown(wait=False, cancel_futures=cancel)
@@ -0,0 +1,75 @@
+"""
+Checkpoint file for long running sweeps
+
+Every finished unit of a sweep (an alternative line of the N-1 calculation, a tap position) is appended
+to the checkpoint file as one JSON line, so a killed run can be resumed without repeating the finished units.
+The first line holds the fingerprint of the inputs, a checkpoint of other inputs is never reused.
+"""
+
+import json
+import os
+
+
+class Checkpoint:
+    """
+    Append-only checkpoint file with the results of the finished units of a sweep.
+    """
+
+    def __init__(self, path: str, fingerprint: str):
+        """
+        Open the checkpoint file and load the results of the finished units:
+        1.  If the file exists and its fingerprint matches, read the results line by line,
+            up to a line which was not completely written when the run was killed.
+        2.  Otherwise, the results are discarded.
+        3.  Rewrite the file with the fingerprint and the valid results, then new results are appended.
+
+        Args:
+        path (str): Path to the checkpoint file.
+        fingerprint (str): Fingerprint of the inputs of the sweep.
+        """
+        self.path = path
+        self.fingerprint = fingerprint
+        self.results = {}
+        if os.path.exists(path):
+            with open(path, "r") as file:
+                lines = file.readlines()
+            try:
+                header = json.loads(lines[0]) if lines else {}
+            except json.JSONDecodeError:
+                header = {}
+            if header.get("fingerprint") == fingerprint:
+                for line in lines[1:]:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        break
+                    self.results[record["key"]] = record["value"]
+        temporary_path = path + ".tmp"
+        with open(temporary_path, "w") as file:
+            file.write(json.dumps({"fingerprint": fingerprint}) + "\n")
+            for key, value in self.results.items():
+                file.write(json.dumps({"key": key, "value": value}) + "\n")
+        os.replace(temporary_path, path)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.results
+
+    def get(self, key: str):
+        """
+        The result of a finished unit, or None.
+        """
+        return self.results.get(key)
+
+    def add(self, key: str, value):
+        """
+        Append the result of a finished unit to the checkpoint file, and flush it to disk.
+
+        Args:
+        key (str): The unit, for example "18:24" for alternative line 24 of line 18.
+        value: JSON serializable result of the unit.
+        """
+        self.results[key] = value
+        with open(self.path, "a") as file:
+            file.write(json.dumps({"key": key, "value": value}) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
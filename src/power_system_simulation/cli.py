@@ -0,0 +1,325 @@
+"""
+Command line batch runner of the studies for many grids
+
+    power-system-simulation manifest.json --output results --workers 4
+
+The manifest is a JSON file with the cases and the studies to run for every case:
+
+    {
+        "cases": [
+            {
+                "name": "feeder_1",
+                "network": "feeder_1/input_network_data.json",
+                "meta": "feeder_1/meta_data.json",
+                "active": "feeder_1/active_power_profile.parquet",
+                "reactive": "feeder_1/reactive_power_profile.parquet",
+                "ev": "feeder_1/ev_active_power_profile.parquet"
+            }
+        ],
+        "studies": [
+            {"study": "validation"},
+            {"study": "time_series"},
+            {"study": "ev_penetration", "p_level": 0.5},
+            {"study": "optimal_tap", "criteria": "minimize_line_losses"},
+            {"study": "n1", "line_id": 18}
+        ]
+    }
+
+Relative paths are relative to the manifest. A case can have its own "studies" list.
+The cases are run in parallel in a process pool, every process loads a case once for all its studies.
+The result tables are written to <output>/<case>/<study number>_<study>_<table>.parquet as soon as a case finishes,
+and the timing and the failures of every study are appended to <output>/summary.parquet.
+A failing study is reported in the summary and does not stop the batch.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from power_system_simulation.lazy_import import lazy_import
+from power_system_simulation.power_grid_calculation import ENGINES, PowerGridCalculation
+from power_system_simulation.power_system_simulation import (
+    ev_penetration_level,
+    input_data_validity_check,
+    n1_calculation,
+    optimal_tap_position,
+)
+
+pd = lazy_import("pandas")
+pa = lazy_import("pyarrow")
+pq = lazy_import("pyarrow.parquet")
+
+STUDIES = ("validation", "time_series", "ev_penetration", "optimal_tap", "n1")
+
+SUMMARY_COLUMNS = ["case", "study", "parameters", "status", "seconds", "error", "outputs"]
+
+
+class InvalidManifestError(Exception):
+    """
+    The manifest should have a list of cases with a name, and known studies.
+    """
+
+
+def read_manifest(path: str) -> list:
+    """
+    Read the manifest and return the cases, with absolute paths and the list of studies of every case.
+
+    Raises:
+    InvalidManifestError.
+    """
+    with open(path, "r") as file:
+        manifest = json.load(file)
+    directory = os.path.dirname(os.path.abspath(path))
+    cases = manifest.get("cases")
+    if not isinstance(cases, list) or not cases:
+        raise InvalidManifestError("The manifest should have a non empty list of cases")
+    result = []
+    for case in cases:
+        if "name" not in case:
+            raise InvalidManifestError(f"Case without a name: {case}")
+        case = dict(case)
+        for key in ["network", "meta", "active", "reactive", "ev"]:
+            if key in case:
+                case[key] = os.path.join(directory, case[key])
+        case["studies"] = case.get("studies", manifest.get("studies", []))
+        for study in case["studies"]:
+            if study.get("study") not in STUDIES:
+                raise InvalidManifestError(f"Unknown study {study.get('study')}, should be one of {STUDIES}")
+        result.append(case)
+    return result
+
+
+class CaseRunner:
+    """
+    Run the studies of one case, the loaded grid and profiles are reused by all the studies of the case.
+    """
+
+    def __init__(self, case: dict, engine: str):
+        """
+        Args:
+        case (dict): Case of the manifest, with the absolute paths of its input files.
+        engine (str): Power flow engine of the studies, "power_grid_model" or "radial".
+        """
+        self.case = case
+        self.engine = engine
+        self.loaded = {}
+
+    def _load(self, name: str, create):
+        """
+        Return the loaded study object of the case with the given name, create it on first use.
+        """
+        if name not in self.loaded:
+            self.loaded[name] = create()
+        return self.loaded[name]
+
+    def validation(self, study: dict) -> dict:
+        """
+        Validate the case with input_data_validity_check.validate_all.
+
+        Args:
+        study (dict): The study of the manifest, without parameters.
+
+        Returns:
+        dict: The "issues" table with the rule, the error and the IDs of every issue.
+        """
+        case = self.case
+        # the PGM input errors are reported by validate_all instead of raised by the constructor
+        checker = self._load("validation", lambda: input_data_validity_check(case["network"], validation_mode="off"))
+        issues = checker.validate_all(case["meta"], case["active"], case["reactive"], case["ev"])
+        table = pd.DataFrame(
+            {
+                "rule": [issue["rule"] for issue in issues],
+                "error": [issue["error"].__name__ for issue in issues],
+                "ids": [", ".join(str(i) for i in issue["ids"]) for issue in issues],
+            }
+        )
+        return {"issues": table}
+
+    def time_series(self, study: dict) -> dict:
+        """
+        Time series power flow calculation, see PowerGridCalculation.time_series_power_flow_calculation.
+
+        Args:
+        study (dict): The study of the manifest, without parameters.
+
+        Returns:
+        dict: The "nodes" and "lines" tables.
+        """
+
+        def create():
+            pgc = PowerGridCalculation(engine=self.engine)
+            pgc.construct_pgm(self.case["network"])
+            pgc.creat_batch_update_dataset(self.case["active"], self.case["reactive"])
+            return pgc
+
+        nodes, lines = self._load("time_series", create).time_series_power_flow_calculation()
+        return {"nodes": nodes, "lines": lines}
+
+    def ev_penetration(self, study: dict) -> dict:
+        """
+        EV penetration study, see ev_penetration_level.calculate.
+
+        Args:
+        study (dict): The study of the manifest, with the "p_level" (default 0.5).
+
+        Returns:
+        dict: The "nodes" and "lines" tables.
+        """
+        case = self.case
+        ev = self._load(
+            "ev_penetration",
+            lambda: ev_penetration_level(
+                case["network"], case["active"], case["reactive"], case["ev"], case["meta"], engine=self.engine
+            ),
+        )
+        nodes, lines = ev.calculate(study.get("p_level", 0.5))
+        return {"nodes": nodes, "lines": lines}
+
+    def optimal_tap(self, study: dict) -> dict:
+        """
+        Optimal tap position, see optimal_tap_position.find_optimal_tap_position.
+
+        Args:
+        study (dict): The study of the manifest, with the "criteria" (default "minimize_line_losses").
+
+        Returns:
+        dict: The "optimal_tap" table with the criteria and the optimal tap position.
+        """
+        case = self.case
+        tap = self._load(
+            "optimal_tap",
+            lambda: optimal_tap_position(case["network"], case["active"], case["reactive"], engine=self.engine),
+        )
+        criteria = study.get("criteria", "minimize_line_losses")
+        optimal_tap_pos = tap.find_optimal_tap_position(criteria)
+        return {"optimal_tap": pd.DataFrame({"criteria": [criteria], "optimal_tap_pos": [int(optimal_tap_pos)]})}
+
+    def n1(self, study: dict) -> dict:
+        """
+        N-1 calculation, see n1_calculation.n1_calculate.
+
+        Args:
+        study (dict): The study of the manifest, with the "line_id" to disconnect.
+
+        Returns:
+        dict: The "alternatives" table.
+        """
+        case = self.case
+        n1 = self._load(
+            "n1",
+            lambda: n1_calculation(case["network"], case["meta"], case["active"], case["reactive"], engine=self.engine),
+        )
+        return {"alternatives": n1.n1_calculate(study["line_id"])}
+
+
+def run_case(case: dict, output: str, engine: str) -> list:
+    """
+    Run all the studies of a case in a worker process and write the result tables.
+
+    Returns:
+    list: One summary row per study.
+    """
+    runner = CaseRunner(case, engine)
+    case_directory = os.path.join(output, case["name"])
+    os.makedirs(case_directory, exist_ok=True)
+    rows = []
+    for number, study in enumerate(case["studies"]):
+        parameters = {key: value for key, value in study.items() if key != "study"}
+        row = {
+            "case": case["name"],
+            "study": study["study"],
+            "parameters": json.dumps(parameters),
+            "status": "ok",
+            "seconds": 0.0,
+            "error": "",
+            "outputs": "",
+        }
+        start = time.perf_counter()
+        try:
+            tables = getattr(runner, study["study"])(study)
+            outputs = []
+            for name, table in tables.items():
+                path = os.path.join(case_directory, f"{number}_{study['study']}_{name}.parquet")
+                table.to_parquet(path)
+                outputs.append(os.path.relpath(path, output))
+            row["outputs"] = json.dumps(outputs)
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            row["status"] = "failed"
+            row["error"] = "".join(traceback.format_exception_only(type(error), error)).strip()
+        row["seconds"] = time.perf_counter() - start
+        rows.append(row)
+    return rows
+
+
+def run_batch(manifest: str, output: str, workers: int = None, engine: str = "power_grid_model") -> list:
+    """
+    Run the studies of all the cases of a manifest in a process pool.
+    The summary rows of a case are appended to the summary parquet file as soon as the case finishes.
+
+    Args:
+    manifest (str): Path to the manifest JSON file.
+    output (str): Output directory.
+    workers (int): Number of worker processes, by default the number of processors.
+    engine (str): Power flow engine, "power_grid_model" or "radial".
+
+    Returns:
+    list: The summary rows of all the studies.
+    """
+    cases = read_manifest(manifest)
+    os.makedirs(output, exist_ok=True)
+    schema = pa.schema([(name, pa.float64() if name == "seconds" else pa.string()) for name in SUMMARY_COLUMNS])
+    summary = []
+    with pq.ParquetWriter(os.path.join(output, "summary.parquet"), schema) as writer:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(run_case, case, output, engine): case for case in cases}
+            for future in as_completed(futures):
+                case = futures[future]
+                try:
+                    rows = future.result()
+                except Exception as error:  # pylint: disable=broad-exception-caught
+                    # the worker process itself failed, for example because it ran out of memory
+                    rows = [
+                        {
+                            "case": case["name"],
+                            "study": "",
+                            "parameters": "",
+                            "status": "failed",
+                            "seconds": 0.0,
+                            "error": repr(error),
+                            "outputs": "",
+                        }
+                    ]
+                writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+                seconds = sum(row["seconds"] for row in rows)
+                failed = [row for row in rows if row["status"] != "ok"]
+                print(f"{case['name']}: {len(rows) - len(failed)} ok, {len(failed)} failed, {seconds:.2f} s")
+                for row in failed:
+                    print(f"    {row['study']}: {row['error']}")
+                summary.extend(rows)
+    return summary
+
+
+def main(argv: list = None) -> int:
+    """
+    Console entry point, returns exit code 1 if any study failed.
+    """
+    parser = argparse.ArgumentParser(
+        prog="power-system-simulation", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("manifest", help="manifest JSON file with the cases and studies")
+    parser.add_argument("--output", default="results", help="output directory of the result tables")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--engine", default="power_grid_model", choices=list(ENGINES), help="power flow engine")
+    args = parser.parse_args(argv)
+    summary = run_batch(args.manifest, args.output, args.workers, args.engine)
+    failed = sum(row["status"] != "ok" for row in summary)
+    print(f"{len(summary) - failed} studies ok, {failed} failed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
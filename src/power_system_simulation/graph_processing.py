@@ -5,9 +5,16 @@ We define a graph processor class with some function skeletons.
 """
 
 import copy
+import hashlib
+import os
+from collections import Counter
 from typing import List, Tuple
 
-import networkx as nx
+import numpy as np
+
+from power_system_simulation.lazy_import import lazy_import
+
+nx = lazy_import("networkx")
 
 
 class IDNotFoundError(Exception):
@@ -108,9 +115,9 @@ class GraphProcessor:
 
         self.graph = nx.Graph()
         self.graph.add_nodes_from(vertex_ids)
-        for (u, v), enabled in zip(edge_vertex_id_pairs, edge_enabled):
+        for edge, (u, v), enabled in zip(edge_ids, edge_vertex_id_pairs, edge_enabled):
             if enabled:
-                self.graph.add_edge(u, v)
+                self.graph.add_edge(u, v, id=edge)
 
         if not nx.is_connected(self.graph):
             raise GraphNotFullyConnectedError
@@ -118,6 +125,253 @@ class GraphProcessor:
         if nx.cycle_basis(self.graph):
             raise GraphCycleError
 
+        self._tree_order = None
+
+    @staticmethod
+    def fingerprint(
+        vertex_ids: List[int],
+        edge_ids: List[int],
+        edge_vertex_id_pairs: List[Tuple[int, int]],
+        edge_enabled: List[bool],
+        source_vertex_id: int,
+    ) -> str:
+        """
+        Hash of the arguments of a graph processor, the key of its topology file, see load_or_create.
+
+        Returns:
+            The sha1 hex digest of the arguments.
+        """
+        digest = hashlib.sha1()
+        for values in [vertex_ids, edge_ids, edge_vertex_id_pairs, edge_enabled, [source_vertex_id]]:
+            array = np.asarray(values)
+            digest.update(f"{array.dtype}{array.shape}".encode())
+            digest.update(array.tobytes())
+        return digest.hexdigest()
+
+    def save(self, path: str, fingerprint: str):
+        """
+        Save the validated structure of the graph to a topology file (.npz):
+        the vertex and edge ids, the vertex id pairs of the edges, the enabled mask, the source vertex
+        and the tree order.
+
+        Args:
+            path: path to the topology file
+            fingerprint: the fingerprint of the arguments of this graph processor
+        """
+        temporary_path = path + ".tmp.npz"
+        tree_order = self.find_tree_order()
+        np.savez(
+            temporary_path,
+            fingerprint=np.array(fingerprint),
+            vertex_ids=np.asarray(list(self.graph.nodes)),
+            edge_ids=np.asarray(self.edge_ids),
+            edge_from=np.asarray([u for u, _ in self.edge_vertex_id_pairs]),
+            edge_to=np.asarray([v for _, v in self.edge_vertex_id_pairs]),
+            edge_enabled=np.asarray(self.edge_enabled, dtype=bool),
+            source_vertex_id=np.array(self.source_vertex_id),
+            tree_upstream=np.asarray([u for u, _, _ in tree_order]),
+            tree_downstream=np.asarray([v for _, v, _ in tree_order]),
+            tree_edge_ids=np.asarray([edge for _, _, edge in tree_order]),
+        )
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def load(cls, path: str, fingerprint: str):
+        """
+        Load a graph processor from a topology file written by save, without validating it again.
+
+        Args:
+            path: path to the topology file
+            fingerprint: the fingerprint of the arguments of the graph processor
+
+        Returns:
+            The graph processor, or None if the file does not exist or was saved for other arguments.
+        """
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as topology:
+            if str(topology["fingerprint"]) != fingerprint:
+                return None
+            processor = cls.__new__(cls)
+            processor.edge_ids = topology["edge_ids"].tolist()
+            processor.edge_vertex_id_pairs = list(zip(topology["edge_from"].tolist(), topology["edge_to"].tolist()))
+            processor.edge_enabled = topology["edge_enabled"].tolist()
+            processor.source_vertex_id = topology["source_vertex_id"].item()
+            processor._tree_order = list(
+                zip(
+                    topology["tree_upstream"].tolist(),
+                    topology["tree_downstream"].tolist(),
+                    topology["tree_edge_ids"].tolist(),
+                )
+            )
+            processor.graph = nx.Graph()
+            processor.graph.add_nodes_from(topology["vertex_ids"].tolist())
+            processor.graph.add_edges_from((u, v, {"id": edge}) for u, v, edge in processor._tree_order)
+        return processor
+
+    @classmethod
+    def load_or_create(
+        cls,
+        path: str,
+        vertex_ids: List[int],
+        edge_ids: List[int],
+        edge_vertex_id_pairs: List[Tuple[int, int]],
+        edge_enabled: List[bool],
+        source_vertex_id: int,
+    ):
+        """
+        Load the graph processor from the topology file if it was saved for the same arguments,
+        otherwise create (and validate) it and save it to the topology file.
+        The topology rarely changes, so the validation and the graph construction are done once.
+
+        Args:
+            path: path to the topology file
+            the other arguments: see __init__
+
+        Returns:
+            The graph processor.
+        """
+        arguments = (vertex_ids, edge_ids, edge_vertex_id_pairs, edge_enabled, source_vertex_id)
+        fingerprint = cls.fingerprint(*arguments)
+        processor = cls.load(path, fingerprint)
+        if processor is None:
+            processor = cls(*arguments)
+            processor.save(path, fingerprint)
+        return processor
+
+    @staticmethod
+    def validate_all(
+        vertex_ids: List[int],
+        edge_ids: List[int],
+        edge_vertex_id_pairs: List[Tuple[int, int]],
+        edge_enabled: List[bool],
+        source_vertex_id: int,
+    ) -> List[dict]:
+        """
+        Run all the checks of the initialization in one pass and report every violation,
+        instead of raising an error at the first one.
+        The arguments are the same as for the initialization.
+
+        For example, given the following input:
+
+            vertex_ids = [0, 2, 2], edge_ids = [1, 3], edge_vertex_id_pairs = [(0, 2), (2, 4)],
+            edge_enabled = [True, True], source_vertex_id = 0
+
+        The report contains IDNotUniqueError with ids [2] and IDNotFoundError with ids [4].
+
+        Args:
+            vertex_ids: list of vertex ids
+            edge_ids: liest of edge ids
+            edge_vertex_id_pairs: list of tuples of two integer
+            edge_enabled: list of bools indicating of an edge is enabled or not
+            source_vertex_id: vertex id of the source in the graph
+
+        Returns:
+            A list of issues. Each issue is a dict with the violated "rule",
+            the "error" class which the initialization would raise, and the offending "ids".
+        """
+        issues = []
+        vertex_set = set(vertex_ids)
+
+        duplicated_ids = [vertex for vertex, count in Counter(vertex_ids).items() if count > 1]
+        duplicated_ids += [edge for edge, count in Counter(edge_ids).items() if count > 1]
+        if duplicated_ids:
+            issues.append(
+                {"rule": "vertex_ids and edge_ids should be unique", "error": IDNotUniqueError, "ids": duplicated_ids}
+            )
+
+        if len(edge_ids) != len(set(edge_vertex_id_pairs)):
+            issues.append(
+                {
+                    "rule": "edge_vertex_id_pairs should have the same length as edge_ids",
+                    "error": InputLengthDoesNotMatchError,
+                    "ids": [],
+                }
+            )
+
+        missing_ids = sorted({vertex for pair in edge_vertex_id_pairs for vertex in pair if vertex not in vertex_set})
+        if missing_ids:
+            issues.append(
+                {
+                    "rule": "edge_vertex_id_pairs should contain valid vertex ids",
+                    "error": IDNotFoundError,
+                    "ids": missing_ids,
+                }
+            )
+
+        if len(edge_enabled) != len(edge_ids):
+            issues.append(
+                {
+                    "rule": "edge_enabled should have the same length as edge_ids",
+                    "error": InputLengthDoesNotMatchError,
+                    "ids": [],
+                }
+            )
+
+        if source_vertex_id not in vertex_set:
+            issues.append(
+                {
+                    "rule": "source_vertex_id should be a valid vertex id",
+                    "error": IDNotFoundError,
+                    "ids": [source_vertex_id],
+                }
+            )
+
+        # build the graph from the valid part of the input to check the connectivity and cycles
+        graph = nx.Graph()
+        graph.add_nodes_from(vertex_ids)
+        edge_lookup = {}
+        for edge, (u, v), enabled in zip(edge_ids, edge_vertex_id_pairs, edge_enabled):
+            if enabled and u in vertex_set and v in vertex_set:
+                graph.add_edge(u, v)
+                edge_lookup[frozenset((u, v))] = edge
+
+        if graph.number_of_nodes() > 0 and not nx.is_connected(graph):
+            if source_vertex_id in vertex_set:
+                connected = nx.node_connected_component(graph, source_vertex_id)
+            else:
+                connected = max(nx.connected_components(graph), key=len)
+            issues.append(
+                {
+                    "rule": "The graph should be fully connected",
+                    "error": GraphNotFullyConnectedError,
+                    "ids": sorted(vertex_set - connected),
+                }
+            )
+
+        cycle_edges = set()
+        for cycle in nx.cycle_basis(graph):
+            for u, v in zip(cycle, cycle[1:] + cycle[:1]):
+                cycle_edges.add(edge_lookup[frozenset((u, v))])
+        if cycle_edges:
+            issues.append(
+                {"rule": "The graph should not contain cycles", "error": GraphCycleError, "ids": sorted(cycle_edges)}
+            )
+
+        return issues
+
+    def find_tree_order(self) -> List[Tuple[int, int, int]]:
+        """
+        Return the enabled edges in breadth-first order from the source vertex,
+            each as a tuple of (upstream vertex, downstream vertex, edge id).
+        Every vertex except the source appears exactly once as downstream vertex,
+            after its own upstream vertex.
+
+        For example, given the following graph (all edges enabled):
+
+            vertex_0 (source) --edge_1-- vertex_2 --edge_3-- vertex_4
+
+        Call find_tree_order will return [(0, 2, 1), (2, 4, 3)]
+
+        Returns:
+            A list of (upstream vertex, downstream vertex, edge id) tuples.
+        """
+        if self._tree_order is None:
+            self._tree_order = [
+                (u, v, self.graph.edges[u, v]["id"]) for u, v in nx.bfs_edges(self.graph, self.source_vertex_id)
+            ]
+        return list(self._tree_order)
+
     def find_downstream_vertices(self, edge_id: int) -> List[int]:
         """
         Given an edge id, return all the vertices which are in the downstream of the edge,
@@ -0,0 +1,116 @@
+"""
+EV hosting capacity of an LV grid
+
+The violations of the voltage and loading limits only increase with the number of EVs, so the maximum EV penetration
+level within the limits is found by bisection over the number of EVs per feeder, with a time series power flow
+calculation per searched level of an ev_penetration_level study.
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+
+def first_violation(output_data: dict, timestamp, v_limits: Tuple[float, float], loading_limit: float):
+    """
+    The first timestamp where a voltage or loading limit is violated, with the worst node and line,
+    or None if the limits are never violated.
+
+    Args:
+    output_data (dict): Batch output dataset of a time series power flow calculation.
+    timestamp (pd.Index): The timestamps of the scenarios.
+    v_limits (tuple): Minimum and maximum node voltage in p.u.
+    loading_limit (float): Maximum line loading in p.u.
+
+    Returns:
+    dict: The "timestamp", "node_id" and "line_id" of the violation, or None.
+    """
+    u_pu = output_data["node"]["u_pu"]
+    loading = output_data["line"]["loading"]
+    v_excess = np.maximum(v_limits[0] - u_pu, u_pu - v_limits[1])
+    loading_excess = loading - loading_limit
+    violated = np.any(v_excess > 0, axis=1) | np.any(loading_excess > 0, axis=1)
+    if not np.any(violated):
+        return None
+    t = np.argmax(violated)
+    return {
+        "timestamp": timestamp[t],
+        "node_id": int(output_data["node"]["id"][t, np.argmax(v_excess[t])]) if np.any(v_excess[t] > 0) else None,
+        "line_id": (
+            int(output_data["line"]["id"][t, np.argmax(loading_excess[t])]) if np.any(loading_excess[t] > 0) else None
+        ),
+    }
+
+
+def hosting_capacity(ev, v_limits: Tuple[float, float], loading_limit: float) -> dict:
+    """
+    Find the maximum EV penetration level which keeps the node voltages and the line loadings within the limits:
+    1.  The distinct levels are the numbers of EVs per feeder, from 0 to the size of the largest feeder.
+    2.  Bisect over the number of EVs per feeder, every level is calculated at most once.
+    3.  The hosting capacity is the largest penetration level with fewer EVs per feeder than the first violating
+        number, just below the violating level, or 1.0 if no level violates the limits.
+    4.  For the first level which violates the limits,
+        find the first timestamp with a violation and the worst node and line at that timestamp.
+    5.  Set the load profiles of the study back to the original load profiles.
+
+    Args:
+    ev (ev_penetration_level): The EV penetration study.
+    v_limits (tuple): Minimum and maximum node voltage in p.u.
+    loading_limit (float): Maximum line loading in p.u.
+
+    Returns:
+    dict: The limiting level:
+        - "p_level": The maximum penetration level within the limits, None if there is a violation without EVs.
+          Every level below it is within the limits as well.
+        - "evs_per_feeder": The number of EVs per feeder at that level.
+        - "violating_p_level": The lowest penetration level with a violation, None if there is no violation.
+        - "timestamp", "node_id", "line_id": The first violation at that level,
+          node_id (line_id) is None if there is no voltage (loading) violation at that timestamp.
+    """
+    total_houses = len(ev.grid["sym_load"]["id"])
+    number_of_feeders = len(ev.meta["lv_feeders"])
+    max_evs = min(ev.evs_per_feeder(1.0), max(len(loads) for loads in ev.feeder_loads()))
+    cache = {}
+
+    def violation(evs: int):
+        if evs not in cache:
+            ev.assign_ev_profiles(evs)
+            output_data = ev.pgc.calculate(ev.grid, ev.update_data)
+            cache[evs] = first_violation(output_data, ev.pgc.timestamp, v_limits, loading_limit)
+        return cache[evs]
+
+    # invariant: low is within the limits, high violates them
+    low, high = -1, max_evs + 1
+    if violation(max_evs) is None:
+        low = max_evs
+    else:
+        high = max_evs
+    while high - low > 1:
+        middle = (low + high) // 2
+        if violation(middle) is None:
+            low = middle
+        else:
+            high = middle
+    ev.update_data["sym_load"]["p_specified"] = ev.base_p_specified
+    ev.pgc.set_update_data(ev.update_data)
+
+    p_level = None
+    if high > max_evs:
+        p_level = 1.0
+    elif low >= 0:
+        # the largest level with fewer EVs per feeder than the violating number
+        p_level = high * number_of_feeders / total_houses
+        while ev.evs_per_feeder(p_level) >= high:
+            p_level = float(np.nextafter(p_level, 0.0))
+    result = {
+        "p_level": p_level,
+        "evs_per_feeder": low if low >= 0 else None,
+        "violating_p_level": None,
+        "timestamp": None,
+        "node_id": None,
+        "line_id": None,
+    }
+    if high <= max_evs:
+        result["violating_p_level"] = high * number_of_feeders / total_houses
+        result.update(violation(high))
+    return result
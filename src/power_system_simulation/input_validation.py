@@ -0,0 +1,158 @@
+"""
+Input data errors of the LV grid studies, and the validation report
+
+The checks of power_system_simulation.input_data_validity_check raise an error at the first violation.
+The report of validate_all collects every violation in one pass instead. Each issue is a dict with the violated "rule",
+the "error" class which the separate check would raise, and the offending "ids".
+"""
+
+import numpy as np
+
+from power_system_simulation.lazy_import import lazy_import
+from power_system_simulation.profile_io import same_values
+
+pgm = lazy_import("power_grid_model")
+pgm_validation = lazy_import("power_grid_model.validation")
+
+
+class MoreThanOneTransformerOrSource(Exception):
+    """
+    The LV grid should have exactly one transformer, and one source.
+    """
+
+
+class InvalidLVFeederID(Exception):
+    """
+    All IDs in the LV Feeder IDs should be valid line IDs.
+    """
+
+
+class MismatchFromAndToNodes(Exception):
+    """
+    All the lines in the LV Feeder IDs should have the from_node the same as the to_node of the transformer.
+    """
+
+
+class MismatchedTimetamps(Exception):
+    """
+    The timestamps should be matching between the active load profile, reactive load profile, and EV charging profile.
+    """
+
+
+class MismatchedIDs(Exception):
+    """
+    The IDs in active load profile and reactive load profile should be matching.
+    """
+
+
+class InvalidIDs(Exception):
+    """
+    The IDs in active load profile and reactive load profile should be valid IDs of sym_load.
+    """
+
+
+class NotEnoughEVChargingProfiles(Exception):
+    """
+    The number of EV charging profile should be at least the same as the number of sym_load.
+    """
+
+
+def issue(rule: str, error: type, ids) -> dict:
+    """
+    An issue of the validation report.
+    """
+    return {"rule": rule, "error": error, "ids": list(ids)}
+
+
+def pgm_issues(grid: dict) -> tuple:
+    """
+    Validate the PGM input data for a power flow calculation.
+
+    Args:
+    grid (dict): PGM input dataset of the grid.
+
+    Returns:
+    tuple: The issues, and the PGM validation errors to raise in strict mode.
+    """
+    errors = pgm_validation.validate_input_data(input_data=grid, calculation_type=pgm.CalculationType.power_flow) or []
+    return [issue(str(error), pgm_validation.ValidationException, error.ids or []) for error in errors], errors
+
+
+def grid_issues(grid: dict, meta: dict) -> list:
+    """
+    Check the grid against the meta data, see input_data_validity_check.check_grid.
+
+    Args:
+    grid (dict): PGM input dataset of the grid.
+    meta (dict): Meta data of the grid.
+
+    Returns:
+    list: The issues.
+    """
+    issues = []
+    transformer = grid["transformer"]
+    line = grid["line"]
+    if not (len(transformer) == 1 and len(grid["source"]) == 1):
+        issues.append(
+            issue(
+                "The LV grid should have exactly one transformer and one source",
+                MoreThanOneTransformerOrSource,
+                transformer["id"].tolist() + grid["source"]["id"].tolist(),
+            )
+        )
+    feeder_ids = np.array(meta["lv_feeders"], dtype=line["id"].dtype)
+    invalid_feeders = feeder_ids[~np.isin(feeder_ids, line["id"])]
+    if len(invalid_feeders) > 0:
+        issues.append(
+            issue("All IDs in the LV Feeder IDs should be valid line IDs", InvalidLVFeederID, invalid_feeders.tolist())
+        )
+    if len(transformer) > 0:
+        mismatched = np.isin(line["id"], feeder_ids) & (line["from_node"] != transformer["to_node"][0])
+        if np.any(mismatched):
+            issues.append(
+                issue(
+                    "The from_node of the LV feeders should be the to_node of the transformer",
+                    MismatchFromAndToNodes,
+                    line["id"][mismatched].tolist(),
+                )
+            )
+    return issues
+
+
+def profile_issues(grid: dict, profiles_metadata: list) -> list:
+    """
+    Check the timestamps and IDs of the profiles, see input_data_validity_check.check_matching,
+    and the number of EV charging profiles, see input_data_validity_check.check_ev_charging_profiles.
+
+    Args:
+    grid (dict): PGM input dataset of the grid.
+    profiles_metadata (list): The (timestamps, IDs) of the active, reactive and EV profiles,
+        see profile_io.read_profiles_metadata.
+
+    Returns:
+    list: The issues.
+    """
+    issues = []
+    (active_timestamps, active_ids), (reactive_timestamps, reactive_ids), (ev_timestamps, ev_ids) = profiles_metadata
+    if not (same_values(active_timestamps, reactive_timestamps) and same_values(reactive_timestamps, ev_timestamps)):
+        issues.append(
+            issue("The timestamps of the active, reactive and EV profiles should be matching", MismatchedTimetamps, [])
+        )
+    if not same_values(active_ids, reactive_ids):
+        issues.append(
+            issue(
+                "The IDs in the active and reactive load profile should be matching",
+                MismatchedIDs,
+                np.setxor1d(active_ids, reactive_ids).tolist(),
+            )
+        )
+    invalid_ids = np.setxor1d(grid["sym_load"]["id"], active_ids)
+    if len(invalid_ids) > 0:
+        issues.append(
+            issue("The IDs in the load profiles should be the IDs of sym_load", InvalidIDs, invalid_ids.tolist())
+        )
+    if len(ev_ids) < len(grid["sym_load"]):
+        issues.append(
+            issue("There should be at least as many EV charging profiles as sym_loads", NotEnoughEVChargingProfiles, [])
+        )
+    return issues
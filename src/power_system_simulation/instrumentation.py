@@ -0,0 +1,156 @@
+"""
+Opt-in instrumentation of the stages of the calculations.
+
+The stages (JSON parsing, parquet reading, validation, model construction, power flow, post processing, ...)
+are marked in the code with the stage context manager. They are only measured while a StageProfiler is active:
+
+    with StageProfiler(track_memory=True) as profiler:
+        ev_penetration_level(...).calculate(0.5)
+    print(profiler.to_json(indent=2))
+
+When no profiler is active, stage returns a shared no-op context manager, so the instrumentation costs nothing.
+
+A profiler only records the stages of the thread in which it is active, so studies which run concurrently
+in other threads (for example in the StudyQueue of async_api) are not mixed into its records.
+The memory is traced for the whole process by tracemalloc, track memory only when one study runs at a time.
+"""
+
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import nullcontext
+from typing import Callable
+
+_NO_STAGE = nullcontext()
+
+
+class _ThreadState(threading.local):
+    """
+    The profilers which are currently active in a thread, and the stack of the stages which are currently measured.
+    """
+
+    def __init__(self) -> None:
+        self.profilers = []
+        self.frames = []
+
+
+_state = _ThreadState()
+
+
+class StageProfiler:
+    """
+    Context manager which records the wall time, the number of calls and the peak memory of every stage
+    of the thread in which it is entered. It should be exited in the same thread.
+    """
+
+    def __init__(self, track_memory: bool = False, callback: Callable = None) -> None:
+        """
+        Initialize the profiler.
+
+        Args:
+        track_memory (bool): Also record the peak memory allocated through Python (tracemalloc) in every stage.
+            This includes the numpy arrays, but not the internal memory of power-grid-model.
+            Tracing memory slows down the calculations.
+        callback (Callable): Optional function called as callback(stage, seconds, peak_bytes) every time a stage ends.
+            peak_bytes is None if the memory is not tracked.
+        """
+        self.track_memory = track_memory
+        self.callback = callback
+        self.stages = {}
+        self._started_tracemalloc = False
+
+    def __enter__(self):
+        if self.track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        _state.profilers.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _state.profilers.remove(self)
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def record(self, name: str, seconds: float, peak_bytes: int = None):
+        """
+        Add one call of a stage to the records.
+        """
+        record = self.stages.setdefault(name, {"calls": 0, "seconds": 0.0, "peak_mb": None})
+        record["calls"] += 1
+        record["seconds"] += seconds
+        if self.track_memory and peak_bytes is not None:
+            record["peak_mb"] = max(record["peak_mb"] or 0.0, peak_bytes / 1e6)
+        if self.callback is not None:
+            self.callback(name, seconds, peak_bytes if self.track_memory else None)
+
+    def to_dict(self) -> dict:
+        """
+        Return the records as {stage: {"calls": int, "seconds": float, "peak_mb": float or None}}.
+        """
+        return {name: dict(record) for name, record in self.stages.items()}
+
+    def to_json(self, **kwargs) -> str:
+        """
+        Return the records as a JSON string, the keyword arguments are passed to json.dumps.
+        """
+        return json.dumps(self.to_dict(), **kwargs)
+
+
+class _Stage:
+    """
+    Measurement of one stage for all the active profilers.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.start = 0.0
+        self.frame = None
+
+    def __enter__(self):
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            # the peak is reset for this stage, keep the peak so far of the enclosing stage
+            frames = _state.frames
+            if frames:
+                frames[-1]["max_peak"] = max(frames[-1]["max_peak"], peak)
+            tracemalloc.reset_peak()
+            self.frame = {"start": current, "max_peak": current}
+            frames.append(self.frame)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        seconds = time.perf_counter() - self.start
+        peak_bytes = None
+        if self.frame is not None:
+            frames = _state.frames
+            frames.pop()
+            absolute_peak = self.frame["max_peak"]
+            if tracemalloc.is_tracing():
+                absolute_peak = max(absolute_peak, tracemalloc.get_traced_memory()[1])
+            if frames:
+                frames[-1]["max_peak"] = max(frames[-1]["max_peak"], absolute_peak)
+            peak_bytes = absolute_peak - self.frame["start"]
+        for profiler in list(_state.profilers):
+            profiler.record(self.name, seconds, peak_bytes)
+
+
+def stage(name: str):
+    """
+    Mark a stage of a calculation, to be used as a context manager:
+
+        with stage("power_flow"):
+            output_data = model.calculate_power_flow(...)
+
+    Args:
+    name (str): Name of the stage.
+
+    Returns:
+    A context manager which measures the stage if a StageProfiler is active in this thread,
+    otherwise a shared no-op.
+    """
+    if not _state.profilers:
+        return _NO_STAGE
+    return _Stage(name)
@@ -0,0 +1,43 @@
+"""
+Lazy import of the heavy dependencies
+
+networkx, scipy, pandas, pyarrow and power-grid-model take most of the import time of this package.
+They are only imported on first use, so short commands like validating one input file start fast.
+"""
+
+import importlib
+import types
+import warnings
+
+
+class LazyModule(types.ModuleType):
+    """
+    Placeholder of a module, which imports the module on the first attribute access.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._module = None
+
+    def __getattr__(self, attribute: str):
+        if self._module is None:
+            with warnings.catch_warnings(action="ignore", category=DeprecationWarning):
+                # suppress warning about pyarrow as future required dependency of pandas
+                self._module = importlib.import_module(self.__name__)
+        return getattr(self._module, attribute)
+
+    def __dir__(self):
+        return dir(importlib.import_module(self.__name__))
+
+
+def lazy_import(name: str) -> LazyModule:
+    """
+    Module which is imported on first use, for example pd = lazy_import("pandas").
+
+    Args:
+    name (str): Full name of the module.
+
+    Returns:
+    LazyModule: Placeholder which behaves like the module.
+    """
+    return LazyModule(name)
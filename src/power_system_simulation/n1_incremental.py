@@ -0,0 +1,133 @@
+"""
+Incremental N-1 calculation from one base case
+
+Disabling a line and enabling an alternative transfers the subtree below the disabled line,
+with current I_T (the current of the disabled line in the base case), to the alternative.
+Only the currents of the fundamental cycle of the alternative change: I_T is subtracted along the path
+from the transferred end of the alternative to the source and added along the path from the other end,
+the common part of the paths does not change. The alternative itself carries I_T.
+The other lines keep the loading of the base case.
+
+The voltages change by at most sqrt(3) * |I_T| * sum(|Z|) of the cycle lines. If this exceeds the voltage tolerance,
+the loads draw noticeably different currents, and the alternative should be calculated in full instead.
+"""
+
+import math
+
+import numpy as np
+
+
+def max_line_loading(output_data: dict) -> tuple:
+    """
+    Maximum line loading, with the timestep and the position of the line where it occurs.
+    """
+    loading = output_data["line"]["loading"]
+    timestep, line = np.unravel_index(np.argmax(loading), loading.shape)
+    return float(loading[timestep, line]), int(timestep), int(line)
+
+
+class BaseCase:
+    """
+    The results of the base case which the incremental N-1 calculation needs, see the module documentation:
+    the line loadings, the line powers, the complex node voltages and the parent of every node in the tree.
+    """
+
+    def __init__(self, grid: dict, output_data: dict, tree_order: list, fingerprint: str = None):
+        """
+        Args:
+        grid (dict): PGM input dataset of the base case.
+        output_data (dict): Batch output dataset of the base case.
+        tree_order (list): The (parent, child, edge ID) tuples of the tree, see GraphProcessor.find_tree_order.
+        fingerprint (str): Optional fingerprint of the inputs, to find out if the base case is still valid.
+        """
+        node = output_data["node"]
+        self.grid = grid
+        self.fingerprint = fingerprint
+        self.loading = np.asarray(output_data["line"]["loading"], dtype=np.float64)
+        self.line = output_data["line"]
+        self.u = node["u"] * np.exp(1j * node["u_angle"].astype(np.float64))
+        self.node_position = {node_id: p for p, node_id in enumerate(grid["node"]["id"].tolist())}
+        self.line_position = {line_id: p for p, line_id in enumerate(grid["line"]["id"].tolist())}
+        self.parent = {v: (u, edge) for u, v, edge in tree_order}
+        self.currents = {}
+
+    def source_path(self, node_id: int) -> list:
+        """
+        The edge IDs on the path from a node to the source in the base case tree.
+        """
+        path = []
+        while node_id in self.parent:
+            node_id, edge = self.parent[node_id]
+            path.append(edge)
+        return path
+
+    def oriented_current(self, position: int) -> np.ndarray:
+        """
+        Complex current of a line in the base case at every timestep, at the side of the source,
+        positive in the direction away from the source.
+        """
+        if position not in self.currents:
+            line = self.grid["line"]
+            child = int(line["to_node"][position])
+            parent = self.parent.get(child)
+            side = "from" if parent is not None and parent[1] == line["id"][position] else "to"
+            node = self.node_position[int(line[f"{side}_node"][position])]
+            power = self.line[f"p_{side}"][:, position] + 1j * self.line[f"q_{side}"][:, position]
+            self.currents[position] = np.conj(power / (math.sqrt(3) * self.u[:, node]))
+        return self.currents[position]
+
+    def cycles(self, line_id: int, alternatives: list, voltage_tolerance: float) -> dict:
+        """
+        Find the fundamental cycle of every alternative of a disabled line.
+
+        Args:
+        line_id (int): The disabled line.
+        alternatives (list): The alternative line IDs.
+        voltage_tolerance (float): The maximum estimated voltage change in p.u. for which the base case is reused.
+
+        Returns:
+        dict: Per alternative, the positions of the cycle lines and the edge IDs of the path from the transferred end
+            to the source, or None if the voltage change exceeds the tolerance.
+        """
+        line = self.grid["line"]
+        u_rated = dict(zip(self.grid["node"]["id"].tolist(), self.grid["node"]["u_rated"].tolist()))
+        transferred = self.oriented_current(self.line_position[line_id])
+        cycles = {}
+        for line_alt in alternatives:
+            alt = self.line_position[line_alt]
+            ends = [int(line["from_node"][alt]), int(line["to_node"][alt])]
+            paths = [set(self.source_path(node)) for node in ends]
+            if line_id not in paths[0]:
+                ends.reverse()
+                paths.reverse()
+            inside, outside = paths
+            cycle = [self.line_position[edge] for edge in inside ^ outside if edge in self.line_position]
+            impedance = sum(abs(complex(line["r1"][p], line["x1"][p])) for p in cycle + [alt])
+            if math.sqrt(3) * np.max(np.abs(transferred)) * impedance / u_rated[ends[0]] > voltage_tolerance:
+                cycles[line_alt] = None
+            else:
+                cycles[line_alt] = (cycle, inside)
+        return cycles
+
+    def estimate(self, line_id: int, line_alt: int, cycle: tuple) -> tuple:
+        """
+        Estimate the maximum line loading of an alternative from the base case.
+
+        Args:
+        line_id (int): The disabled line.
+        line_alt (int): The enabled alternative line.
+        cycle (tuple): The fundamental cycle of the alternative, see cycles.
+
+        Returns:
+        tuple: The maximum line loading, timestep and line position, see max_line_loading.
+        """
+        line = self.grid["line"]
+        cycle, inside = cycle
+        alt = self.line_position[line_alt]
+        transferred = self.oriented_current(self.line_position[line_id])
+        loading = self.loading.copy()
+        for p in cycle:
+            sign = -1.0 if line["id"][p] in inside else 1.0
+            loading[:, p] = np.abs(self.oriented_current(p) + sign * transferred) / line["i_n"][p]
+        loading[:, alt] = np.abs(transferred) / line["i_n"][alt]
+        return max_line_loading({"line": {"loading": loading}})
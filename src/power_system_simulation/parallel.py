@@ -0,0 +1,224 @@
+"""
+Worker pool with the grid and the profiles in shared memory
+
+The input dataset, the load profiles and the EV profiles are copied into shared memory once.
+Every worker attaches to them and builds its model once, for its lifetime.
+A task only describes what changes with respect to the base case, so only a few bytes are sent per task.
+The workers apply the profile reduction and the precision of the study like PowerGridCalculation.calculate,
+so a parallel calculation gives the same results as a serial one. The reduction of the base case profiles
+is calculated once and shared, a task which adds EV profiles is reduced in the worker.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from power_system_simulation.lazy_import import lazy_import
+from power_system_simulation.power_grid_calculation import create_model, run_power_flow
+from power_system_simulation.precision import compact
+from power_system_simulation.profile_reduction import ProfileReduction
+
+pgm = lazy_import("power_grid_model")
+
+# state of a worker process, set by _init_worker
+_worker = {}
+
+
+def _share(array: np.ndarray, blocks: list) -> tuple:
+    """
+    Copy an array into a new shared memory block and return the description to attach to it.
+    """
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+    blocks.append(block)
+    return block.name, array.dtype, array.shape
+
+
+def _attach(description: tuple, blocks: list) -> np.ndarray:
+    """
+    Attach to a shared memory block created by _share.
+    """
+    name, dtype, shape = description
+    # the workers share the resource tracker of the creating process, which unlinks the block in close
+    block = shared_memory.SharedMemory(name=name)
+    blocks.append(block)
+    return np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+def _init_worker(descriptions: dict, engine: str, settings: dict):
+    """
+    Attach the worker to the shared datasets and build the base model.
+    """
+    blocks = []
+    input_data = {component: _attach(description, blocks) for component, description in descriptions["input"].items()}
+    update_data = {component: _attach(description, blocks) for component, description in descriptions["update"].items()}
+    ev = {name: _attach(description, blocks) for name, description in descriptions["ev"].items()}
+    reduced = {name: _attach(description, blocks) for name, description in descriptions["reduced"].items()}
+    _worker.update(
+        blocks=blocks,
+        engine=engine,
+        input_data=input_data,
+        update_data=update_data,
+        ev=ev,
+        reduced=reduced,
+        model=create_model(input_data, engine),
+        **settings,
+    )
+
+
+def _model_for(changes: dict):
+    """
+    Model of the base case with the changes of a task applied to the input data.
+    """
+    if not changes:
+        return _worker["model"]
+    if _worker["engine"] == "power_grid_model":
+        model = _worker["model"].copy()
+        update = {}
+        for component, attributes in changes.items():
+            array = pgm.initialize_array("update", component, len(attributes["id"]))
+            for name, values in attributes.items():
+                array[name] = values
+            update[component] = array
+        model.update(update_data=update)
+        return model
+    input_data = dict(_worker["input_data"])
+    for component, attributes in changes.items():
+        array = input_data[component].copy()
+        sorter = np.argsort(array["id"])
+        position = sorter[np.searchsorted(array["id"], attributes["id"], sorter=sorter)]
+        for name, values in attributes.items():
+            array[name][position] = values
+        input_data[component] = array
+    return create_model(input_data, _worker["engine"])
+
+
+def _run_task(task: dict, reducer):
+    """
+    Calculate one task in a worker:
+    - "input": changes of the input data, {component: {"id": [...], attribute: [...]}}.
+    - "ev": EV profiles to add to the active load profile, [(load position, EV profile index), ...].
+    """
+    model = _model_for(task.get("input"))
+    update_data = _worker["update_data"]
+    if task.get("ev"):
+        ev = _worker["ev"]
+        sym_load = update_data["sym_load"].copy()
+        for position, profile in task["ev"]:
+            start, end = ev["indptr"][profile], ev["indptr"][profile + 1]
+            sym_load["p_specified"][ev["indices"][start:end], position] += ev["data"][start:end]
+        update_data = dict(update_data, sym_load=sym_load)
+    output_data = _calculate(model, update_data, base=not task.get("ev"))
+    return output_data if reducer is None else reducer(output_data)
+
+
+def _calculate(model, update_data: dict, base: bool) -> dict:
+    """
+    Run the power flow of a task with the profile reduction and the precision of the study,
+    the same steps as PowerGridCalculation.calculate.
+    """
+    # one calculation thread per worker, the parallelism is over the workers
+    if _worker["reduction"] is None:
+        output_data = run_power_flow(model, update_data, threading=-1)
+    else:
+        if base:
+            representative, mapping = {"sym_load": _worker["reduced"]["sym_load"]}, _worker["reduced"]["mapping"]
+        else:
+            reduction = ProfileReduction(update_data, _worker["reduction"], _worker["n_clusters"])
+            representative, mapping = reduction.update_data, reduction.mapping
+        output_data = run_power_flow(model, representative, threading=-1)
+        output_data = {component: array[mapping] for component, array in output_data.items()}
+    if _worker["precision"] == "float32":
+        output_data = compact(output_data)
+    return output_data
+
+
+class SharedMemoryExecutor:
+    """
+    Process pool which shares the grid, the load profiles and the EV profiles with its workers.
+    Every task is a small description of the changes with respect to the base case, see map.
+    Use it as a context manager, so the workers are stopped and the shared memory is released.
+    """
+
+    def __init__(
+        self,
+        input_data: dict,
+        update_data: dict,
+        engine: str = "power_grid_model",
+        ev_profiles=None,
+        max_workers: int = None,
+        reduction: str = None,
+        n_clusters: int = None,
+        precision: str = "float64",
+    ):
+        """
+        Copy the datasets into shared memory and start the workers.
+        With a profile reduction, the representative scenarios of the load profiles are shared as well.
+
+        Args:
+        input_data (dict): PGM input dataset of the base case.
+        update_data (dict): PGM batch update dataset with the load profiles.
+        engine (str): Power flow engine, "power_grid_model" or "radial".
+        ev_profiles (scipy.sparse.csc_matrix): Optional EV profiles, which tasks can add to the loads.
+        max_workers (int): Number of worker processes, by default the number of processors.
+        reduction (str), n_clusters (int): Profile reduction of the study, see PowerGridCalculation.
+        precision (str): Precision of the study, the outputs are compacted in "float32" precision.
+        """
+        self.blocks = []
+        descriptions = {
+            "input": {component: _share(array, self.blocks) for component, array in input_data.items()},
+            "update": {component: _share(array, self.blocks) for component, array in update_data.items()},
+            "ev": {},
+            "reduced": {},
+        }
+        if ev_profiles is not None:
+            for name in ["data", "indices", "indptr"]:
+                descriptions["ev"][name] = _share(getattr(ev_profiles, name), self.blocks)
+        if reduction is not None:
+            profile_reduction = ProfileReduction(update_data, reduction, n_clusters)
+            descriptions["reduced"]["sym_load"] = _share(profile_reduction.update_data["sym_load"], self.blocks)
+            descriptions["reduced"]["mapping"] = _share(profile_reduction.mapping, self.blocks)
+        settings = {"reduction": reduction, "n_clusters": n_clusters, "precision": precision}
+        self.pool = ProcessPoolExecutor(
+            max_workers=max_workers, initializer=_init_worker, initargs=(descriptions, engine, settings)
+        )
+
+    def map(self, tasks: list, reducer=None) -> list:
+        """
+        Calculate the tasks in the workers.
+
+        Args:
+        tasks (list): Task descriptions, dictionaries with the optional keys:
+            - "input": changes of the input data, {component: {"id": [...], attribute: [...]}},
+              for example {"line": {"id": [3], "from_status": [0], "to_status": [0]}}.
+            - "ev": EV profiles to add to the active load profile, [(load position, EV profile index), ...].
+        reducer (callable): Optional module level function applied to the output in the worker,
+            to send back only the needed results.
+
+        Returns:
+        list: The (reduced) output of every task, in the order of the tasks.
+        """
+        return list(self.imap(tasks, reducer))
+
+    def imap(self, tasks: list, reducer=None):
+        """
+        Like map, but return an iterator which yields the results in the order of the tasks as they complete.
+        """
+        return self.pool.map(_run_task, tasks, [reducer] * len(tasks))
+
+    def close(self):
+        """
+        Stop the workers and release the shared memory.
+        """
+        self.pool.shutdown()
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,270 @@
+"""
+Partitioned studies of networks with several LV grids behind separate transformers
+
+The studies of power_system_simulation need an LV grid with exactly one transformer and one source.
+An MV/LV export with many transformers is split into independent LV subnetworks at the transformer boundaries:
+1.  The graph of the whole export is built with the GraphProcessor, with the MV source node as the source.
+2.  Without the transformer edges, the nodes connected to the LV side of a transformer form its LV grid.
+3.  The subnetwork of a transformer has the MV node of the transformer, the transformer, the LV grid
+    with its lines and loads, and a copy of the source of the export on the MV node.
+4.  The subnetworks are written as network and meta data JSON files. The load profile files are shared,
+    a study only decodes the profile columns of the sym_loads of its own subnetwork.
+
+The studies of the subnetworks run in parallel worker processes and their tables are merged,
+so the run time scales with the size of the largest LV grid and the number of processors.
+The MV grid is treated as stiff: the MV lines and the loads on MV nodes are not part of any subnetwork,
+and normally open lines between two LV grids are left out. The EV charging profiles are assigned
+independently in every subnetwork, from the same EV profile file.
+"""
+
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from power_system_simulation.graph_processing import IDNotFoundError
+from power_system_simulation.lazy_import import lazy_import
+from power_system_simulation.power_grid_calculation import PowerGridCalculation
+from power_system_simulation.power_system_simulation import (
+    create_graph_processor,
+    ev_penetration_level,
+    n1_calculation,
+)
+
+nx = lazy_import("networkx")
+pd = lazy_import("pandas")
+pgm_utils = lazy_import("power_grid_model.utils")
+
+
+def partition_grid(grid: dict, meta: dict) -> list:
+    """
+    Split a grid with several transformers into one subnetwork per transformer, see the module documentation.
+
+    Args:
+    grid (dict): PGM input dataset of the whole export.
+    meta (dict): Meta data of the export, with the "mv_source_node" and the "lv_feeders" of all the LV grids.
+
+    Returns:
+    list: Per transformer, a tuple of the PGM input dataset and the meta data of its subnetwork.
+
+    Raises:
+    The GraphProcessor errors if the export is not a connected radial grid.
+    """
+    graph = create_graph_processor(grid, meta).graph.copy()
+    graph.remove_edges_from(zip(grid["transformer"]["from_node"], grid["transformer"]["to_node"]))
+    source = grid["source"][grid["source"]["node"] == meta["mv_source_node"]][:1]
+    if len(source) == 0:
+        source = grid["source"][:1]
+    partitions = []
+    for transformer in grid["transformer"]:
+        lv_nodes = np.array(sorted(nx.node_connected_component(graph, transformer["to_node"])))
+        nodes = np.append(lv_nodes, transformer["from_node"])
+        subnetwork = {}
+        for component, array in grid.items():
+            names = array.dtype.names
+            if component == "source":
+                subnetwork[component] = source.copy()
+                subnetwork[component]["node"] = transformer["from_node"]
+            elif component == "node":
+                subnetwork[component] = array[np.isin(array["id"], nodes)]
+            elif "from_node" in names:
+                subnetwork[component] = array[np.isin(array["from_node"], nodes) & np.isin(array["to_node"], nodes)]
+            elif "node" in names:
+                subnetwork[component] = array[np.isin(array["node"], lv_nodes)]
+        line = subnetwork["line"]
+        feeders = line["id"][np.isin(line["id"], meta["lv_feeders"]) & (line["from_node"] == transformer["to_node"])]
+        subnetwork_meta = {
+            "mv_source_node": int(transformer["from_node"]),
+            "lv_busbar": int(transformer["to_node"]),
+            "transformer": int(transformer["id"]),
+            "lv_feeders": feeders.tolist(),
+            "source": int(source["id"][0]),
+        }
+        partitions.append((subnetwork, subnetwork_meta))
+    return partitions
+
+
+def _run_partition(study: str, partition: dict, profiles: dict, engine: str, arguments: dict):
+    """
+    Run a study of one subnetwork in a worker process.
+    """
+    if study == "time_series":
+        pgc = PowerGridCalculation(engine=engine)
+        pgc.construct_pgm(partition["network"])
+        pgc.creat_batch_update_dataset(profiles["active"], profiles["reactive"])
+        return pgc.time_series_power_flow_calculation()
+    if study == "ev_penetration":
+        ev = ev_penetration_level(
+            partition["network"], profiles["active"], profiles["reactive"], profiles["ev"], partition["meta"], engine
+        )
+        return ev.calculate(arguments["p_level"])
+    n1 = n1_calculation(partition["network"], partition["meta"], profiles["active"], profiles["reactive"], engine)
+    return {line_id: n1.n1_calculate(line_id) for line_id in arguments["line_ids"]}
+
+
+def merge_node_tables(tables: list):
+    """
+    Merge the node tables of the subnetworks: per timestep, the maximum and minimum voltage over all subnetworks.
+    """
+    rows = np.arange(len(tables[0]))
+    result = tables[0].copy()
+    for extreme, select in [("max", np.argmax), ("min", np.argmin)]:
+        values = np.column_stack([table[f"{extreme}_pu"] for table in tables])
+        ids = np.column_stack([table[f"{extreme}_id"] for table in tables])
+        position = select(values, axis=1)
+        result[f"{extreme}_pu"] = values[rows, position]
+        result[f"{extreme}_id"] = ids[rows, position]
+    return result
+
+
+def merge_line_tables(tables: list):
+    """
+    Merge the line tables of the subnetworks, every line belongs to one subnetwork.
+    """
+    return pd.concat(tables, ignore_index=True)
+
+
+class PartitionedStudy:
+    """
+    Run the time series, EV penetration and N-1 studies of an export with several LV grids,
+    one worker process per subnetwork, see the module documentation.
+    Use it as a context manager or call close, so a temporary directory of the subnetwork files is removed.
+    """
+
+    def __init__(
+        self,
+        network_data: str,
+        meta_data: str,
+        active_load_profile: str,
+        reactive_load_profile: str,
+        ev_active_power_profile: str = None,
+        directory: str = None,
+        max_workers: int = None,
+        engine: str = "power_grid_model",
+    ):
+        """
+        Split the network into subnetworks and write their network and meta data files:
+        1.  Read the network data of the whole export, it is validated per subnetwork by the studies.
+        2.  Split it into subnetworks with partition_grid.
+        3.  Write the subnetwork of every transformer to <directory>/<transformer ID>/.
+
+        Args:
+        network_data (str): Path to the network data JSON file of the whole export,
+        meta_data (str): Path to the meta data JSON file, with the "mv_source_node" and the "lv_feeders",
+        active_load_profile (str), reactive_load_profile (str): Path to the active and reactive load profile parquet files
+            with the sym_loads of all the subnetworks,
+        ev_active_power_profile (str): Path to the EV active power profile parquet file, for the EV penetration study,
+        directory (str): Directory of the subnetwork files, by default a temporary directory which is removed by close,
+        max_workers (int): Number of worker processes, by default the number of processors,
+        engine (str): Power flow engine, "power_grid_model" or "radial".
+
+        Raises:
+        The GraphProcessor errors if the export is not a connected radial grid.
+        """
+        with open(meta_data, "r") as file:
+            meta = json.load(file)
+        self.grid = PowerGridCalculation("off").construct_pgm(network_data)
+        self.profiles = {
+            "active": active_load_profile,
+            "reactive": reactive_load_profile,
+            "ev": ev_active_power_profile,
+        }
+        self._temporary_directory = None
+        if directory is None:
+            self._temporary_directory = tempfile.TemporaryDirectory(prefix="partitions-")
+            directory = self._temporary_directory.name
+        self.directory = directory
+        self.max_workers = max_workers
+        self.engine = engine
+        self.partitions = []
+        for subnetwork, subnetwork_meta in partition_grid(self.grid, meta):
+            partition_directory = os.path.join(self.directory, str(subnetwork_meta["transformer"]))
+            os.makedirs(partition_directory, exist_ok=True)
+            partition = {
+                "transformer": subnetwork_meta["transformer"],
+                "network": os.path.join(partition_directory, "input_network_data.json"),
+                "meta": os.path.join(partition_directory, "meta_data.json"),
+                "lines": subnetwork["line"]["id"],
+            }
+            with open(partition["network"], "w") as file:
+                file.write(pgm_utils.json_serialize(subnetwork))
+            with open(partition["meta"], "w") as file:
+                json.dump(subnetwork_meta, file)
+            self.partitions.append(partition)
+
+    def close(self):
+        """
+        Remove the subnetwork files if they were written to a temporary directory.
+        """
+        if self._temporary_directory is not None:
+            self._temporary_directory.cleanup()
+            self._temporary_directory = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _run(self, jobs: list) -> list:
+        """
+        Run (study, partition, arguments) jobs in the worker processes, return the results in the same order.
+        """
+        with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = [
+                pool.submit(_run_partition, study, partition, self.profiles, self.engine, arguments)
+                for study, partition, arguments in jobs
+            ]
+            return [future.result() for future in futures]
+
+    def time_series_power_flow_calculation(self) -> list:
+        """
+        Time series power flow calculation of every subnetwork, see PowerGridCalculation.
+
+        Returns:
+        list: The merged node and line tables.
+        """
+        results = self._run([("time_series", partition, {}) for partition in self.partitions])
+        return [merge_node_tables([nodes for nodes, _ in results]), merge_line_tables([lines for _, lines in results])]
+
+    def ev_penetration(self, p_level: float) -> list:
+        """
+        EV penetration study of every subnetwork at the same penetration level, see ev_penetration_level.
+
+        Args:
+        p_level (float): EV penetration level.
+
+        Returns:
+        list: The merged node and line tables.
+        """
+        results = self._run([("ev_penetration", partition, {"p_level": p_level}) for partition in self.partitions])
+        return [merge_node_tables([nodes for nodes, _ in results]), merge_line_tables([lines for _, lines in results])]
+
+    def n1_calculate(self, line_ids: list) -> dict:
+        """
+        N-1 calculation of several lines, see n1_calculation. The lines of every subnetwork are calculated
+        in one worker process, the subnetworks in parallel.
+
+        Args:
+        line_ids (list): The line IDs to be disabled.
+
+        Returns:
+        dict: The table of the alternatives of every line ID.
+
+        Raises:
+        IDNotFoundError if a line is not part of a subnetwork, for example an MV line.
+        """
+        jobs = []
+        for partition in self.partitions:
+            lines = [line_id for line_id in line_ids if line_id in partition["lines"]]
+            if lines:
+                jobs.append(("n1", partition, {"line_ids": lines}))
+        missing = set(line_ids).difference(*[arguments["line_ids"] for _, _, arguments in jobs])
+        if missing:
+            raise IDNotFoundError(f"The lines {sorted(missing)} are not part of an LV subnetwork")
+        tables = {}
+        for result in self._run(jobs):
+            tables.update(result)
+        return {line_id: tables[line_id] for line_id in line_ids}
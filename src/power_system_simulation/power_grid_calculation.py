@@ -2,20 +2,38 @@
 Assignment 2: Power Grid Calculation
 """
 
-import warnings
+import hashlib
+import os
+import shutil
+from collections import OrderedDict
 from datetime import datetime
 
 import numpy as np
-import pandas as pd
-from scipy import integrate
 
-with warnings.catch_warnings(action="ignore", category=DeprecationWarning):
-    # suppress warning about pyarrow as future required dependency
-    from pandas import DataFrame
+from power_system_simulation.instrumentation import stage
+from power_system_simulation.lazy_import import lazy_import
+from power_system_simulation.precision import PRECISIONS, InvalidPrecisionError, compact, to_pgm
+from power_system_simulation.profile_io import read_profiles_metadata, read_profiles_values, same_values
+from power_system_simulation.profile_reduction import ProfileReduction
+from power_system_simulation.radial_solver import RadialPowerFlow
+from power_system_simulation.top_k import TopK
 
-from power_grid_model import CalculationMethod, CalculationType, PowerGridModel, initialize_array
-from power_grid_model.utils import json_deserialize
-from power_grid_model.validation import assert_valid_batch_data, assert_valid_input_data
+pa = lazy_import("pyarrow")
+pd = lazy_import("pandas")
+pds = lazy_import("pyarrow.dataset")
+pgm = lazy_import("power_grid_model")
+pgm_utils = lazy_import("power_grid_model.utils")
+pgm_validation = lazy_import("power_grid_model.validation")
+
+VALIDATION_MODES = ("full", "once", "off")
+ENGINES = ("power_grid_model", "radial")
+LAYOUTS = ("long", "wide")
+
+# module wide validation settings, shared by every PowerGridCalculation instance
+_validation_mode = "full"
+# the fingerprints of the datasets validated in "once" mode, the least recently used is forgotten first
+_validated_fingerprints = OrderedDict()
+VALIDATION_CACHE_SIZE = 256
 
 
 class TwoProfilesDoesNotHaveMatchingTimestampsOrLoadIds(Exception):
@@ -24,15 +42,236 @@ class TwoProfilesDoesNotHaveMatchingTimestampsOrLoadIds(Exception):
     """
 
 
+class InvalidValidationModeError(Exception):
+    """
+    The validation mode should be one of "full", "once" or "off".
+    """
+
+
+class InvalidEngineError(Exception):
+    """
+    The power flow engine should be one of "power_grid_model" or "radial".
+    """
+
+
+class InvalidLayoutError(Exception):
+    """
+    The layout of the exported time series should be one of "long" or "wide".
+    """
+
+
+def create_model(input_data: dict, engine: str = "power_grid_model"):
+    """
+    Create the model of the selected engine for a grid, see calculate_power_flow.
+
+    Args:
+    input_data (dict): PGM input dataset.
+    engine (str): The power flow engine.
+
+    Returns:
+    PowerGridModel or RadialPowerFlow.
+
+    Raises:
+    InvalidEngineError.
+    """
+    with stage("model_construction"):
+        if engine == "power_grid_model":
+            return pgm.PowerGridModel(input_data=input_data)
+        if engine == "radial":
+            return RadialPowerFlow(input_data)
+    raise InvalidEngineError(f"Engine should be one of {ENGINES}, got {engine}")
+
+
+def run_power_flow(model, update_data: dict, threading: int = -1) -> dict:
+    """
+    Run a batch power flow calculation on a model created by create_model.
+
+    Args:
+    model (PowerGridModel or RadialPowerFlow): The model of the grid.
+    update_data (dict): PGM batch update dataset, or one with float32 attributes, see precision.compact.
+    threading (int): Threading option of power-grid-model, not used by the radial engine.
+
+    Returns:
+    dict: Batch output dataset in the PGM format.
+    """
+    update_data = to_pgm(update_data)
+    with stage("power_flow"):
+        if isinstance(model, RadialPowerFlow):
+            return model.calculate_power_flow(update_data)
+        return model.calculate_power_flow(
+            update_data=update_data, calculation_method=pgm.CalculationMethod.newton_raphson, threading=threading
+        )
+
+
+def calculate_power_flow(input_data: dict, update_data: dict, engine: str = "power_grid_model", threading: int = -1):
+    """
+    Run a batch power flow calculation with the selected engine:
+    - "power_grid_model": the Newton-Raphson method of power-grid-model, for any grid.
+    - "radial": the vectorized backward/forward sweep of RadialPowerFlow, for radial grids with one source.
+      The results are the same as power-grid-model within the solver tolerance.
+
+    Args:
+    input_data (dict): PGM input dataset.
+    update_data (dict): PGM batch update dataset.
+    engine (str): The power flow engine.
+    threading (int): Threading option of power-grid-model, not used by the radial engine.
+
+    Returns:
+    dict: Batch output dataset in the PGM format.
+
+    Raises:
+    InvalidEngineError.
+    """
+    return run_power_flow(create_model(input_data, engine), update_data, threading)
+
+
+def set_validation_mode(mode: str):
+    """
+    Set the default validation mode used by every PowerGridCalculation instance:
+    - "full": validate the input and update data on every call (default).
+    - "once": validate a dataset only the first time it is seen, repeated calls with the same data skip validation.
+      The last VALIDATION_CACHE_SIZE validated datasets are remembered.
+    - "off": never validate.
+
+    Args:
+    mode (str): The validation mode.
+
+    Raises:
+    InvalidValidationModeError.
+    """
+    global _validation_mode  # pylint: disable=global-statement
+    if mode not in VALIDATION_MODES:
+        raise InvalidValidationModeError(f"Validation mode should be one of {VALIDATION_MODES}, got {mode}")
+    _validation_mode = mode
+
+
+def clear_validation_cache():
+    """
+    Forget all datasets which were recorded as validated in "once" mode.
+    """
+    _validated_fingerprints.clear()
+
+
+def dataset_fingerprint(*datasets) -> str:
+    """
+    Calculate a fingerprint of one or more PGM datasets, based on the component names and the raw array data.
+
+    Args:
+    datasets (dict): PGM datasets, mapping component name to numpy array.
+
+    Returns:
+    str: Hex digest which changes whenever any of the data changes.
+    """
+    digest = hashlib.sha1()
+    for dataset in datasets:
+        for component in sorted(dataset, key=str):
+            array = dataset[component]
+            digest.update(str(component).encode())
+            digest.update(str(array.shape).encode())
+            # hash attribute by attribute, the padding bytes of the structured arrays are not initialized
+            for name in array.dtype.names:
+                digest.update(name.encode())
+                digest.update(np.ascontiguousarray(array[name]).tobytes())
+    return digest.hexdigest()
+
+
 class PowerGridCalculation:
     """
     Class to perform power grid calculations.
     """
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        validation_mode: str = None,
+        engine: str = "power_grid_model",
+        reduction: str = None,
+        n_clusters: int = None,
+        precision: str = "float64",
+        start=None,
+        end=None,
+    ) -> None:
         """
         Initialize the PowerGridCalculation class.
+
+        Args:
+        validation_mode (str): "full", "once" or "off". If None, the module default from set_validation_mode is used.
+        engine (str): Power flow engine, "power_grid_model" or "radial", see calculate_power_flow.
+        reduction (str): None to calculate every timestep, or the ProfileReduction method
+            ("unique", "kmeans" or "histogram") to calculate representative scenarios only.
+        n_clusters (int): Number of representative scenarios for the "kmeans" and "histogram" reduction.
+            After a reduced calculation, reduction_input_deviation holds the ProfileReduction.input_deviation
+            of its load profiles, and the energy losses of the line table use the weights of the scenarios.
+        precision (str): "float64", or "float32" to store the load profiles and the outputs with float32 attributes,
+            see the precision module for the error bounds.
+        start, end: Optional time window start <= timestamp < end of the load profiles, for example "2025-01-01".
+            Only the row groups of the parquet files which overlap the window are read.
+
+        Raises:
+        InvalidValidationModeError, InvalidEngineError, InvalidPrecisionError.
+        """
+        if validation_mode is not None and validation_mode not in VALIDATION_MODES:
+            raise InvalidValidationModeError(
+                f"Validation mode should be one of {VALIDATION_MODES}, got {validation_mode}"
+            )
+        if engine not in ENGINES:
+            raise InvalidEngineError(f"Engine should be one of {ENGINES}, got {engine}")
+        if precision not in PRECISIONS:
+            raise InvalidPrecisionError(f"Precision should be one of {PRECISIONS}, got {precision}")
+        self.validation_mode = validation_mode
+        self.engine = engine
+        self.reduction = reduction
+        self.n_clusters = n_clusters
+        self.precision = precision
+        self.start = start
+        self.end = end
+        self.profile_reduction = None
+        self.reduction_input_deviation = None
+        self.reduced_output_data = None
+        self._reduction_fingerprint = None
+        self._model = None
+        self._model_fingerprint = None
+        self.reset_time_series()
+
+    def _validate(self, kind: str, validate, *datasets):
+        """
+        Run the validate function according to the validation mode.
+        In "once" mode the fingerprint of the datasets is recorded after a successful validation,
+        so the same data is only validated once.
+        """
+        mode = self.validation_mode if self.validation_mode is not None else _validation_mode
+        if mode == "off":
+            return
+        if mode == "full":
+            with stage("validation"):
+                validate()
+            return
+        with stage("validation"):
+            fingerprint = kind + dataset_fingerprint(*datasets)
+            if fingerprint in _validated_fingerprints:
+                _validated_fingerprints.move_to_end(fingerprint)
+                return
+            validate()
+            _validated_fingerprints[fingerprint] = True
+            if len(_validated_fingerprints) > VALIDATION_CACHE_SIZE:
+                _validated_fingerprints.popitem(last=False)
+
+    def _validate_batch(self, update_data: dict = None):
         """
+        Validate the input data together with the batch update data (by default the one of this instance),
+        according to the validation mode.
+        """
+        if update_data is None:
+            update_data = self.update_data
+        self._validate(
+            "batch",
+            lambda: pgm_validation.assert_valid_batch_data(
+                input_data=self.dataset,
+                update_data=to_pgm(update_data),
+                calculation_type=pgm.CalculationType.power_flow,
+            ),
+            self.dataset,
+            update_data,
+        )
 
     def construct_pgm(self, data_path: str):
         """
@@ -44,25 +283,35 @@ class PowerGridCalculation:
         Returns:
         dict: Deserialized dataset containing input data for PGM.
         """
-        # open the file from certain path
-        with open(data_path) as fp:
-            data = fp.read()
-        # read from jason
-        self.dataset = json_deserialize(data)
-        assert_valid_input_data(input_data=self.dataset, calculation_type=CalculationType.power_flow)
+        with stage("json_parsing"):
+            # open the file from certain path
+            with open(data_path) as fp:
+                data = fp.read()
+            # read from jason
+            self.dataset = pgm_utils.json_deserialize(data)
+        self._validate(
+            "input",
+            lambda: pgm_validation.assert_valid_input_data(
+                input_data=self.dataset, calculation_type=pgm.CalculationType.power_flow
+            ),
+            self.dataset,
+        )
         return self.dataset
 
     def creat_batch_update_dataset(self, data_path1: str, data_path2: str):
         """
-        1.  Create a PGM batch update dataset from the parquet files containing the active and reactive load profiles.
+        1.  Read the timestamps and Load IDs of both parquet files concurrently, without decoding the profiles.
+            Only the timestamps in the time window of this instance are read, if it is set.
         2.  Raise error if timestamps and Load IDs don't match between active and reactive power load profiles.
         3.  Store the timestamps from the load profiles.
-        4.  Create the format of load profile data for batch calculation.
-        5.  Assign the attributes for the batch calculation:
+        4.  Read the active and reactive load profiles concurrently, only the columns of the Load IDs
+            which are sym_loads of the grid (if the grid is constructed already).
+        5.  Create the format of load profile data for batch calculation.
+        6.  Assign the attributes for the batch calculation:
             - Load IDs
             - Active power load
             - Reactive power load
-        6.  Store and return the batch update dataset.
+        7.  Store and return the batch update dataset.
 
         Args:
         data_path1 (str): Path to the active power load profile parquet file.
@@ -74,34 +323,50 @@ class PowerGridCalculation:
         Raises:
         TwoProfilesDoesNotHaveMatchingTimestampsOrLoadIds.
         """
-        # read from parquet
-        df_load_profile1 = pd.read_parquet(data_path1)
-        df_load_profile2 = pd.read_parquet(data_path2)
+        self.timestamp, self.update_data = self._read_batch_update_dataset(data_path1, data_path2)
+        # return the dataset if needed
+        return self.update_data
+
+    def _read_batch_update_dataset(self, data_path1: str, data_path2: str) -> tuple:
+        """
+        Read the timestamps and the batch update dataset of the load profiles, see creat_batch_update_dataset,
+        without storing them.
+        """
+        # read the metadata from parquet
+        with stage("parquet_reading"):
+            (index1, ids1), (index2, ids2) = read_profiles_metadata([data_path1, data_path2], self.start, self.end)
         # validate dataset
-        if not np.all(df_load_profile1.columns == df_load_profile2.columns):
+        if not same_values(ids1, ids2):
             raise TwoProfilesDoesNotHaveMatchingTimestampsOrLoadIds
-        if not np.all(df_load_profile1.index == df_load_profile2.index):
+        if not same_values(index1, index2):
             raise TwoProfilesDoesNotHaveMatchingTimestampsOrLoadIds
-        # store time stamp info
-        self.timestamp = df_load_profile1.index
+        # time stamp info
+        timestamp = pd.Index(index1)
+        # read the used columns from parquet
+        dataset = getattr(self, "dataset", None)
+        if dataset is not None and "sym_load" in dataset:
+            ids1 = ids1[np.isin(ids1, dataset["sym_load"]["id"])]
+        with stage("parquet_reading"):
+            p_specified, q_specified = read_profiles_values([data_path1, data_path2], ids1, self.start, self.end)
         # create format
-        load_profile = initialize_array("update", "sym_load", df_load_profile1.shape)
+        load_profile = pgm.initialize_array("update", "sym_load", p_specified.shape)
         # Set the attributes for the batch calculation
-        load_profile["id"] = df_load_profile1.columns.to_numpy()
-        load_profile["p_specified"] = df_load_profile1.to_numpy()
-        load_profile["q_specified"] = df_load_profile2.to_numpy()
-        # store dataset
-        self.update_data = {"sym_load": load_profile}
-        # return the dataset if needed
-        return self.update_data
+        load_profile["id"] = ids1
+        load_profile["p_specified"] = p_specified
+        load_profile["q_specified"] = q_specified
+        update_data = {"sym_load": load_profile}
+        if self.precision == "float32":
+            update_data = compact(update_data)
+        return timestamp, update_data
 
-    def time_series_power_flow_calculation(self):
+    def time_series_power_flow_calculation(self, chunk_size: int = None, progress=None):
         """
         Perform time series power flow calculation for every timestep in the dataset.
 
-        1.  Validate the input & update data.
-        2.  Create a PowerGridModel instance using validated input data.
-        3.  Perform power flow calculation using the Newton-Raphson method for each timestep of the dataset,
+        1.  Validate the input & update data, depending on the validation mode.
+        2.  Create a PowerGridModel instance (or radial solver, depending on the engine) using validated input data.
+        3.  Perform power flow calculation using the Newton-Raphson method (or backward/forward sweep)
+            for each timestep of the dataset (or each representative scenario, expanded to all timesteps),
             and store the results.
         4.  Create a dataframe for both the node and line results at each timestep.
         5.  Store the following results for each timestep:
@@ -110,7 +375,9 @@ class PowerGridCalculation:
         6.  Return results in a list of 2 tables: Node results and Line results.
 
         Args:
-        None
+        chunk_size (int): If given, calculate this number of timesteps at a time, to report the progress per chunk.
+        progress (callable): Optional function progress(done, total), called with the number of calculated
+            timesteps after every chunk. It can raise an exception to stop the calculation.
 
         Returns:
         list: List of 2 tables containing node and line results for each timestep.
@@ -119,14 +386,268 @@ class PowerGridCalculation:
         AssertionError: If the input or update data is invalid.
         """
         # validate
-        assert_valid_batch_data(
-            input_data=self.dataset, update_data=self.update_data, calculation_type=CalculationType.power_flow
-        )
-        # create model
-        model = PowerGridModel(input_data=self.dataset)
-        output_data = model.calculate_power_flow(
-            update_data=self.update_data, calculation_method=CalculationMethod.newton_raphson
+        self._validate_batch()
+        # create model and calculate
+        n_timesteps = len(self.timestamp)
+        chunk_size = chunk_size or max(n_timesteps, 1)
+        outputs = []
+        energy_loss = last_p_loss = None
+        for start in range(0, n_timesteps, chunk_size):
+            rows = slice(start, start + chunk_size)
+            update_data = {component: array[rows] for component, array in self.update_data.items()}
+            outputs.append(self.calculate(self.dataset, update_data))
+            if self.reduction is not None:
+                energy_loss, last_p_loss = self._weighted_energy_loss(outputs[-1], energy_loss, last_p_loss)
+            if progress is not None:
+                progress(min(start + chunk_size, n_timesteps), n_timesteps)
+        if len(outputs) == 1:
+            output_data = outputs[0]
+        else:
+            output_data = {
+                component: np.concatenate([output[component] for output in outputs]) for component in outputs[0]
+            }
+        with stage("post_processing"):
+            return self.result_tables(output_data, energy_loss)
+
+    def _weighted_energy_loss(self, output_data: dict, energy_loss=None, last_p_loss=None) -> tuple:
+        """
+        Energy loss per line in kWh of the last reduced calculation from the weighted representative scenarios,
+        see ProfileReduction.energy_loss. If the energy loss of the previous chunks is given, it is added,
+        together with the trapezoid of the segment between the last timestep of the previous chunk
+        and the first timestep of this one.
+
+        Returns:
+        tuple: The energy loss per line and the line losses of the last timestep in W.
+        """
+        p_loss = output_data["line"]["p_from"][[0, -1]].astype(np.float64) + output_data["line"]["p_to"][[0, -1]]
+        chunk_energy_loss = self.profile_reduction.energy_loss(self.reduced_output_data)
+        if energy_loss is None:
+            return chunk_energy_loss, p_loss[-1]
+        return energy_loss + chunk_energy_loss + (last_p_loss + p_loss[0]) / 2 / 1000, p_loss[-1]
+
+    def top_k_power_flow(self, k: int = 10, chunk_size: int = None) -> dict:
+        """
+        Time series power flow calculation which only keeps the k highest line loadings
+        and the k largest node voltage deviations, instead of building the full result tables.
+
+        Args:
+        k (int): Number of worst cases to keep.
+        chunk_size (int): If given, calculate this number of timesteps at a time,
+            so only one chunk of the output is in memory.
+
+        Returns:
+        dict: The "line_loading" and "voltage_deviation" tables of TopK.tables.
+        """
+        self._validate_batch()
+        top_k = TopK(k)
+        n_timesteps = len(self.timestamp)
+        chunk_size = chunk_size or max(n_timesteps, 1)
+        for start in range(0, n_timesteps, chunk_size):
+            rows = slice(start, start + chunk_size)
+            update_data = {component: array[rows] for component, array in self.update_data.items()}
+            output_data = self.calculate(self.dataset, update_data)
+            with stage("post_processing"):
+                top_k.update(output_data, self.timestamp[rows])
+        return top_k.tables()
+
+    def export_time_series(
+        self, directory: str, chunk_size: int = None, period: str = "%Y-%m-%d", layout: str = "long"
+    ) -> dict:
+        """
+        Time series power flow calculation which writes the full output, instead of the summary tables,
+        to parquet datasets partitioned by time:
+        - <directory>/node: Timestamp and u_pu.
+        - <directory>/line: Timestamp, loading, p_from and p_to.
+        In the "long" layout there is one row per timestep and component, with an id column. The timestamps
+        and ids are dictionary encoded, so they are stored once per file. In the "wide" layout there is one row
+        per timestep and one column per attribute and component, for example "u_pu_2" or "loading_16".
+        The datasets are hive partitioned by the period of the timestamp, for example <directory>/node/period=2025-01-01/.
+        An existing node or line dataset in the directory is replaced.
+        The timesteps are calculated and written chunk by chunk, so only one chunk of the output is in memory.
+
+        Args:
+        directory (str): Output directory.
+        chunk_size (int): Number of timesteps per chunk, by default all the timesteps at once.
+        period (str): strftime format of the partition, "%Y-%m-%d" for daily or "%Y-%m" for monthly partitions.
+        layout (str): "long" or "wide".
+
+        Returns:
+        dict: The paths of the "node" and "line" datasets.
+
+        Raises:
+        InvalidLayoutError.
+        """
+        if layout not in LAYOUTS:
+            raise InvalidLayoutError(f"Layout should be one of {LAYOUTS}, got {layout}")
+        self._validate_batch()
+        paths = {component: os.path.join(directory, component) for component in ["node", "line"]}
+        attributes = {"node": ["u_pu"], "line": ["loading", "p_from", "p_to"]}
+        # the files of a previous export would be read back as part of the dataset
+        for path in paths.values():
+            shutil.rmtree(path, ignore_errors=True)
+        # the timestamps and ids repeat in the long layout, they are stored once per file in the parquet dictionary
+        file_options = pds.ParquetFileFormat().make_write_options(
+            use_dictionary=["Timestamp", "id"] if layout == "long" else False
         )
+        n_timesteps = len(self.timestamp)
+        chunk_size = chunk_size or max(n_timesteps, 1)
+        for chunk, start in enumerate(range(0, n_timesteps, chunk_size)):
+            rows = slice(start, start + chunk_size)
+            update_data = {component: array[rows] for component, array in self.update_data.items()}
+            output_data = self.calculate(self.dataset, update_data)
+            with stage("export"):
+                timestamps = self.timestamp[rows]
+                for component, path in paths.items():
+                    output = output_data[component]
+                    if layout == "long":
+                        n_steps, n_components = output.shape
+                        columns = {
+                            "Timestamp": pa.array(np.repeat(timestamps.to_numpy(), n_components)),
+                            "id": pa.array(np.tile(output["id"][0], n_steps)),
+                        }
+                        for name in attributes[component]:
+                            columns[name] = pa.array(output[name].ravel())
+                        columns["period"] = pa.array(np.repeat(timestamps.strftime(period).to_numpy(), n_components))
+                    else:
+                        columns = {"Timestamp": pa.array(timestamps.to_numpy())}
+                        for name in attributes[component]:
+                            for position, component_id in enumerate(output["id"][0]):
+                                columns[f"{name}_{component_id}"] = pa.array(output[name][:, position])
+                        columns["period"] = pa.array(timestamps.strftime(period).to_numpy())
+                    pds.write_dataset(
+                        pa.table(columns),
+                        path,
+                        format="parquet",
+                        file_options=file_options,
+                        partitioning=pds.partitioning(pa.schema([("period", pa.string())]), flavor="hive"),
+                        basename_template=f"chunk-{chunk}-{{i}}.parquet",
+                        existing_data_behavior="overwrite_or_ignore",
+                    )
+        return paths
+
+    def append_time_series(self, data_path1: str, data_path2: str):
+        """
+        Incremental time series power flow calculation, for profiles which arrive in batches (for example one day).
+        Only the new timesteps are calculated, and merged with the results of the previous batches:
+        1.  Create the batch update dataset of the new active and reactive load profiles.
+        2.  Perform the time series power flow calculation of the new timesteps and create the result tables.
+        3.  Append the node results of the new timesteps to the node table.
+        4.  Merge the line results: keep the first maximum and minimum loading and their timestamps,
+            and add the energy loss of the new batch and of the segment between the last and the new timestep.
+        The results are the same as a time series power flow calculation of all the batches together.
+        The batches should follow each other in time; start over with reset_time_series.
+        A rejected batch does not change the state of this instance.
+
+        Args:
+        data_path1 (str): Path to the active power load profile parquet file of the new timesteps.
+        data_path2 (str): Path to the reactive power load profile parquet file of the new timesteps.
+
+        Returns:
+        list: List of 2 tables containing node and line results of all the timesteps so far.
+
+        Raises:
+        TwoProfilesDoesNotHaveMatchingTimestampsOrLoadIds if the load IDs differ from the previous batches,
+            or if the first new timestamp is not after the last timestamp of the previous batches.
+        AssertionError: If the input or update data is invalid.
+        """
+        timestamp, update_data = self._read_batch_update_dataset(data_path1, data_path2)
+        load_ids = update_data["sym_load"]["id"][0]
+        if self._appended_tables is not None:
+            if not np.array_equal(load_ids, self._appended_load_ids):
+                raise TwoProfilesDoesNotHaveMatchingTimestampsOrLoadIds
+            # the boundary segment of the energy loss is only correct for consecutive batches
+            if len(timestamp) > 0 and timestamp[0] <= self._appended_tables[0]["Timestamp"].iloc[-1]:
+                raise TwoProfilesDoesNotHaveMatchingTimestampsOrLoadIds
+        self._validate_batch(update_data)
+        self.timestamp, self.update_data = timestamp, update_data
+        output_data = self.calculate(self.dataset, self.update_data)
+        with stage("post_processing"):
+            energy_loss = None
+            if self.reduction is not None:
+                energy_loss, _ = self._weighted_energy_loss(output_data)
+            node_table, line_table = self.result_tables(output_data, energy_loss)
+            p_loss = output_data["line"]["p_from"].astype(np.float64) + output_data["line"]["p_to"]
+            if self._appended_tables is None:
+                self._appended_tables = [node_table, line_table]
+            else:
+                all_nodes, all_lines = self._appended_tables
+                all_nodes = pd.concat([all_nodes, node_table], ignore_index=True)
+                new_max = line_table["max__loading_pu"] > all_lines["max__loading_pu"]
+                all_lines.loc[new_max, ["max_time", "max__loading_pu"]] = line_table.loc[
+                    new_max, ["max_time", "max__loading_pu"]
+                ]
+                new_min = line_table["min_loading_pu"] < all_lines["min_loading_pu"]
+                all_lines.loc[new_min, ["min_time", "min_loading_pu"]] = line_table.loc[
+                    new_min, ["min_time", "min_loading_pu"]
+                ]
+                # trapezoid of the segment between the last timestep of the previous batch and the first new one
+                boundary = (self._last_p_loss + p_loss[0]) / 2 / 1000
+                all_lines["energy_loss_kw"] += line_table["energy_loss_kw"] + boundary
+                self._appended_tables = [all_nodes, all_lines]
+            self._appended_load_ids = load_ids
+            self._last_p_loss = p_loss[-1]
+            return [table.copy() for table in self._appended_tables]
+
+    def reset_time_series(self):
+        """
+        Forget the results of the batches of append_time_series.
+        """
+        self._appended_tables = None
+        self._appended_load_ids = None
+        self._last_p_loss = None
+
+    def calculate(self, input_data: dict, update_data: dict, threading: int = -1) -> dict:
+        """
+        Run a batch power flow calculation with the engine of this instance.
+        If a profile reduction is set, only the representative scenarios are calculated,
+        and the results are expanded back to every timestep. The output of the representative scenarios is kept
+        in reduced_output_data and the deviation of their load profiles in reduction_input_deviation,
+        see ProfileReduction.input_deviation.
+        The model is reused as long as the input data does not change,
+        and the reduction as long as the update data does not change.
+
+        Args:
+        input_data (dict): PGM input dataset.
+        update_data (dict): PGM batch update dataset with the sym_load profiles.
+        threading (int): Threading option of power-grid-model.
+
+        Returns:
+        dict: Batch output dataset, one scenario per timestep. In float32 precision, with float32 attributes.
+        """
+        fingerprint = dataset_fingerprint(input_data)
+        if fingerprint != self._model_fingerprint:
+            self._model = create_model(input_data, self.engine)
+            self._model_fingerprint = fingerprint
+        self.reduced_output_data = None
+        if self.reduction is None:
+            output_data = run_power_flow(self._model, update_data, threading)
+        else:
+            with stage("profile_reduction"):
+                fingerprint = dataset_fingerprint(update_data)
+                if fingerprint != self._reduction_fingerprint:
+                    self.profile_reduction = ProfileReduction(update_data, self.reduction, self.n_clusters)
+                    self.reduction_input_deviation = self.profile_reduction.input_deviation()
+                    self._reduction_fingerprint = fingerprint
+            self.reduced_output_data = run_power_flow(self._model, self.profile_reduction.update_data, threading)
+            output_data = self.profile_reduction.expand(self.reduced_output_data)
+        if self.precision == "float32":
+            output_data = compact(output_data)
+        return output_data
+
+    def result_tables(self, output_data, energy_loss=None):
+        """
+        Create the node and line tables from the output of a time series power flow calculation:
+        - Node results: Maximum and minimum voltage magnitudes and corresponding node IDs for each timestep.
+        - Line results: Maximum and minimum loading and corresponding timestamps, and energy loss for each line.
+
+        Args:
+        output_data (dict): Batch output of the power flow calculation, one scenario per timestamp.
+        energy_loss (np.ndarray): Optional energy loss per line in kWh, for example of the weighted representative
+            scenarios of a profile reduction. By default it is integrated from output_data with the trapezoid rule.
+
+        Returns:
+        list: List of 2 tables containing node and line results.
+        """
         # table for nodes
         table1 = pd.DataFrame()
         table1["Timestamp"] = self.timestamp
@@ -167,11 +688,17 @@ class PowerGridCalculation:
             table2.loc[i, "min_time"] = df_temp["Timestamp"][column_data.idxmin()]
             i = i + 1
         # p_loss
+        if energy_loss is not None:
+            table2["energy_loss_kw"] = np.asarray(energy_loss, dtype=np.float64)
+            return [table1, table2]
         p_loss = pd.DataFrame()
-        p_loss = pd.DataFrame(output_data["line"]["p_from"]) + pd.DataFrame(output_data["line"]["p_to"])
+        # accumulate in float64, also for float32 outputs
+        p_loss = pd.DataFrame(output_data["line"]["p_from"], dtype=np.float64) + pd.DataFrame(
+            output_data["line"]["p_to"], dtype=np.float64
+        )
         i = 0
         for column_name, column_data in p_loss.items():
-            table2.loc[i, "energy_loss_kw"] = integrate.trapezoid(column_data.to_list()) / 1000
+            table2.loc[i, "energy_loss_kw"] = np.trapezoid(column_data.to_list()) / 1000
             i = i + 1
         # return
         tables = [table1, table2]
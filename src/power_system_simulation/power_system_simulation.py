@@ -4,70 +4,111 @@ Assignment 3 for the advanced grid analysis
 
 import json
 import math
-import warnings
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from typing import Tuple
 
 import numpy as np
-import pandas as pd
-
-with warnings.catch_warnings(action="ignore", category=DeprecationWarning):
-    # suppress warning about pyarrow as future required dependency
-    from pandas import DataFrame
-
-from power_grid_model import CalculationMethod, PowerGridModel, initialize_array
-from scipy import integrate
 
+from power_system_simulation.checkpoint import Checkpoint
 from power_system_simulation.graph_processing import GraphProcessor
-from power_system_simulation.power_grid_calculation import PowerGridCalculation
+from power_system_simulation.hosting_capacity import hosting_capacity
+from power_system_simulation.input_validation import (
+    InvalidIDs,
+    InvalidLVFeederID,
+    MismatchedIDs,
+    MismatchedTimetamps,
+    MismatchFromAndToNodes,
+    MoreThanOneTransformerOrSource,
+    NotEnoughEVChargingProfiles,
+    grid_issues,
+    pgm_issues,
+    profile_issues,
+)
+from power_system_simulation.instrumentation import stage
+from power_system_simulation.lazy_import import lazy_import
+from power_system_simulation.n1_incremental import BaseCase, max_line_loading
+from power_system_simulation.parallel import SharedMemoryExecutor
+from power_system_simulation.power_grid_calculation import PowerGridCalculation, dataset_fingerprint
+from power_system_simulation.profile_io import read_profiles_metadata, read_sparse_profiles, same_values
+from power_system_simulation.tap_schedule import line_loss_per_timestep, schedule_table, voltage_deviation_per_timestep
+from power_system_simulation.tap_screening import screen_optimal_tap_position
+from power_system_simulation.top_k import TopK
+
+pd = lazy_import("pandas")
+pgm_validation = lazy_import("power_grid_model.validation")
 
 
-# Input data validity check
-class MoreThanOneTransformerOrSource(Exception):
+class OptimalTapPositionCriteriaError(Exception):
     """
-    The LV grid should have exactly one transformer, and one source.
+    The criteria for the tap position is not valid.
     """
 
 
-class InvalidLVFeederID(Exception):
-    """
-    All IDs in the LV Feeder IDs should be valid line IDs.
+def graph_processor_arguments(grid: dict, meta: dict) -> tuple:
     """
+    Define the input arguments for the GraphProcessor class from the grid and meta data:
+    1.  The nodes are the vertices.
+    2.  The lines and the transformer are the edges, a line is enabled if both sides are connected.
+    3.  The MV source node is the source vertex.
 
+    Args:
+    grid (dict): PGM input dataset of the grid.
+    meta (dict): Meta data of the grid.
 
-class MismatchFromAndToNodes(Exception):
-    """
-    All the lines in the LV Feeder IDs should have the from_node the same as the to_node of the transformer.
+    Returns:
+    tuple: vertex_ids, edge_ids, edge_vertex_id_pairs, edge_enabled, source_vertex_id
     """
+    vertex_ids = grid["node"]["id"].tolist()
+    edge_vertex_id_pairs = list(zip(grid["line"]["from_node"], grid["line"]["to_node"]))
+    edge_vertex_id_pairs += list(zip(grid["transformer"]["from_node"], grid["transformer"]["to_node"]))
+    edge_ids = grid["line"]["id"].tolist() + grid["transformer"]["id"].tolist()
+    edge_enabled = np.logical_and(grid["line"]["from_status"], grid["line"]["to_status"]).tolist()
+    edge_enabled += [1] * len(grid["transformer"])
+    source_vertex_id = meta["mv_source_node"]
+    return vertex_ids, edge_ids, edge_vertex_id_pairs, edge_enabled, source_vertex_id
 
 
-class MismatchedTimetamps(Exception):
-    """
-    The timestamps should be matching between the active load profile, reactive load profile, and EV charging profile.
+def create_graph_processor(grid: dict, meta: dict, topology_cache: str = None) -> GraphProcessor:
     """
+    Create the GraphProcessor of a grid, or load it from the topology file if it was saved for the same topology.
 
+    Args:
+    grid (dict): PGM input dataset of the grid.
+    meta (dict): Meta data of the grid.
+    topology_cache (str): Optional path to the topology file, see GraphProcessor.load_or_create.
 
-class MismatchedIDs(Exception):
-    """
-    The IDs in active load profile and reactive load profile should be matching.
+    Returns:
+    GraphProcessor.
     """
+    with stage("graph_processing"):
+        if topology_cache is None:
+            return GraphProcessor(*graph_processor_arguments(grid, meta))
+        return GraphProcessor.load_or_create(topology_cache, *graph_processor_arguments(grid, meta))
 
 
-class InvalidIDs(Exception):
+def study_fingerprint(pgc: PowerGridCalculation, *datasets) -> str:
     """
-    The IDs in active load profile and reactive load profile should be valid IDs of sym_load.
+    Fingerprint of the inputs of a study for its checkpoint: the datasets and the calculation settings.
     """
+    return "-".join(
+        [dataset_fingerprint(*datasets), pgc.engine, str(pgc.reduction), str(pgc.n_clusters), pgc.precision]
+    )
 
 
-class NotEnoughEVChargingProfiles(Exception):
+def _total_line_loss(output_data: dict) -> float:
     """
-    The number of EV charging profile should be at least the same as the number of sym_load.
+    Total energy loss of all the lines in kWh, integrated over time with the trapezoid rule.
     """
+    p_loss = output_data["line"]["p_from"].astype(np.float64) + output_data["line"]["p_to"]
+    return float(np.sum(np.trapezoid(p_loss, axis=0)) / 1000)
 
 
-class OptimalTapPositionCriteriaError(Exception):
+def _max_voltage_deviation(output_data: dict) -> float:
     """
-    The criteria for the tap position is not valid.
+    Maximum deviation of the node voltages from 1 p.u. over all nodes and timesteps.
     """
+    return float(np.max(np.abs(output_data["node"]["u_pu"] - 1)))
 
 
 class input_data_validity_check:
@@ -76,12 +117,15 @@ class input_data_validity_check:
     """
 
     # check valid PGM input data and if has cycles and if fully connected
-    def __init__(self, network_data: str):
+    def __init__(self, network_data: str, validation_mode: str = None, topology_cache: str = None):
         """
         Read the network input data and construct a power grid model using PowerGridCalculation class.
 
         Args:
         network_data (str): Path to the network data JSON file.
+        validation_mode (str): Validation mode of the PowerGridCalculation, use "off" to report the PGM input
+            errors with validate_all instead of raising them here.
+        topology_cache (str): Optional path to the topology file of the GraphProcessor, see check_graph.
 
         Returns:
         None
@@ -89,7 +133,8 @@ class input_data_validity_check:
         Raises:
         None
         """
-        self.pgc = PowerGridCalculation()
+        self.topology_cache = topology_cache
+        self.pgc = PowerGridCalculation(validation_mode)
         self.grid = self.pgc.construct_pgm(network_data)
 
     # check LV grid has exactly one transformer and one source
@@ -97,7 +142,7 @@ class input_data_validity_check:
         """
         Check if the original data of the grid itself is correct:
         1.  The LV grid should have exactly one transformer and one source.
-            Raise an error otherwise.
+            Raise an error otherwise, an export with several LV grids can be split with partitioning.partition_grid.
         2.  Check whether lv_feeders are a subset of the set of line IDs. If not,
             raise an error.
         3.  Check for every lv_feeder if the from_node is the same as the to_node of the transformer. If not,
@@ -119,37 +164,29 @@ class input_data_validity_check:
         if not (len(self.grid["transformer"]) == 1 and len(self.grid["source"]) == 1):
             raise MoreThanOneTransformerOrSource
         # check lv feeder info
-        if not (set(self.meta["lv_feeders"]).issubset(set(self.grid["line"]["id"]))):
+        feeder_ids = np.array(self.meta["lv_feeders"], dtype=self.grid["line"]["id"].dtype)
+        if not np.all(np.isin(feeder_ids, self.grid["line"]["id"])):
             raise InvalidLVFeederID
         # check all the lines in the LV Feeder IDs have the from_nodes the same as the to_node of the transformer
-        from_nodes = []
-        for line in self.grid["line"]:
-            if line["id"] in self.meta["lv_feeders"]:
-                from_nodes.append(line["from_node"])
-        if not (all(from_node == self.grid["transformer"][0]["to_node"] for from_node in from_nodes)):
+        from_nodes = self.grid["line"]["from_node"][np.isin(self.grid["line"]["id"], feeder_ids)]
+        if not np.all(from_nodes == self.grid["transformer"]["to_node"][0]):
             raise MismatchFromAndToNodes
 
     def check_graph(self):
         """
         Define input arguments for the GraphProcessor class and create a graph:
         1.  Define the input arguments using the grid and meta data.
-        2.  Create a graph using the GraphProcessor class.
-        """
-        vertex_ids = self.grid["node"]["id"].tolist()
-        edge_vertex_id_pairs = list(zip(self.grid["line"]["from_node"], self.grid["line"]["to_node"]))
-        edge_vertex_id_pairs.append((self.grid["transformer"]["from_node"][0], self.grid["transformer"]["to_node"][0]))
-        edge_ids = self.grid["line"]["id"].tolist()
-        edge_ids.append(self.grid["transformer"]["id"][0])
-        edge_enabled = np.logical_and(self.grid["line"]["from_status"], self.grid["line"]["to_status"]).tolist()
-        edge_enabled.append(1)
-        source_vertex_id = self.meta["mv_source_node"]
-        self.gp = GraphProcessor(vertex_ids, edge_ids, edge_vertex_id_pairs, edge_enabled, source_vertex_id)
+        2.  Create a graph using the GraphProcessor class,
+            or load the validated graph from the topology file if the topology did not change.
+        """
+        self.gp = create_graph_processor(self.grid, self.meta, self.topology_cache)
 
     # check if the timestamps and id are matching between the acitve load profile, reactive load profile and EV charging profile and if sym_load id matches
     def check_matching(self, active_load_profile: str, reactive_load_profile: str, ev_active_power_profile: str):
         """
         Check if the data used to update the model is correct:
-        1.  Read the parquet files containing the active load profile, reactive load profile and EV charging profile.
+        1.  Read only the timestamps and the IDs of the parquet files containing the active load profile,
+            reactive load profile and EV charging profile. The profile values are not read.
         2.  Check if the timestamps are matching between the active load profile, reactive load profile, and EV charging profile.
             Raise an error otherwise.
         3.  Check if the IDs are matching between the active load profile and reactive load profile.
@@ -167,16 +204,20 @@ class input_data_validity_check:
         Raises:
         MissingTimetamps, MismatchedIDs, InvalidIDs
         """
-        self.df1 = pd.read_parquet(active_load_profile)
-        self.df2 = pd.read_parquet(reactive_load_profile)
-        self.df3 = pd.read_parquet(ev_active_power_profile)
-        if not np.all(self.df1.index == self.df2.index):
+        with stage("parquet_reading"):
+            (
+                (active_timestamps, self.active_ids),
+                (reactive_timestamps, self.reactive_ids),
+                (ev_timestamps, self.ev_ids),
+            ) = read_profiles_metadata([active_load_profile, reactive_load_profile, ev_active_power_profile])
+        if not same_values(active_timestamps, reactive_timestamps):
             raise MismatchedTimetamps
-        if not np.all(self.df2.index == self.df3.index):
+        if not same_values(reactive_timestamps, ev_timestamps):
             raise MismatchedTimetamps
-        if not np.all(self.df1.columns == self.df2.columns):
+        if not same_values(self.active_ids, self.reactive_ids):
             raise MismatchedIDs
-        if not (set(self.grid["sym_load"]["id"]) == set(self.df1.columns)):
+        sym_load_ids = self.grid["sym_load"]["id"]
+        if not (np.all(np.isin(sym_load_ids, self.active_ids)) and np.all(np.isin(self.active_ids, sym_load_ids))):
             raise InvalidIDs
 
     # check the number of EV charging profiles is at least the number of sym_load
@@ -184,9 +225,59 @@ class input_data_validity_check:
         """
         Check whether there are at least enough EV charging profiles for all the symmetric loads.
         """
-        if len(self.df3.columns) < len(self.grid["sym_load"]):
+        if len(self.ev_ids) < len(self.grid["sym_load"]):
             raise NotEnoughEVChargingProfiles
 
+    def validate_all(
+        self,
+        meta_data: str,
+        active_load_profile: str,
+        reactive_load_profile: str,
+        ev_active_power_profile: str,
+        strict: bool = False,
+    ):
+        """
+        Run every check of this class and of the GraphProcessor in one pass and report every violation,
+        instead of raising an error at the first one:
+        1.  Validate the PGM input data.
+        2.  Check the grid against the meta data, see check_grid.
+        3.  Check the graph, see GraphProcessor.validate_all.
+        4.  Check the timestamps and IDs of the profiles, see check_matching. Only the metadata of the profiles is read.
+        5.  Check the number of EV charging profiles, see check_ev_charging_profiles.
+        6.  In strict mode, raise the error of the first violation, the same error the separate checks would raise.
+
+        Args:
+        meta_data (str): Path to the meta data JSON file,
+        active_load_profile (str), reactive_load_profile (str): Path to the active and reactive load profile parquet files,
+        ev_active_power_profile (str): Path to the EV active power profile parquet file,
+        strict (bool): Raise the error of the first violation instead of returning the report.
+
+        Returns:
+        list: The report, a list of issues. Each issue is a dict with the violated "rule",
+            the "error" class which the separate check would raise, and the offending "ids".
+
+        Raises:
+        ValidationException, MoreThanOneTransformerOrSource, InvalidLVFeederID, MismatchFromAndToNodes,
+        the GraphProcessor errors, MismatchedTimetamps, MismatchedIDs, InvalidIDs, NotEnoughEVChargingProfiles
+        (strict mode only)
+        """
+        issues, pgm_errors = pgm_issues(self.grid)
+        with open(meta_data, "r") as file:
+            self.meta = json.load(file)
+        issues += grid_issues(self.grid, self.meta)
+        issues += GraphProcessor.validate_all(*graph_processor_arguments(self.grid, self.meta))
+        profiles_metadata = read_profiles_metadata(
+            [active_load_profile, reactive_load_profile, ev_active_power_profile]
+        )
+        (_, self.active_ids), (_, self.reactive_ids), (_, self.ev_ids) = profiles_metadata
+        issues += profile_issues(self.grid, profiles_metadata)
+
+        if strict and pgm_errors:
+            raise pgm_validation.ValidationException(pgm_errors, "input_data")
+        if strict and issues:
+            raise issues[0]["error"](issues[0]["rule"])
+        return issues
+
 
 class ev_penetration_level:
     """
@@ -200,21 +291,36 @@ class ev_penetration_level:
         reactive_load_profile: str,
         ev_active_power_profile: str,
         meta_data: str,
+        engine: str = "power_grid_model",
+        reduction: str = None,
+        n_clusters: int = None,
+        precision: str = "float64",
+        start=None,
+        end=None,
+        topology_cache: str = None,
     ):
         """
         Read from input data of the grid and parquet files, then create the graph:
         1.  Define PowerGridCalculation class.
         2.  Construct the power grid model using the network data JSON file.
         3.  Create batch update dataset using the active and reactive load profile parquet files.
-        4.  Create ev active power profiles using the EV active power profile parquet file.
+        4.  Create ev active power profiles using the EV active power profile parquet file, stored as a sparse matrix.
+            It is read in a thread, concurrently with step 3.
         5.  Define the input arguments for GraphProcessor using the grid and meta data.
-        6.  Create a graph using the GraphProcessor class.
+        6.  Create a graph using the GraphProcessor class, or load it from the topology file.
 
         Args:
         network_data (str): Path to the network data JSON file,
         active_load_profile (str), reactive_load_profile (str): Path to the active and reactive load profile parquet files,
         ev_active_power_profile (str): Path to the EV active power profile parquet file,
-        meta_data (str): Path to the meta data JSON file.
+        meta_data (str): Path to the meta data JSON file,
+        engine (str): Power flow engine, "power_grid_model" or "radial",
+        reduction (str), n_clusters (int): Optional profile reduction to representative scenarios,
+            see PowerGridCalculation,
+        precision (str): "float64" or "float32" storage of the profiles and outputs, see PowerGridCalculation,
+        start, end: Optional time window start <= timestamp < end of the profiles, see PowerGridCalculation,
+        topology_cache (str): Optional path to the topology file of the GraphProcessor,
+            see GraphProcessor.load_or_create.
 
         Returns:
         None
@@ -222,34 +328,30 @@ class ev_penetration_level:
         Raises:
         None
         """
-        self.pgc = PowerGridCalculation()
+        self.pgc = PowerGridCalculation(
+            engine=engine, reduction=reduction, n_clusters=n_clusters, precision=precision, start=start, end=end
+        )
         self.grid = self.pgc.construct_pgm(network_data)
-        self.update_data = self.pgc.creat_batch_update_dataset(active_load_profile, reactive_load_profile)
-        self.ev = pd.read_parquet(ev_active_power_profile)
+        # the EV profiles are read in a thread, while the load profiles are read
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            ev = pool.submit(read_sparse_profiles, ev_active_power_profile, start, end)
+            self.update_data = self.pgc.creat_batch_update_dataset(active_load_profile, reactive_load_profile)
+            with stage("parquet_reading"):
+                self.ev = ev.result()
+        if precision == "float32":
+            self.ev = self.ev.astype(np.float32)
         with open(meta_data, "r") as file:
             self.meta = json.load(file)
-
-        vertex_ids = self.grid["node"]["id"].tolist()
-        edge_vertex_id_pairs = list(zip(self.grid["line"]["from_node"], self.grid["line"]["to_node"]))
-        edge_vertex_id_pairs.append((self.grid["transformer"]["from_node"][0], self.grid["transformer"]["to_node"][0]))
-        edge_ids = self.grid["line"]["id"].tolist()
-        edge_ids.append(self.grid["transformer"]["id"][0])
-        edge_enabled = np.logical_and(self.grid["line"]["from_status"], self.grid["line"]["to_status"]).tolist()
-        edge_enabled.append(1)
-        source_vertex_id = self.meta["mv_source_node"]
-        self.gp = GraphProcessor(vertex_ids, edge_ids, edge_vertex_id_pairs, edge_enabled, source_vertex_id)
+        self.gp = create_graph_processor(self.grid, self.meta, topology_cache)
+        self.base_p_specified = self.update_data["sym_load"]["p_specified"].copy()
+        self._feeder_loads = None
 
     def calculate(self, p_level: float):
         """
         Function that assigns the EV charging profiles to the symmetric loads on the grid, and performs power flow calculation:
         1.  Determine the total number of houses and feeders on the grid, and calculate the number of EVs that should be assigned to each feeder.
-        2.  Shuffle the EV charging profiles so that they can be randomly assigned to the symmetric loads.
-        3.  For each feeder, make a list of its downstream nodes using the find_downstream_vertices method.
-        4.  To find the symmetric loads in the feeder, iterate through the symmetric loads and check if their node is in the list of downstream nodes.
-        5.  For each feeder, if:
-            - evs_per_feeder is greater than or equal to the number of sym_loads in a feeder, assign an EV charging profile to each load.
-            - If evs_per_feeder is less than the number of sym_loads in the feeder, randomly select and assign an EV charging profile to each load.
-        6.  Perform and return a time series power flow calculation using the updated data.
+        2.  Assign the EV charging profiles to the symmetric loads with assign_ev_profiles.
+        3.  Perform and return a time series power flow calculation using the updated data.
 
         Args:
         p_level (float): EV penetration level.
@@ -260,42 +362,129 @@ class ev_penetration_level:
         Raises:
         None
         """
-        np.random.seed(0)
+        self.assign_ev_profiles(self.evs_per_feeder(p_level))
+        return self.pgc.time_series_power_flow_calculation()
+
+    def evs_per_feeder(self, p_level: float) -> int:
+        """
+        Number of EVs per feeder for an EV penetration level.
+        """
         total_houses = len(self.grid["sym_load"]["id"])
         number_of_feeders = len(self.meta["lv_feeders"])
-        evs_per_feeder = math.floor(p_level * total_houses / number_of_feeders)
+        return math.floor(p_level * total_houses / number_of_feeders)
+
+    def assign_ev_profiles(self, evs_per_feeder: int):
+        """
+        Add the EV charging profiles to the active power profile of the symmetric loads,
+        starting from the original load profile, so the same object can be used for several penetration levels:
+        1.  Select the loads and their EV charging profiles with ev_assignment:
+            - Shuffle the EV charging profiles so that they can be randomly assigned to the symmetric loads.
+            - For each feeder, find the symmetric loads downstream of the feeder with feeder_loads.
+            - If evs_per_feeder is greater than or equal to the number of sym_loads in a feeder, assign an EV charging profile to each load.
+            - If evs_per_feeder is less than the number of sym_loads in the feeder, randomly select and assign an EV charging profile to each load.
+        2.  Add the selected EV charging profiles to the active power of the loads.
+
+        Args:
+        evs_per_feeder (int): Number of EVs per feeder.
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        with stage("ev_assignment"):
+            self.update_data["sym_load"]["p_specified"] = self.base_p_specified
+            for seq, profile in self.ev_assignment(evs_per_feeder):
+                # add only the charging timesteps of the sparse EV profile
+                start, end = self.ev.indptr[profile], self.ev.indptr[profile + 1]
+                self.update_data["sym_load"]["p_specified"][self.ev.indices[start:end], seq] += self.ev.data[start:end]
+        self.pgc.set_update_data(self.update_data)
+
+    def ev_assignment(self, evs_per_feeder: int) -> list:
+        """
+        Randomly select the loads which get an EV and the EV charging profile of every selected load.
+
+        Args:
+        evs_per_feeder (int): Number of EVs per feeder.
+
+        Returns:
+        list: Pairs of the position of the load in the load profile and the index of the EV charging profile.
+        """
+        np.random.seed(0)
         ramdon_range = self.ev.shape[1]
         ev_seq = np.arange(ramdon_range)
         np.random.shuffle(ev_seq)
-        for feeder in self.meta["lv_feeders"]:
-            down_stream_node = self.gp.find_downstream_vertices(feeder)
-            list_load = []
-            for load in self.grid["sym_load"]:
-                if load["node"] in down_stream_node:
-                    list_load.append(load["id"])
+        assignment = []
+        for list_load in self.feeder_loads():
             if evs_per_feeder >= len(list_load):
-                update_seq = []
-                for load in list_load:
-                    ids = self.update_data["sym_load"]["id"][0]
-                    update_seq.append(
-                        pd.DataFrame(self.update_data["sym_load"]["p_specified"], columns=ids).columns.get_loc(load)
-                    )
-                for seq in update_seq:
-                    self.update_data["sym_load"]["p_specified"][:, seq] += self.ev.iloc[:, ev_seq[0]]
-                    ev_seq = ev_seq[1:]
+                select_load = list_load
             else:
                 select_load = np.random.choice(list_load, evs_per_feeder, replace=False)
-                update_seq = []
-                for load in select_load:
-                    ids = self.update_data["sym_load"]["id"][0]
-                    update_seq.append(
-                        pd.DataFrame(self.update_data["sym_load"]["p_specified"], columns=ids).columns.get_loc(load)
-                    )
-                for seq in update_seq:
-                    self.update_data["sym_load"]["p_specified"][:, seq] += self.ev.iloc[:, ev_seq[0]]
-                    ev_seq = ev_seq[1:]
-        self.pgc.set_update_data(self.update_data)
-        return self.pgc.time_series_power_flow_calculation()
+            ids = self.update_data["sym_load"]["id"][0]
+            update_seq = [np.flatnonzero(ids == load)[0] for load in select_load]
+            for seq in update_seq:
+                assignment.append((int(seq), int(ev_seq[0])))
+                ev_seq = ev_seq[1:]
+        return assignment
+
+    def calculate_levels(self, p_levels: list, executor: SharedMemoryExecutor = None) -> list:
+        """
+        Perform the time series power flow calculation for several EV penetration levels,
+        in parallel if an executor (see the executor method) is given.
+
+        Args:
+        p_levels (list): EV penetration levels.
+        executor (SharedMemoryExecutor): Optional worker pool with the grid, load profiles and EV profiles.
+
+        Returns:
+        list: Time series power flow calculation results for every level.
+        """
+        if executor is None:
+            return [self.calculate(p_level) for p_level in p_levels]
+        tasks = [{"ev": self.ev_assignment(self.evs_per_feeder(p_level))} for p_level in p_levels]
+        outputs = executor.map(tasks)
+        with stage("post_processing"):
+            return [self.pgc.result_tables(output_data) for output_data in outputs]
+
+    def executor(self, max_workers: int = None) -> SharedMemoryExecutor:
+        """
+        Create a worker pool with the grid, the original load profiles and the EV profiles in shared memory.
+        """
+        self.update_data["sym_load"]["p_specified"] = self.base_p_specified
+        pgc = self.pgc
+        return SharedMemoryExecutor(
+            self.grid, self.update_data, pgc.engine, self.ev, max_workers, pgc.reduction, pgc.n_clusters, pgc.precision
+        )
+
+    def feeder_loads(self) -> list:
+        """
+        The IDs of the symmetric loads downstream of every LV feeder.
+        """
+        if self._feeder_loads is None:
+            self._feeder_loads = []
+            for feeder in self.meta["lv_feeders"]:
+                down_stream_node = self.gp.find_downstream_vertices(feeder)
+                list_load = []
+                for load in self.grid["sym_load"]:
+                    if load["node"] in down_stream_node:
+                        list_load.append(load["id"])
+                self._feeder_loads.append(list_load)
+        return self._feeder_loads
+
+    def hosting_capacity(self, v_limits: Tuple[float, float], loading_limit: float) -> dict:
+        """
+        Find the maximum EV penetration level which keeps the node voltages and the line loadings within the limits,
+        by bisection over the number of EVs per feeder, see hosting_capacity.hosting_capacity.
+
+        Args:
+        v_limits (tuple): Minimum and maximum node voltage in p.u.
+        loading_limit (float): Maximum line loading in p.u.
+
+        Returns:
+        dict: The limiting level, with the first violation at the lowest violating level.
+        """
+        return hosting_capacity(self, v_limits, loading_limit)
 
 
 class optimal_tap_position:
@@ -303,7 +492,18 @@ class optimal_tap_position:
     The class used to find optimmal tap position of the transformer according to the input criteria.
     """
 
-    def __init__(self, low_voltage_network_data: str, active_load_profile: str, reactive_load_profile: str):
+    def __init__(
+        self,
+        low_voltage_network_data: str,
+        active_load_profile: str,
+        reactive_load_profile: str,
+        engine: str = "power_grid_model",
+        reduction: str = None,
+        n_clusters: int = None,
+        precision: str = "float64",
+        start=None,
+        end=None,
+    ):
         """
         Read from input data of the grid and parquet files, then create the graph:
         1.  Define PowerGridCalculation class
@@ -313,7 +513,12 @@ class optimal_tap_position:
 
         Args:
         low_voltage_network_data (str): Path to the low voltage network data JSON file,
-        active_load_profile (str), reactive_load_profile (str): Path to the active and reactive load profile parquet files.
+        active_load_profile (str), reactive_load_profile (str): Path to the active and reactive load profile parquet files,
+        engine (str): Power flow engine, "power_grid_model" or "radial",
+        reduction (str), n_clusters (int): Optional profile reduction to representative scenarios,
+            see PowerGridCalculation,
+        precision (str): "float64" or "float32" storage of the profiles and outputs, see PowerGridCalculation,
+        start, end: Optional time window start <= timestamp < end of the profiles, see PowerGridCalculation.
 
         Returns:
         None
@@ -322,13 +527,18 @@ class optimal_tap_position:
         None
 
         """
-        self.power_grid_calculation = PowerGridCalculation()
+        self.engine = engine
+        self.power_grid_calculation = PowerGridCalculation(
+            engine=engine, reduction=reduction, n_clusters=n_clusters, precision=precision, start=start, end=end
+        )
         self.low_voltage_grid = self.power_grid_calculation.construct_pgm(low_voltage_network_data)
         self.load_profile_batch = self.power_grid_calculation.creat_batch_update_dataset(
             active_load_profile, reactive_load_profile
         )
 
-    def find_optimal_tap_position(self, optimization_criteria):
+    def find_optimal_tap_position(
+        self, optimization_criteria, executor: SharedMemoryExecutor = None, checkpoint_path: str = None, progress=None
+    ):
         """
         Function that finds the optimal tap position
         of the LV transformer in the grid based on
@@ -338,29 +548,27 @@ class optimal_tap_position:
 
         1.  Find the minimum and maximum tap position of the transformer and create a list of tap positions in the range of min to max tap position.
         2.  Store the original tap position.
-        3.  Make lists to store line_losses and voltage_deviations for each possible tap position.
-        4.  If the criteria is to minimize line losses, loop through each tap position and:
-            1.  Update the tap position in the power grid input data.
-            2.  Create a power grid model with the updated tap position.
-            3.  Run a time series power flow calculation.
-            4.  Calculate the line losses of each line by integration over time.
-            5.  Add up and store the total line losses in the line_losses list.
-            5.  After the loop, find the index of the tap position corresponding with the minimum line losses and store it as optimal_tap_pos.
-
-        5.  If the criteria is to minimize voltage deviations, loop through each tap position and:
+        3.  If the criteria is neither of the two, raise an error.
+        4.  Skip the tap positions which are finished according to the checkpoint file, if given.
+        5.  For each other tap position:
             1.  Update the tap position in the power grid input data.
             2.  Create a power grid model with the updated tap position.
             3.  Run a time series power flow calculation.
-            4.  For each node, find and store the maximum and minimum voltages.
-            5.  Calculate the voltage deviation for each node and store the maximum voltage deviation in the voltage_deviations list.
-            6.  After the loop, find the index of the tap position corresponding with the minimum voltage deviations and store it as optimal_tap_pos.
-
-        6.  If the criteria is neither of the two, raise an error.
+            4.  To minimize line losses: calculate the line losses of each line by integration over time, and add them up.
+                To minimize voltage deviations: find the maximum deviation of the node voltages from 1 p.u.
+            5.  Append the result to the checkpoint file, if given.
+        6.  Find the tap position corresponding with the minimum line losses or voltage deviations and store it as optimal_tap_pos.
         7.  Set the tap position back to the initial value.
         8.  Return the optimal tap position.
 
+        If an executor (see the executor method) is given, the tap positions are calculated in parallel.
+
         Args:
         optimization_criteria (str): The optimization criteria
+        executor (SharedMemoryExecutor): Optional worker pool with the grid and the load profiles.
+        checkpoint_path (str): Optional checkpoint file, to resume an interrupted run with the same inputs.
+        progress (callable): Optional function progress(done, total), called with the number of finished
+            tap positions after every tap position. It can raise an exception to stop the calculation.
 
         Returns:
         optimal_tap_pos (int): The optimal tap position
@@ -377,101 +585,211 @@ class optimal_tap_position:
         # store original tap position
         original_tap_pos = self.low_voltage_grid["transformer"]["tap_pos"][0]
 
-        # lists to store relevant data for each tap position
-        line_losses = []
-        voltage_deviations = []
-
-        if optimization_criteria == "minimize_line_losses":
-            for tap_pos in tap_positions:
-                # update tap position in power grid input data
-                self.low_voltage_grid["transformer"]["tap_pos"] = [tap_pos]
-
-                # create power grid model with updated tap position
-                pow_grid_model = PowerGridModel(input_data=self.low_voltage_grid)
-
-                # run time series power flow calculation
-                pow_flow_result = pow_grid_model.calculate_power_flow(
-                    update_data=self.load_profile_batch,
-                    calculation_method=CalculationMethod.newton_raphson,
-                    threading=0,
-                )
-
-                # line losses
-                p_loss = pd.DataFrame()
-                p_loss = pd.DataFrame(pow_flow_result["line"]["p_from"]) + pd.DataFrame(pow_flow_result["line"]["p_to"])
-
-                table_line_losses = pd.DataFrame()
-                table_line_losses["energy_loss_kw"] = 0.0
-
-                for (column_name, column_data), i in zip(p_loss.items(), enumerate(p_loss.columns)):
-                    table_line_losses.loc[i[0], "energy_loss_kw"] = integrate.trapezoid(column_data.to_list()) / 1000
-
-                line_losses.append(sum(table_line_losses["energy_loss_kw"]))
-
-            min_loss_idx = line_losses.index(min(line_losses))
-            optimal_tap_pos = tap_positions[min_loss_idx]
-
-        elif optimization_criteria == "minimize_voltage_deviations":
-            for tap_pos in tap_positions:
-                # update tap position in power grid input data
-                self.low_voltage_grid["transformer"]["tap_pos"] = [tap_pos]
-
-                # create power grid model with updated tap position
-                pow_grid_model = PowerGridModel(input_data=self.low_voltage_grid)
-
-                # run time series power flow calculation
-                pow_flow_result = pow_grid_model.calculate_power_flow(
-                    update_data=self.load_profile_batch,
-                    calculation_method=CalculationMethod.newton_raphson,
-                    threading=0,
-                )
-
-                # voltage deviations
-                table_voltages = pd.DataFrame()
-                table_voltages["max_pu"] = 0.0
-                table_voltages["min_pu"] = 0.0
-                i = 0
-                for node_scenario in pow_flow_result["node"]:
-                    df_temp = pd.DataFrame(node_scenario)
-                    max_value_pu = df_temp.at[df_temp["u_pu"].idxmax(), "u_pu"]
-                    min_value_pu = df_temp.at[df_temp["u_pu"].idxmin(), "u_pu"]
-                    table_voltages.loc[i, "max_pu"] = max_value_pu
-                    table_voltages.loc[i, "min_pu"] = min_value_pu
-                    i = i + 1
-
-                max_volt_deviation = max(max(abs(table_voltages["max_pu"] - 1)), max(abs(table_voltages["min_pu"] - 1)))
-                voltage_deviations.append(max_volt_deviation)
-
-            min_volt_dev_idx = voltage_deviations.index(min(voltage_deviations))
-            optimal_tap_pos = tap_positions[min_volt_dev_idx]
-
-        else:
+        reducers = {"minimize_line_losses": _total_line_loss, "minimize_voltage_deviations": _max_voltage_deviation}
+        if optimization_criteria not in reducers:
             raise OptimalTapPositionCriteriaError("Criteria incorrect")
+        reducer = reducers[optimization_criteria]
+
+        # the tap positions which are finished according to the checkpoint are skipped
+        checkpoint = None
+        if checkpoint_path is not None:
+            checkpoint = Checkpoint(
+                checkpoint_path,
+                study_fingerprint(self.power_grid_calculation, self.low_voltage_grid, self.load_profile_batch),
+            )
+        keys = [f"{optimization_criteria}:{tap_pos}" for tap_pos in tap_positions]
+        values = {key: checkpoint.get(key) for key in keys if checkpoint is not None and key in checkpoint}
+        todo = [(key, tap_pos) for key, tap_pos in zip(keys, tap_positions) if key not in values]
+
+        if executor is not None:
+            transformer_id = self.low_voltage_grid["transformer"]["id"][0]
+            tasks = [{"input": {"transformer": {"id": [transformer_id], "tap_pos": [tap_pos]}}} for _, tap_pos in todo]
+            results = executor.imap(tasks, reducer)
+        else:
+            results = (self.tap_position_value(tap_pos, reducer) for _, tap_pos in todo)
+        for (key, _), value in zip(todo, results):
+            values[key] = value
+            if checkpoint is not None:
+                checkpoint.add(key, value)
+            if progress is not None:
+                progress(len(values), len(keys))
+
+        # find the tap position with the minimum line losses or voltage deviations
+        objective = [values[key] for key in keys]
+        optimal_tap_pos = tap_positions[objective.index(min(objective))]
 
         # set tap position back to intial value
         self.low_voltage_grid["transformer"]["tap_pos"] = [original_tap_pos]
 
         return optimal_tap_pos
 
+    def tap_position_value(self, tap_pos: int, reducer) -> float:
+        """
+        Run the time series power flow calculation for a tap position and reduce it to the optimization criteria.
+        """
+        # update tap position in power grid input data
+        self.low_voltage_grid["transformer"]["tap_pos"] = [tap_pos]
+        # create power grid model with updated tap position and run time series power flow calculation
+        pow_flow_result = self.power_grid_calculation.calculate(
+            self.low_voltage_grid, self.load_profile_batch, threading=0
+        )
+        with stage("post_processing"):
+            return reducer(pow_flow_result)
+
+    def screen_optimal_tap_position(self, optimization_criteria, n_fit: int = 3) -> dict:
+        """
+        Find the optimal tap position with a sensitivity screening, instead of a time series power flow at every tap,
+        see tap_screening.screen_optimal_tap_position.
+
+        Args:
+        optimization_criteria (str): The optimization criteria, see find_optimal_tap_position.
+        n_fit (int): Number of tap positions with a full calculation for the fit, 2 or 3.
+
+        Returns:
+        dict: The "optimal_tap_pos", the "predicted_tap_pos" and the "table" of the predicted and confirmed criteria.
+
+        Raises:
+        OptimalTapPositionCriteriaError
+        """
+        reducers = {"minimize_line_losses": _total_line_loss, "minimize_voltage_deviations": _max_voltage_deviation}
+        if optimization_criteria not in reducers:
+            raise OptimalTapPositionCriteriaError("Criteria incorrect")
+        return screen_optimal_tap_position(
+            self, reducers[optimization_criteria], optimization_criteria == "minimize_line_losses", n_fit
+        )
+
+    def optimal_tap_schedule(
+        self,
+        optimization_criteria,
+        window=96,
+        max_tap_change: int = None,
+        change_cost: float = 0.0,
+        executor: SharedMemoryExecutor = None,
+        progress=None,
+    ):
+        """
+        Find the optimal tap position per time window, for example per hour or per day,
+        from one time series power flow calculation per tap position:
+        1.  For every tap position, run a time series power flow calculation and reduce it per timestep:
+            - To minimize line losses: the line losses of all the lines, weighted with the trapezoid rule.
+            - To minimize voltage deviations: the maximum deviation of the node voltages from 1 p.u.
+        2.  Set the tap position back to the initial value.
+        3.  Split the timesteps into windows and find the tap position of every window, see tap_schedule.schedule_table.
+            If max_tap_change or change_cost is given, find the schedule with the minimum sum of the window criteria
+            and the tap change costs, with at most max_tap_change positions between consecutive windows.
+
+        If an executor (see the executor method) is given, the tap positions are calculated in parallel.
+
+        Args:
+        optimization_criteria (str): The optimization criteria, see find_optimal_tap_position.
+        window (int or str): The number of timesteps per window, or a duration like "1h" or "1D"
+            which is converted with the timestep of the profiles. The windows start at the first timestep.
+        max_tap_change (int): Maximum number of tap positions between consecutive windows, unlimited by default.
+        change_cost (float): Cost of every tap change, in the unit of the criteria.
+        executor (SharedMemoryExecutor): Optional worker pool with the grid and the load profiles.
+        progress (callable): Optional function progress(done, total), called with the number of finished
+            tap positions after every tap position. It can raise an exception to stop the calculation.
+
+        Returns:
+        DataFrame: Per window, the "start" timestamp, the scheduled "tap_pos" and its criteria "value",
+            and the "optimal_tap_pos" of the window without the tap change limits.
+
+        Raises:
+        OptimalTapPositionCriteriaError
+        """
+        reducers = {
+            "minimize_line_losses": line_loss_per_timestep,
+            "minimize_voltage_deviations": voltage_deviation_per_timestep,
+        }
+        if optimization_criteria not in reducers:
+            raise OptimalTapPositionCriteriaError("Criteria incorrect")
+        reducer = reducers[optimization_criteria]
+
+        transformer = self.low_voltage_grid["transformer"]
+        tap_positions = np.arange(
+            min(transformer["tap_min"][0], transformer["tap_max"][0]),
+            max(transformer["tap_min"][0], transformer["tap_max"][0]) + 1,
+        )
+        original_tap_pos = transformer["tap_pos"][0]
+
+        # criteria per tap position and timestep
+        if executor is not None:
+            tasks = [
+                {"input": {"transformer": {"id": [transformer["id"][0]], "tap_pos": [tap_pos]}}}
+                for tap_pos in tap_positions
+            ]
+            results = executor.imap(tasks, reducer)
+        else:
+            results = (self.tap_position_value(tap_pos, reducer) for tap_pos in tap_positions)
+        cost = []
+        for value in results:
+            cost.append(value)
+            if progress is not None:
+                progress(len(cost), len(tap_positions))
+        transformer["tap_pos"] = [original_tap_pos]
+
+        with stage("post_processing"):
+            return schedule_table(
+                np.array(cost),
+                tap_positions,
+                self.power_grid_calculation.timestamp,
+                window,
+                optimization_criteria == "minimize_line_losses",
+                max_tap_change,
+                change_cost,
+            )
+
+    def executor(self, max_workers: int = None) -> SharedMemoryExecutor:
+        """
+        Create a worker pool with the grid and the load profiles in shared memory.
+        """
+        pgc = self.power_grid_calculation
+        return SharedMemoryExecutor(
+            self.low_voltage_grid,
+            self.load_profile_batch,
+            self.engine,
+            None,
+            max_workers,
+            pgc.reduction,
+            pgc.n_clusters,
+            pgc.precision,
+        )
+
 
 class n1_calculation:
     """
     The class used to do the N-1 calculation.
     """
 
-    def __init__(self, network_data: str, meta_data: str, active_load_profile: str, reactive_load_profile: str):
+    def __init__(
+        self,
+        network_data: str,
+        meta_data: str,
+        active_load_profile: str,
+        reactive_load_profile: str,
+        engine: str = "power_grid_model",
+        precision: str = "float64",
+        start=None,
+        end=None,
+        topology_cache: str = None,
+    ):
         """
         Read from input data of the grid, meta data and parquet files, then create the graph:
         1.  Define PowerGridCalculation class
         2.  Construct the power grid model using the low voltage network data JSON file.
         3.  Create batch update dataset using the active and reactive load profile parquet files.
         4.  Define the input arguments for GraphProcessor using the grid and meta data.
-        5.  Create a graph using the GraphProcessor class.
+        5.  Create a graph using the GraphProcessor class, or load it from the topology file.
 
         Args:
         network_data (str): Path to the network data JSON file,
         meta_data (str): Path to the meta data JSON file,
-        active_load_profile (str), reactive_load_profile (str): Path to the active and reactive load profile parquet files.
+        active_load_profile (str), reactive_load_profile (str): Path to the active and reactive load profile parquet files,
+        engine (str): Power flow engine, "power_grid_model" or "radial",
+        precision (str): "float64" or "float32" storage of the profiles and outputs, see PowerGridCalculation,
+        start, end: Optional time window start <= timestamp < end of the profiles, see PowerGridCalculation,
+        topology_cache (str): Optional path to the topology file of the GraphProcessor,
+            see GraphProcessor.load_or_create.
 
         Returns:
         None
@@ -482,26 +800,27 @@ class n1_calculation:
         """
         with open(meta_data, "r") as file:
             self.meta = json.load(file)
-        self.pgc = PowerGridCalculation()
+        self.engine = engine
+        self.pgc = PowerGridCalculation(engine=engine, precision=precision, start=start, end=end)
         self.grid = self.pgc.construct_pgm(network_data)
         self.update_data = self.pgc.creat_batch_update_dataset(active_load_profile, reactive_load_profile)
-        self.df1 = pd.read_parquet(active_load_profile)
-        self.timestamp = self.df1.index
-        vertex_ids = self.grid["node"]["id"].tolist()
-        edge_vertex_id_pairs = list(zip(self.grid["line"]["from_node"], self.grid["line"]["to_node"]))
-        edge_vertex_id_pairs.append((self.grid["transformer"]["from_node"][0], self.grid["transformer"]["to_node"][0]))
-        edge_ids = self.grid["line"]["id"].tolist()
-        edge_ids.append(self.grid["transformer"]["id"][0])
-        edge_enabled = np.logical_and(self.grid["line"]["from_status"], self.grid["line"]["to_status"]).tolist()
-        edge_enabled.append(1)
-        source_vertex_id = self.meta["mv_source_node"]
-        self.gp = GraphProcessor(vertex_ids, edge_ids, edge_vertex_id_pairs, edge_enabled, source_vertex_id)
+        self.timestamp = self.pgc.timestamp
+        self.gp = create_graph_processor(self.grid, self.meta, topology_cache)
+        self._base_case = None
         # self.G = self.gp.create()
         # nx.draw(self.G, with_labels=True)
         # plt.show()
         # print(edge_ids)
 
-    def n1_calculate(self, line_id: int):
+    def n1_calculate(
+        self,
+        line_id: int,
+        executor: SharedMemoryExecutor = None,
+        checkpoint_path: str = None,
+        incremental: bool = False,
+        voltage_tolerance: float = 0.01,
+        progress=None,
+    ):
         """
         Find the list of the alternatives after disabling a given line to make the grid fully connected,
         and do power flow analysis for each one of them and return data as required.
@@ -509,12 +828,25 @@ class n1_calculation:
         2.  Use the find_alternative_edges method to find the alternative edge IDs to make the graph fully connected.
         3.  Create a table to store the alternative line IDs, the line ID with the maximum loading, the maximum loading time, and the maximum loading value.
         4.  If there are no alternative edges, return a table with NaN values.
-        5.  For each alternative edge that is found, create a new PowerGridModel, update the line status, and calculate the power flow.
-        6.  Find the relevant parameters stated in step 3, and store them in the table.
-        7.  Return the table.
+        5.  Skip the alternative edges which are finished according to the checkpoint file, if given.
+        6.  For each other alternative edge, update the line status in a copy of the grid and calculate the power flow.
+        7.  Find the relevant parameters stated in step 3, append them to the checkpoint file if given.
+            The line with the maximum loading is found by its position in the grid, and reported by its ID.
+        8.  Store the parameters of all the alternative edges in the table and return the table.
+
+        If an executor (see the executor method) is given, the alternatives are calculated in parallel.
+        In incremental mode, the alternatives are derived from one base case calculation where possible,
+        see _incremental_values.
 
         Args:
         line_id (int): The line ID to be disabled.
+        executor (SharedMemoryExecutor): Optional worker pool with the grid and the load profiles.
+        checkpoint_path (str): Optional checkpoint file, to resume an interrupted run with the same inputs.
+        incremental (bool): Reuse the base case results for the lines outside of the fundamental cycle.
+        voltage_tolerance (float): In incremental mode, the maximum estimated voltage change in p.u.
+            for which the base case is reused, otherwise the alternative is calculated in full.
+        progress (callable): Optional function progress(done, total), called with the number of finished
+            alternatives after every alternative. It can raise an exception to stop the calculation.
 
         Returns:
         table (DataFrame): DataFrame containing the alternative line IDs, the line ID with the maximum loading, the maximum loading time, and the maximum loading value.
@@ -522,11 +854,8 @@ class n1_calculation:
         Raises:
         None
         """
-        update_line = initialize_array("update", "line", 2)
-        update_line["id"] = [line_id, 0]
-        update_line["from_status"] = [0, 1]
-        update_line["to_status"] = [0, 1]
-        alt = self.gp.find_alternative_edges(line_id)
+        with stage("graph_processing"):
+            alt = self.gp.find_alternative_edges(line_id)
         table = pd.DataFrame()
         table["alt_Line_ID"] = alt
         table.set_index("alt_Line_ID")
@@ -536,19 +865,126 @@ class n1_calculation:
         if not alt:
             table.iloc[:, :] = np.nan
             return table
-        i = 0
-        for line_alt in alt:
-            model = PowerGridModel(input_data=self.grid)
-            update_line["id"][1] = line_alt  # change line ID
-            update_data = {"line": update_line}
-            model.update(update_data=update_data)
-            output_data = model.calculate_power_flow(
-                update_data=self.update_data, calculation_method=CalculationMethod.newton_raphson
-            )
-            df_temp = pd.DataFrame(output_data["line"]["loading"])
-            max_index = df_temp.stack().idxmax()
-            table.loc[i, "max__loading_pu"] = df_temp.stack().max()
-            table.loc[i, "max_time"] = self.timestamp[max_index[0]]
-            table.loc[i, "max_Line_ID"] = max_index[1]
-            i = i + 1
+        checkpoint = None
+        if checkpoint_path is not None:
+            checkpoint = Checkpoint(checkpoint_path, study_fingerprint(self.pgc, self.grid, self.update_data))
+        # the incremental values depend on the tolerance, which is part of their key
+        suffix = f":incremental:{voltage_tolerance!r}" if incremental else ""
+        keys = [f"{line_id}:{line_alt}{suffix}" for line_alt in alt]
+        values = {key: checkpoint.get(key) for key in keys if checkpoint is not None and key in checkpoint}
+        todo = [(key, line_alt) for key, line_alt in zip(keys, alt) if key not in values]
+        alternatives = [line_alt for _, line_alt in todo]
+        if incremental:
+            results = self._incremental_values(line_id, alternatives, voltage_tolerance, executor)
+        else:
+            results = self._full_values(line_id, alternatives, executor)
+        for (key, _), value in zip(todo, results):
+            values[key] = value
+            if checkpoint is not None:
+                checkpoint.add(key, value)
+            if progress is not None:
+                progress(len(values), len(keys))
+        for i, key in enumerate(keys):
+            max_loading, timestep, line = values[key]
+            table.loc[i, "max__loading_pu"] = max_loading
+            table.loc[i, "max_time"] = self.timestamp[timestep]
+            table.loc[i, "max_Line_ID"] = int(self.grid["line"]["id"][line])
         return table
+
+    def n1_top_k(self, line_id: int, k: int = 10) -> dict:
+        """
+        Find the k highest line loadings and the k largest node voltage deviations over all the alternatives
+        after disabling a given line, without building the result tables of every alternative.
+
+        Args:
+        line_id (int): The line ID to be disabled.
+        k (int): Number of worst cases to keep.
+
+        Returns:
+        dict: The "line_loading" and "voltage_deviation" tables of TopK.tables,
+            with the alternative line ID in the case column.
+        """
+        with stage("graph_processing"):
+            alt = self.gp.find_alternative_edges(line_id)
+        top_k = TopK(k)
+        for line_alt in alt:
+            output_data = self._alternative_output(line_id, line_alt)
+            with stage("post_processing"):
+                top_k.update(output_data, self.timestamp, case=line_alt)
+        return top_k.tables()
+
+    def _full_values(self, line_id: int, alternatives: list, executor: SharedMemoryExecutor = None):
+        """
+        Calculate the maximum line loading of every alternative with a full time series power flow calculation,
+        in parallel if an executor is given.
+        """
+        if executor is not None:
+            tasks = [
+                {"input": {"line": {"id": [line_id, line_alt], "from_status": [0, 1], "to_status": [0, 1]}}}
+                for line_alt in alternatives
+            ]
+            return executor.imap(tasks, max_line_loading)
+        return (self._alternative_value(line_id, line_alt) for line_alt in alternatives)
+
+    def _incremental_values(
+        self, line_id: int, alternatives: list, voltage_tolerance: float, executor: SharedMemoryExecutor = None
+    ):
+        """
+        Find the maximum line loading of every alternative from the base case where possible,
+        see the n1_incremental module:
+        1.  Calculate the base case. It is reused as long as the grid, the update data and the calculation settings
+            do not change.
+        2.  Find the fundamental cycle of every alternative, and estimate its loadings from the base case.
+        3.  Calculate the alternatives in full for which the estimated voltage change exceeds the voltage tolerance.
+
+        The values are yielded one alternative at a time, so the progress and the checkpoint are updated per alternative.
+        The alternatives which are calculated in full are submitted to the executor at once, if given.
+
+        Returns:
+        iterator: The maximum line loading, timestep and line position of every alternative, see max_line_loading.
+        """
+        with stage("post_processing"):
+            fingerprint = study_fingerprint(self.pgc, self.grid, self.update_data)
+            if self._base_case is None or self._base_case.fingerprint != fingerprint:
+                output_data = self.pgc.calculate(self.grid, self.update_data)
+                self._base_case = BaseCase(self.grid, output_data, self.gp.find_tree_order(), fingerprint)
+            cycles = self._base_case.cycles(line_id, alternatives, voltage_tolerance)
+        full_values = self._full_values(line_id, [a for a in alternatives if cycles[a] is None], executor)
+        for line_alt in alternatives:
+            if cycles[line_alt] is None:
+                value = next(full_values, None)
+                if value is None:
+                    return
+                yield value
+                continue
+            with stage("post_processing"):
+                yield self._base_case.estimate(line_id, line_alt, cycles[line_alt])
+
+    def _alternative_value(self, line_id: int, line_alt: int) -> tuple:
+        """
+        Run the time series power flow calculation with the given line disabled and the alternative line enabled,
+        and find the maximum line loading.
+        """
+        output_data = self._alternative_output(line_id, line_alt)
+        with stage("post_processing"):
+            return max_line_loading(output_data)
+
+    def _alternative_output(self, line_id: int, line_alt: int) -> dict:
+        """
+        Run the time series power flow calculation with the given line disabled and the alternative line enabled.
+        """
+        grid_alt = dict(self.grid)
+        grid_alt["line"] = self.grid["line"].copy()
+        for changed_id, status in ((line_id, 0), (line_alt, 1)):
+            changed = grid_alt["line"]["id"] == changed_id
+            grid_alt["line"]["from_status"][changed] = status
+            grid_alt["line"]["to_status"][changed] = status
+        return self.pgc.calculate(grid_alt, self.update_data)
+
+    def executor(self, max_workers: int = None) -> SharedMemoryExecutor:
+        """
+        Create a worker pool with the grid and the load profiles in shared memory.
+        """
+        return SharedMemoryExecutor(
+            self.grid, self.update_data, self.engine, None, max_workers, precision=self.pgc.precision
+        )
@@ -0,0 +1,85 @@
+"""
+Reduced precision storage of profiles and results
+
+In "float32" precision the load profiles and the batch outputs are stored with float32 attributes,
+which halves their memory footprint. power-grid-model and the radial solver still calculate in float64:
+the profiles are converted back right before a calculation, the outputs are downcast right after it,
+and aggregates such as the energy loss are accumulated in float64.
+
+Error bounds, for a float32 value x the rounding error is at most |x| * 2**-24 (about 6e-8 relative):
+- u_pu and loading: relative error at most 6e-8 for the stored profile and again for the stored result,
+  so about 1.2e-7 in total, far below the four significant digits of the consumers.
+- energy loss: the loss p_from + p_to of a line is the small difference of two large flows, so its error is
+  at most 6e-8 * (|p_from| + |p_to|), which is 6e-8 divided by the relative loss of the line
+  (about 6e-6 relative for a line with 1 % loss). The losses are integrated over time in float64,
+  so no rounding error accumulates over long studies.
+- IDs and statuses are integers and are stored exactly.
+"""
+
+import numpy as np
+
+from power_system_simulation.lazy_import import lazy_import
+
+pgm = lazy_import("power_grid_model")
+
+PRECISIONS = ("float64", "float32")
+
+
+class InvalidPrecisionError(Exception):
+    """
+    The precision should be one of "float64" or "float32".
+    """
+
+
+def compact_dtype(dtype: np.dtype) -> np.dtype:
+    """
+    Structured dtype with the float64 attributes of dtype replaced by float32, without padding.
+    """
+    return np.dtype([(name, np.float32 if dtype[name] == np.float64 else dtype[name]) for name in dtype.names])
+
+
+def compact(dataset: dict) -> dict:
+    """
+    Copy of a PGM dataset with float32 attributes, see compact_dtype.
+
+    Args:
+    dataset (dict): PGM dataset, for example a batch update or output dataset.
+
+    Returns:
+    dict: The dataset with float32 attributes.
+    """
+    result = {}
+    for component, array in dataset.items():
+        result[component] = np.empty(array.shape, dtype=compact_dtype(array.dtype))
+        for name in array.dtype.names:
+            result[component][name] = array[name]
+    return result
+
+
+def is_compact(dataset: dict) -> bool:
+    """
+    Whether a dataset has float32 attributes, created by compact.
+    """
+    return any(array.dtype[name] == np.float32 for array in dataset.values() for name in array.dtype.names)
+
+
+def to_pgm(dataset: dict, dataset_type: str = "update") -> dict:
+    """
+    Convert a dataset created by compact back to a PGM dataset with float64 attributes.
+    A PGM dataset is returned as is.
+
+    Args:
+    dataset (dict): The dataset.
+    dataset_type (str): The PGM dataset type, "input", "update" or the output type.
+
+    Returns:
+    dict: PGM dataset.
+    """
+    if not is_compact(dataset):
+        return dataset
+    result = {}
+    for component, array in dataset.items():
+        result[component] = pgm.initialize_array(dataset_type, component, array.shape)
+        for name in array.dtype.names:
+            result[component][name] = array[name]
+    return result
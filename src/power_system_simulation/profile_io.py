@@ -0,0 +1,200 @@
+"""
+Reading of the load profile parquet files
+
+Several files are read concurrently in a thread pool, pyarrow releases the GIL while it reads and decodes.
+The metadata (timestamps and column IDs) is read first, so files can be compared before their values are decoded,
+and only the columns of the used IDs are decoded.
+
+The rows can be restricted to a time window start <= timestamp < end. The window is pushed down to pyarrow
+as a dataset filter on the timestamp index, so only the row groups which overlap the window are read.
+Write long profiles with small row groups (for example one day, row_group_size=96 for 15 minute data),
+then the cost of a short window does not depend on the length of the profile.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+import numpy as np
+
+from power_system_simulation.lazy_import import lazy_import
+
+pd = lazy_import("pandas")
+pds = lazy_import("pyarrow.dataset")
+pq = lazy_import("pyarrow.parquet")
+sparse = lazy_import("scipy.sparse")
+
+
+def _index_columns(schema) -> list:
+    """
+    The index columns of a parquet schema according to the pandas metadata,
+    the names of stored index columns or the descriptions of range indices.
+    """
+    return (schema.pandas_metadata or {}).get("index_columns", [])
+
+
+def _read_table(data_path: str, columns: list, start=None, end=None):
+    """
+    Read some columns of a parquet file, only the rows in the time window start <= timestamp < end.
+    The window is a filter on the stored index column, pyarrow skips the row groups outside of it.
+
+    Raises:
+    ValueError if a window is given and the file has no stored index column.
+    """
+    if start is None and end is None:
+        return pq.read_table(data_path, columns=columns)
+    index_name = next((column for column in _index_columns(pq.read_schema(data_path)) if isinstance(column, str)), None)
+    if index_name is None:
+        raise ValueError(f"A time window needs a timestamp index column in {data_path}")
+    window = None
+    for condition in [
+        pds.field(index_name) >= pd.Timestamp(start) if start is not None else None,
+        pds.field(index_name) < pd.Timestamp(end) if end is not None else None,
+    ]:
+        if condition is not None:
+            window = condition if window is None else window & condition
+    return pds.dataset(data_path, format="parquet").to_table(columns=columns, filter=window)
+
+
+def read_profile_metadata(data_path: str, start=None, end=None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Read only the timestamps and the column IDs of a load profile parquet file.
+    The profile values themselves are not decoded:
+    1.  Read the schema and the pandas metadata of the file.
+    2.  Convert the column names to integer IDs (the sym_load IDs or EV profile sequence numbers).
+    3.  Read only the index column, or rebuild it if pandas stored it as a range.
+
+    Args:
+    data_path (str): Path to the load profile parquet file.
+    start, end: Optional time window start <= timestamp < end, for example "2025-01-01" or a pd.Timestamp.
+
+    Returns:
+    tuple: The timestamps (index) and the column IDs of the profile as numpy arrays.
+    """
+    schema = pq.read_schema(data_path)
+    index_columns = _index_columns(schema)
+    stored_index = [column for column in index_columns if isinstance(column, str)]
+    names = [name for name in schema.names if name not in stored_index]
+    try:
+        ids = np.array(names, dtype=np.int64)
+    except ValueError:
+        ids = np.array(names)
+
+    if stored_index:
+        index = _read_table(data_path, stored_index[:1], start, end).column(0).to_numpy()
+    elif start is not None or end is not None:
+        raise ValueError(f"A time window needs a timestamp index column in {data_path}")
+    elif index_columns:
+        index = np.arange(index_columns[0]["start"], index_columns[0]["stop"], index_columns[0]["step"])
+    else:
+        index = np.arange(pq.read_metadata(data_path).num_rows)
+    return index, ids
+
+
+def read_profiles_metadata(data_paths: List[str], start=None, end=None) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Read the timestamps and the column IDs of several load profile parquet files concurrently,
+    see read_profile_metadata.
+
+    Args:
+    data_paths (list): Paths to the load profile parquet files.
+    start, end: Optional time window start <= timestamp < end.
+
+    Returns:
+    list: The timestamps and the column IDs of every file.
+    """
+    with ThreadPoolExecutor(max_workers=len(data_paths)) as pool:
+        return list(pool.map(lambda data_path: read_profile_metadata(data_path, start, end), data_paths))
+
+
+def read_profile_values(data_path: str, ids: np.ndarray = None, start=None, end=None) -> np.ndarray:
+    """
+    Read the values of a load profile parquet file, projected to the columns of the given IDs.
+    The index and the other columns are not decoded, except to select the rows of a time window.
+
+    Args:
+    data_path (str): Path to the load profile parquet file.
+    ids (np.ndarray): The column IDs to read, in this order, by default all the columns.
+    start, end: Optional time window start <= timestamp < end.
+
+    Returns:
+    np.ndarray: Profile values, shape (timesteps, IDs).
+
+    Raises:
+    KeyError if an ID is not a column of the file.
+    """
+    schema = pq.read_schema(data_path)
+    index_columns = _index_columns(schema)
+    names = [name for name in schema.names if name not in index_columns]
+    if ids is not None:
+        column_of_id = {str(name): name for name in names}
+        names = [column_of_id[str(column_id)] for column_id in ids]
+    if not names:
+        return np.zeros((len(read_profile_metadata(data_path, start, end)[0]), 0))
+    table = _read_table(data_path, names, start, end)
+    return np.column_stack([column.to_numpy() for column in table.columns])
+
+
+def read_profiles_values(data_paths: List[str], ids: np.ndarray = None, start=None, end=None) -> List[np.ndarray]:
+    """
+    Read the values of several load profile parquet files concurrently, see read_profile_values.
+
+    Args:
+    data_paths (list): Paths to the load profile parquet files.
+    ids (np.ndarray): The column IDs to read from every file, by default all the columns.
+    start, end: Optional time window start <= timestamp < end.
+
+    Returns:
+    list: The profile values of every file.
+    """
+    with ThreadPoolExecutor(max_workers=len(data_paths)) as pool:
+        return list(pool.map(lambda data_path: read_profile_values(data_path, ids, start, end), data_paths))
+
+
+def read_sparse_profiles(data_path: str, start=None, end=None) -> "sparse.csc_matrix":
+    """
+    Read a profile parquet file which is mostly zero, like the EV charging profiles, as a sparse matrix.
+    The file is decoded one column at a time and only the non-zero values are kept,
+    so the memory scales with the number of charging events instead of timesteps x profiles.
+    With a time window, the rows of the window are read at once.
+
+    Args:
+    data_path (str): Path to the profile parquet file.
+    start, end: Optional time window start <= timestamp < end.
+
+    Returns:
+    sparse.csc_matrix: Profile values, shape (timesteps, profiles) in the column order of the file.
+    """
+    index_columns = _index_columns(pq.read_schema(data_path))
+    parquet_file = pq.ParquetFile(data_path)
+    names = [name for name in parquet_file.schema_arrow.names if name not in index_columns]
+    if start is None and end is None:
+        table = None
+        num_rows = parquet_file.metadata.num_rows
+    else:
+        table = _read_table(data_path, names, start, end)
+        num_rows = table.num_rows
+    indices = []
+    data = []
+    indptr = [0]
+    for name in names:
+        column = parquet_file.read(columns=[name]).column(0) if table is None else table.column(name)
+        values = column.to_numpy()
+        nonzero = np.flatnonzero(values)
+        indices.append(nonzero)
+        data.append(values[nonzero])
+        indptr.append(indptr[-1] + len(nonzero))
+    return sparse.csc_matrix(
+        (
+            np.concatenate(data) if data else np.zeros(0),
+            np.concatenate(indices) if indices else np.zeros(0, dtype=np.int64),
+            np.array(indptr),
+        ),
+        shape=(num_rows, len(names)),
+    )
+
+
+def same_values(array1: np.ndarray, array2: np.ndarray) -> bool:
+    """
+    Check if two one dimensional arrays have the same length and the same values.
+    """
+    return len(array1) == len(array2) and bool(np.all(array1 == array2))
@@ -0,0 +1,154 @@
+"""
+Reduction of load profiles to weighted representative scenarios
+
+Many timesteps of a load profile have (nearly) the same load vector, for example the nights or similar weekdays.
+The power flow only has to be calculated once for every representative scenario,
+the results are expanded back to the full timeline afterwards.
+"""
+
+import numpy as np
+
+from power_system_simulation.lazy_import import lazy_import
+
+vq = lazy_import("scipy.cluster.vq")
+
+REDUCTION_METHODS = ("unique", "kmeans", "histogram")
+
+
+class InvalidReductionMethodError(Exception):
+    """
+    The profile reduction method should be one of "unique", "kmeans" or "histogram".
+    """
+
+
+class ProfileReduction:
+    """
+    Reduce a batch update dataset of sym_load profiles to weighted representative scenarios.
+    """
+
+    def __init__(self, update_data: dict, method: str = "unique", n_clusters: int = None, seed: int = 0):
+        """
+        Group the timesteps of the update data and create one representative scenario per group:
+        - "unique": group the exact repeats of the load vector, the results are the same as the full calculation.
+        - "kmeans": cluster the load vectors with k-means into n_clusters groups, the representative is the mean.
+        - "histogram": group the timesteps by total active load into n_clusters equally wide bins,
+          the representative is the mean.
+
+        Args:
+        update_data (dict): PGM batch update dataset with sym_load profiles, shape (timesteps, loads).
+        method (str): The reduction method.
+        n_clusters (int): The maximum number of representative scenarios, for "kmeans" and "histogram".
+        seed (int): Seed of the k-means initialization.
+
+        Raises:
+        InvalidReductionMethodError, ValueError if n_clusters is missing.
+        """
+        if method not in REDUCTION_METHODS:
+            raise InvalidReductionMethodError(f"Reduction method should be one of {REDUCTION_METHODS}, got {method}")
+        if method != "unique" and (n_clusters is None or n_clusters < 1):
+            raise ValueError(f"A positive n_clusters is needed for the {method} reduction")
+        self.method = method
+        self.full_update = update_data["sym_load"]
+        p_specified = self.full_update["p_specified"]
+        q_specified = self.full_update["q_specified"]
+        n_timesteps = self.full_update.shape[0]
+
+        if method == "unique":
+            rows = np.ascontiguousarray(np.concatenate([p_specified, q_specified, self.full_update["status"]], axis=1))
+            rows = rows.view(np.dtype((np.void, rows.dtype.itemsize * rows.shape[1]))).ravel()
+            _, labels = np.unique(rows, return_inverse=True)
+        elif method == "kmeans":
+            features = np.concatenate([p_specified, q_specified], axis=1)
+            k = min(n_clusters, n_timesteps)
+            _, labels = vq.kmeans2(features, k, minit="points", seed=seed)
+        else:
+            total_load = p_specified.sum(axis=1)
+            edges = np.histogram_bin_edges(total_load, bins=n_clusters)
+            labels = np.digitize(total_load, edges[1:-1])
+        # renumber the groups 0..n-1, dropping empty clusters
+        _, first, self.mapping = np.unique(labels.ravel(), return_index=True, return_inverse=True)
+        self.weights = np.bincount(self.mapping)
+
+        representative = self.full_update[first].copy()
+        if method != "unique":
+            for name in ["p_specified", "q_specified"]:
+                values = self.full_update[name]
+                sums = np.zeros((len(first), values.shape[1]))
+                np.add.at(sums, self.mapping, values)
+                representative[name] = sums / self.weights[:, None]
+        self.update_data = {"sym_load": representative}
+
+    def expand(self, output_data: dict) -> dict:
+        """
+        Expand the batch output of the representative scenarios back to the full timeline.
+
+        Args:
+        output_data (dict): Batch output dataset, one scenario per representative.
+
+        Returns:
+        dict: Batch output dataset, one scenario per timestep.
+        """
+        return {component: array[self.mapping] for component, array in output_data.items()}
+
+    def energy_loss(self, output_data: dict) -> np.ndarray:
+        """
+        Energy loss of every line in kWh over the full timeline, from the output of the representative scenarios
+        weighted with the number of timesteps they represent. The result is the same as the trapezoid rule
+        over the expanded timeline (hourly timesteps): the first and last timestep only count for half.
+
+        Args:
+        output_data (dict): Batch output dataset, one scenario per representative.
+
+        Returns:
+        np.ndarray: Energy loss per line in kWh.
+        """
+        p_loss = output_data["line"]["p_from"].astype(np.float64) + output_data["line"]["p_to"]
+        energy = self.weights @ p_loss
+        if len(self.mapping) > 0:
+            energy -= (p_loss[self.mapping[0]] + p_loss[self.mapping[-1]]) / 2.0
+        return energy / 1000
+
+    def input_deviation(self) -> dict:
+        """
+        Deviation of the load profiles of the representative scenarios from the full load profiles,
+        zero for the "unique" reduction. This is a deviation of the inputs,
+        the error of the outputs against a full calculation is found with compare_outputs.
+
+        Returns:
+        dict: Number of timesteps and scenarios, the reduction factor, the maximum absolute deviation of the
+            active and reactive power of any load (W, VAr) and the maximum deviation relative to the peak load.
+        """
+        representative = self.update_data["sym_load"][self.mapping]
+        p_deviation = np.abs(representative["p_specified"] - self.full_update["p_specified"])
+        q_deviation = np.abs(representative["q_specified"] - self.full_update["q_specified"])
+        peak = np.max(np.abs(self.full_update["p_specified"]), initial=0.0)
+        max_p_deviation = float(np.max(p_deviation, initial=0.0))
+        return {
+            "timesteps": len(self.mapping),
+            "scenarios": len(self.weights),
+            "reduction_factor": len(self.mapping) / max(len(self.weights), 1),
+            "max_p_deviation": max_p_deviation,
+            "max_q_deviation": float(np.max(q_deviation, initial=0.0)),
+            "relative_p_deviation": max_p_deviation / peak if peak > 0 else 0.0,
+        }
+
+
+def compare_outputs(full_output: dict, reduced_output: dict) -> dict:
+    """
+    Error of the (expanded) output of a reduced calculation against the output of the full calculation.
+
+    Args:
+    full_output (dict): Batch output dataset of the full calculation.
+    reduced_output (dict): Batch output dataset of the reduced calculation, expanded to the full timeline.
+
+    Returns:
+    dict: The maximum absolute error of the node voltages (p.u.) and the line loadings (p.u.),
+        and the relative error of the total energy loss of the lines.
+    """
+    full_loss = np.sum(full_output["line"]["p_from"] + full_output["line"]["p_to"])
+    reduced_loss = np.sum(reduced_output["line"]["p_from"] + reduced_output["line"]["p_to"])
+    return {
+        "max_u_pu_error": float(np.max(np.abs(full_output["node"]["u_pu"] - reduced_output["node"]["u_pu"]))),
+        "max_loading_error": float(np.max(np.abs(full_output["line"]["loading"] - reduced_output["line"]["loading"]))),
+        "energy_loss_relative_error": float(abs(reduced_loss - full_loss) / abs(full_loss)) if full_loss else 0.0,
+    }
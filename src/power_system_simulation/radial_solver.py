@@ -0,0 +1,422 @@
+"""
+Backward/forward sweep power flow solver for radial grids.
+
+The grids accepted by this package are radial: one source, one transformer and no cycles.
+For such grids the power flow can be solved by sweeping over the tree of the grid,
+vectorized over all the timesteps at once, instead of a general Newton-Raphson solve per timestep.
+The component models are the symmetric models of power-grid-model, so the results are the same within the tolerance.
+"""
+
+import math
+
+import numpy as np
+
+from power_system_simulation.graph_processing import GraphProcessor
+from power_system_simulation.lazy_import import lazy_import
+
+pgm = lazy_import("power_grid_model")
+sparse = lazy_import("scipy.sparse")
+
+BASE_POWER = 1e6
+SYSTEM_FREQUENCY = 50.0
+
+# default values of power-grid-model for optional source attributes
+DEFAULT_SK = 1e10
+DEFAULT_RX_RATIO = 0.1
+
+# exponent of the voltage dependency of the sym_load types: const power, const impedance, const current
+LOAD_TYPE_EXPONENT = {0: 0, 1: 2, 2: 1}
+
+
+class RadialSolverNotApplicableError(Exception):
+    """
+    The grid can not be solved with the radial solver, for example because it has more than one source,
+    a line connected at one side only, or components which are not supported.
+    """
+
+
+class RadialSolverNotConvergedError(Exception):
+    """
+    The backward/forward sweep did not converge within the maximum number of iterations.
+    """
+
+
+def _group_starts(sorted_index: np.ndarray):
+    """
+    Unique values of a sorted index array and the position where each of them starts, for np.add.reduceat.
+    """
+    unique, starts = np.unique(sorted_index, return_index=True)
+    return unique, starts
+
+
+class RadialPowerFlow:
+    """
+    Backward/forward sweep power flow solver for radial grids.
+    """
+
+    def __init__(self, input_data: dict, tolerance: float = 1e-8, max_iterations: int = 50, chunk_size: int = 4096):
+        """
+        Prepare the solver for a grid:
+        1.  Check that the grid only contains supported components: node, line, transformer, one source and sym_load.
+        2.  Order the branches with the GraphProcessor, from the source node to the end of the feeders.
+        3.  Calculate the per-unit admittances of the lines and the transformers, oriented from upstream to downstream.
+
+        Args:
+        input_data (dict): PGM input dataset.
+        tolerance (float): Maximum change of the node voltages in p.u. between two sweeps to stop the iterations.
+        max_iterations (int): Maximum number of sweeps.
+        chunk_size (int): Number of timesteps which are solved together, to limit the memory.
+
+        Raises:
+        RadialSolverNotApplicableError, GraphProcessor errors if the grid is not radial.
+        """
+        supported = {"node", "line", "transformer", "source", "sym_load"}
+        unsupported = [component for component in input_data if component not in supported]
+        if unsupported:
+            raise RadialSolverNotApplicableError(f"Unsupported components: {unsupported}")
+        source = input_data["source"][input_data["source"]["status"] != 0]
+        if len(source) != 1:
+            raise RadialSolverNotApplicableError("The grid should have exactly one connected source")
+
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+        self.chunk_size = chunk_size
+        self.node = input_data["node"]
+        self.line = input_data["line"] if "line" in input_data else pgm.initialize_array("input", "line", 0)
+        self.transformer = (
+            input_data["transformer"]
+            if "transformer" in input_data
+            else pgm.initialize_array("input", "transformer", 0)
+        )
+        self.sym_load = (
+            input_data["sym_load"] if "sym_load" in input_data else pgm.initialize_array("input", "sym_load", 0)
+        )
+        self.u_rated = self.node["u_rated"].astype(np.float64)
+
+        # source
+        sk = DEFAULT_SK if np.isnan(source["sk"][0]) else source["sk"][0]
+        rx_ratio = DEFAULT_RX_RATIO if np.isnan(source["rx_ratio"][0]) else source["rx_ratio"][0]
+        u_ref_angle = 0.0 if np.isnan(source["u_ref_angle"][0]) else source["u_ref_angle"][0]
+        x_source = BASE_POWER / sk / math.sqrt(rx_ratio**2 + 1.0)
+        self.y_source = 1.0 / complex(x_source * rx_ratio, x_source)
+        self.u_source = source["u_ref"][0] * np.exp(1j * u_ref_angle)
+        self.source_node = self._node_index(source["node"])[0]
+
+        # branch admittances, as [yff, yft, ytf, ytt] per branch
+        self.line_y = self._line_admittance()
+        self.transformer_y = self._transformer_admittance()
+
+        # tree order
+        branch_ids = np.concatenate([self.line["id"], self.transformer["id"]])
+        branch_from = np.concatenate([self.line["from_node"], self.transformer["from_node"]])
+        branch_to = np.concatenate([self.line["to_node"], self.transformer["to_node"]])
+        from_on = np.concatenate([self.line["from_status"], self.transformer["from_status"]]) != 0
+        to_on = np.concatenate([self.line["to_status"], self.transformer["to_status"]]) != 0
+        branch_on = from_on & to_on
+        branch_y = np.concatenate([self.line_y, self.transformer_y])
+        # a branch connected at one side only is a shunt at that side, with the other side floating
+        self.from_only = from_on & ~to_on
+        self.to_only = to_on & ~from_on
+        self.y_open_to = branch_y[:, 0] - branch_y[:, 1] * branch_y[:, 2] / branch_y[:, 3]
+        self.y_open_from = branch_y[:, 3] - branch_y[:, 2] * branch_y[:, 1] / branch_y[:, 0]
+        self.shunt_node = self._node_index(np.concatenate([branch_from[self.from_only], branch_to[self.to_only]]))
+        self.shunt_y = np.concatenate([self.y_open_to[self.from_only], self.y_open_from[self.to_only]])
+        # incidence matrices (branches, nodes) of the from and to side, to sum the branch powers per node
+        branch_index = np.arange(len(branch_ids))
+        self.node_from_branch, self.node_to_branch = [
+            sparse.csr_matrix(
+                (np.ones(len(branch_ids)), (branch_index, self._node_index(nodes))),
+                shape=(len(branch_ids), len(self.node)),
+            )
+            for nodes in (branch_from, branch_to)
+        ]
+        gp = GraphProcessor(
+            self.node["id"].tolist(),
+            branch_ids.tolist(),
+            list(zip(branch_from.tolist(), branch_to.tolist())),
+            branch_on.tolist(),
+            int(source["node"][0]),
+        )
+        order = gp.find_tree_order()
+        parent_ids = np.array([u for u, _, _ in order], dtype=self.node["id"].dtype)
+        child_ids = np.array([v for _, v, _ in order], dtype=self.node["id"].dtype)
+        edge_ids = np.array([edge for _, _, edge in order], dtype=branch_ids.dtype)
+        branch_index = np.argsort(branch_ids)
+        branch_position = branch_index[np.searchsorted(branch_ids, edge_ids, sorter=branch_index)]
+        self.parent = self._node_index(parent_ids)
+        self.child = self._node_index(child_ids)
+        # orient the admittances from the upstream (parent) to the downstream (child) node
+        y = branch_y[branch_position]
+        reversed_branch = branch_from[branch_position] != parent_ids
+        y[reversed_branch] = y[reversed_branch][:, [3, 2, 1, 0]]
+        self.y_parent_parent, self.y_parent_child, self.y_child_parent, self.y_child_child = y.T
+        self.branch_reversed = reversed_branch
+        self.branch_position = branch_position
+        self.n_lines = len(self.line)
+
+        # breadth-first order gives the branches sorted by depth, split them into levels
+        # and sort every level by upstream node, to sum the branch currents per upstream node with reduceat
+        depth = np.zeros(len(self.node), dtype=np.int64)
+        for parent, child in zip(self.parent, self.child):
+            depth[child] = depth[parent] + 1
+        branch_depth = depth[self.child]
+        self.levels = []
+        for level in range(1, branch_depth.max(initial=0) + 1):
+            branches = np.flatnonzero(branch_depth == level)
+            branches = branches[np.argsort(self.parent[branches], kind="stable")]
+            parents, starts = _group_starts(self.parent[branches])
+            y_pp, y_pc = self.y_parent_parent[branches], self.y_parent_child[branches]
+            y_cp, y_cc = self.y_child_parent[branches], self.y_child_child[branches]
+            self.levels.append(
+                {
+                    "parent": self.parent[branches],
+                    "child": self.child[branches],
+                    "parents": parents,
+                    "starts": starts,
+                    # backward sweep: parent side current from the child side current and voltage
+                    "i_from_i": (y_pp / y_cp)[:, None],
+                    "i_from_u": (y_pc - y_pp * y_cc / y_cp)[:, None],
+                    # forward sweep: child voltage from the child side current and the parent voltage
+                    "u_from_i": (-1.0 / y_cc)[:, None],
+                    "u_from_u": (-y_cp / y_cc)[:, None],
+                }
+            )
+
+        # loads sorted by node and type, to sum the load powers per node
+        self.load_node = self._node_index(self.sym_load["node"])
+        self.load_on = self.sym_load["status"] != 0
+        self.load_groups = {}
+        for load_type, exponent in LOAD_TYPE_EXPONENT.items():
+            loads = np.flatnonzero(self.sym_load["type"] == load_type)
+            if len(loads) > 0:
+                loads = loads[np.argsort(self.load_node[loads], kind="stable")]
+                self.load_groups[exponent] = (loads, *_group_starts(self.load_node[loads]))
+
+    def _node_index(self, node_ids) -> np.ndarray:
+        """
+        Convert node IDs to positions in the node array.
+        """
+        node_ids = np.asarray(node_ids)
+        sorter = np.argsort(self.node["id"])
+        return sorter[np.searchsorted(self.node["id"], node_ids, sorter=sorter)]
+
+    def _line_admittance(self) -> np.ndarray:
+        """
+        Per-unit pi-model admittances [yff, yft, ytf, ytt] of the lines.
+        """
+        base_z = self.u_rated[self._node_index(self.line["to_node"])] ** 2 / BASE_POWER
+        y_series = 1.0 / ((self.line["r1"] + 1j * self.line["x1"]) / base_z)
+        tan1 = np.nan_to_num(self.line["tan1"])
+        y_shunt = 2.0 * math.pi * SYSTEM_FREQUENCY * self.line["c1"] * (tan1 + 1j) * base_z
+        return np.stack([y_series + 0.5 * y_shunt, -y_series, -y_series, y_series + 0.5 * y_shunt], axis=1)
+
+    def _transformer_admittance(self) -> np.ndarray:
+        """
+        Per-unit admittances [yff, yft, ytf, ytt] of the transformers, including the off-nominal tap ratio
+        and the phase shift of the clock number.
+        """
+        transformer = self.transformer
+        for name in ["uk_min", "uk_max", "pk_min", "pk_max"]:
+            if not np.all(np.isnan(transformer[name])):
+                raise RadialSolverNotApplicableError("Tap dependent transformer impedances are not supported")
+        u1_rated = self.u_rated[self._node_index(transformer["from_node"])]
+        u2_rated = self.u_rated[self._node_index(transformer["to_node"])]
+        tap_direction = np.where(transformer["tap_max"] > transformer["tap_min"], 1.0, -1.0)
+        tap_change = tap_direction * (transformer["tap_pos"] - transformer["tap_nom"]) * transformer["tap_size"]
+        u1 = np.where(transformer["tap_side"] == 0, transformer["u1"] + tap_change, transformer["u1"])
+        u2 = np.where(transformer["tap_side"] == 0, transformer["u2"], transformer["u2"] + tap_change)
+        ratio = (u1 / u2) / (u1_rated / u2_rated)
+
+        z_series_abs = transformer["uk"] * u2**2 / transformer["sn"]
+        r_series = transformer["pk"] * u2**2 / transformer["sn"] ** 2
+        x_series = np.sqrt(np.maximum(z_series_abs**2 - r_series**2, 0.0))
+        y_shunt_abs = transformer["i0"] * transformer["sn"] / u2**2
+        g_shunt = transformer["p0"] / u2**2
+        b_shunt = -np.sqrt(np.maximum(y_shunt_abs**2 - g_shunt**2, 0.0))
+        base_z = u2_rated**2 / BASE_POWER
+        y_series = 1.0 / ((r_series + 1j * x_series) / base_z)
+        y_shunt = (g_shunt + 1j * b_shunt) * base_z
+
+        # complex ratio, the to side lags the from side by clock * 30 degrees
+        shifted_ratio = ratio * np.exp(1j * transformer["clock"] * math.pi / 6.0)
+        return np.stack(
+            [
+                (y_series + 0.5 * y_shunt) / ratio**2,
+                -y_series / np.conj(shifted_ratio),
+                -y_series / shifted_ratio,
+                y_series + 0.5 * y_shunt,
+            ],
+            axis=1,
+        )
+
+    def _load_powers(self, update_data: dict, n_scenarios: int) -> np.ndarray:
+        """
+        Per-unit complex power of every load for every scenario, shape (scenarios, loads).
+        """
+        p_specified = np.broadcast_to(self.sym_load["p_specified"], (n_scenarios, len(self.sym_load))).copy()
+        q_specified = np.broadcast_to(self.sym_load["q_specified"], (n_scenarios, len(self.sym_load))).copy()
+        status = np.broadcast_to(self.load_on, (n_scenarios, len(self.sym_load))).copy()
+        if update_data is not None and "sym_load" in update_data:
+            update = update_data["sym_load"].reshape(n_scenarios, -1)
+            sorter = np.argsort(self.sym_load["id"])
+            if np.all(update["id"] == update["id"][:1]):
+                # the usual time series, all the scenarios update the same loads
+                groups = [(slice(None), update["id"][0])] if n_scenarios > 0 else []
+            else:
+                groups = [
+                    (np.flatnonzero(np.all(update["id"] == scenario_ids, axis=1)), scenario_ids)
+                    for scenario_ids in np.unique(update["id"], axis=0)
+                ]
+            for rows, scenario_ids in groups:
+                position = sorter[np.searchsorted(self.sym_load["id"], scenario_ids, sorter=sorter)]
+                index = (rows, position) if isinstance(rows, slice) else np.ix_(rows, position)
+                for name, target in [("p_specified", p_specified), ("q_specified", q_specified)]:
+                    values = update[name][rows]
+                    target[index] = np.where(np.isnan(values), target[index], values)
+                values = update["status"][rows]
+                status[index] = np.where(values == -128, status[index], values != 0)
+        return (p_specified + 1j * q_specified) / BASE_POWER * status
+
+    def calculate_power_flow(self, update_data: dict = None) -> dict:
+        """
+        Calculate the power flow for every scenario in the update data, in chunks of timesteps.
+        Only the sym_load attributes p_specified, q_specified and status can be updated.
+
+        Args:
+        update_data (dict): PGM batch update dataset with sym_load updates, or None for a single calculation.
+
+        Returns:
+        dict: Output in the PGM sym_output format with the node, line and transformer results,
+            shape (scenarios, components) for a batch or (components,) for a single calculation.
+
+        Raises:
+        RadialSolverNotApplicableError, RadialSolverNotConvergedError.
+        """
+        if update_data is not None:
+            unsupported = [component for component in update_data if component != "sym_load"]
+            if unsupported:
+                raise RadialSolverNotApplicableError(f"Updates of {unsupported} are not supported")
+        batch = update_data is not None
+        n_scenarios = update_data["sym_load"].shape[0] if batch else 1
+        shape = (n_scenarios,)
+        output = {
+            "node": pgm.initialize_array("sym_output", "node", shape + (len(self.node),)),
+            "line": pgm.initialize_array("sym_output", "line", shape + (len(self.line),)),
+            "transformer": pgm.initialize_array("sym_output", "transformer", shape + (len(self.transformer),)),
+        }
+        for start in range(0, n_scenarios, self.chunk_size):
+            stop = min(start + self.chunk_size, n_scenarios)
+            chunk_update = None
+            if batch:
+                chunk_update = {"sym_load": update_data["sym_load"].reshape(n_scenarios, -1)[start:stop]}
+            load_powers = self._load_powers(chunk_update, stop - start)
+            u = self._solve(load_powers)
+            self._fill_output(output, slice(start, stop), u.T)
+        if not batch:
+            output = {component: array[0] for component, array in output.items()}
+        return output
+
+    def _solve(self, load_powers: np.ndarray) -> np.ndarray:
+        """
+        Backward/forward sweep for a chunk of scenarios.
+        The voltages and currents are stored node-major (nodes, scenarios), so every sweep step works on whole rows.
+
+        Args:
+        load_powers (np.ndarray): Complex load powers in p.u., shape (scenarios, loads).
+
+        Returns:
+        np.ndarray: Complex node voltages in p.u., shape (nodes, scenarios).
+        """
+        n_scenarios = load_powers.shape[0]
+        n_nodes = len(self.node)
+        load_powers = np.ascontiguousarray(load_powers.T)
+        # aggregate the loads per node and per voltage dependency
+        node_powers = {}
+        for exponent, (loads, nodes, starts) in self.load_groups.items():
+            power = np.zeros((n_nodes, n_scenarios), dtype=np.complex128)
+            power[nodes] = np.add.reduceat(load_powers[loads], starts, axis=0)
+            node_powers[exponent] = power
+
+        # flat start, no-load voltages from the source
+        u = np.empty((n_nodes, n_scenarios), dtype=np.complex128)
+        u[self.source_node] = self.u_source
+        for level in self.levels:
+            u[level["child"]] = level["u_from_u"] * u[level["parent"]]
+
+        for _ in range(self.max_iterations):
+            abs_u = np.abs(u)
+            power = np.zeros((n_nodes, n_scenarios), dtype=np.complex128)
+            for exponent, node_power in node_powers.items():
+                power += node_power * abs_u**exponent if exponent else node_power
+            # current drawn from every node by its own loads and shunts, and the branches to its subtree
+            current = np.conj(power / u)
+            np.add.at(current, self.shunt_node, self.shunt_y[:, None] * u[self.shunt_node])
+            for level in reversed(self.levels):
+                # the current injected into the branch at the child side is minus the current drawn by the child
+                child = level["child"]
+                i_parent = level["i_from_u"] * u[child] - level["i_from_i"] * current[child]
+                current[level["parents"]] += np.add.reduceat(i_parent, level["starts"], axis=0)
+            u_new = np.empty_like(u)
+            u_new[self.source_node] = self.u_source - current[self.source_node] / self.y_source
+            for level in self.levels:
+                u_new[level["child"]] = (
+                    level["u_from_i"] * current[level["child"]] + level["u_from_u"] * u_new[level["parent"]]
+                )
+            change = np.max(np.abs(u_new - u), initial=0.0)
+            u = u_new
+            if change < self.tolerance:
+                return u
+        raise RadialSolverNotConvergedError(f"No convergence after {self.max_iterations} iterations")
+
+    def _fill_output(self, output: dict, rows: slice, u: np.ndarray):
+        """
+        Fill the node, line and transformer output of a chunk of scenarios from the node voltages.
+        """
+        node = output["node"][rows]
+        node["id"] = self.node["id"]
+        node["energized"] = 1
+        node["u_pu"] = np.abs(u)
+        node["u"] = np.abs(u) * self.u_rated
+        node["u_angle"] = np.angle(u)
+
+        branch_from = np.concatenate([self.line["from_node"], self.transformer["from_node"]])
+        branch_to = np.concatenate([self.line["to_node"], self.transformer["to_node"]])
+        branch_y = np.concatenate([self.line_y, self.transformer_y])
+        u_from = u[:, self._node_index(branch_from)]
+        u_to = u[:, self._node_index(branch_to)]
+        branch_on = np.zeros(len(branch_y), dtype=bool)
+        branch_on[self.branch_position] = True
+        i_from = (branch_y[:, 0] * u_from + branch_y[:, 1] * u_to) * branch_on
+        i_to = (branch_y[:, 2] * u_from + branch_y[:, 3] * u_to) * branch_on
+        i_from += self.y_open_to * u_from * self.from_only
+        i_to += self.y_open_from * u_to * self.to_only
+        energized = branch_on | self.from_only | self.to_only
+        s_from = u_from * np.conj(i_from) * BASE_POWER
+        s_to = u_to * np.conj(i_to) * BASE_POWER
+        # the power injected into a node is the power flowing out of it through the branches
+        s_node = self.node_from_branch.T.dot(s_from.T).T + self.node_to_branch.T.dot(s_to.T).T
+        node["p"] = s_node.real
+        node["q"] = s_node.imag
+        base_i_from = BASE_POWER / (math.sqrt(3.0) * self.u_rated[self._node_index(branch_from)])
+        base_i_to = BASE_POWER / (math.sqrt(3.0) * self.u_rated[self._node_index(branch_to)])
+
+        for component, columns in [
+            ("line", slice(0, self.n_lines)),
+            ("transformer", slice(self.n_lines, len(branch_y))),
+        ]:
+            result = output[component][rows]
+            input_data = self.line if component == "line" else self.transformer
+            result["id"] = input_data["id"]
+            result["energized"] = energized[columns]
+            result["p_from"] = s_from[:, columns].real
+            result["q_from"] = s_from[:, columns].imag
+            result["i_from"] = np.abs(i_from[:, columns]) * base_i_from[columns]
+            result["s_from"] = np.abs(s_from[:, columns])
+            result["p_to"] = s_to[:, columns].real
+            result["q_to"] = s_to[:, columns].imag
+            result["i_to"] = np.abs(i_to[:, columns]) * base_i_to[columns]
+            result["s_to"] = np.abs(s_to[:, columns])
+            if component == "line":
+                result["loading"] = np.maximum(result["i_from"], result["i_to"]) / self.line["i_n"]
+            else:
+                result["loading"] = np.maximum(result["s_from"], result["s_to"]) / self.transformer["sn"]
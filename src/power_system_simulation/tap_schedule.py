@@ -0,0 +1,127 @@
+"""
+Optimal tap position per time window
+
+The time series power flow is calculated once per tap position and reduced to a criteria per timestep.
+The tap positions x timesteps matrix is split into windows of consecutive timesteps, for example hours or days,
+and the optimal tap position of every window is the one with the minimum criteria. With a limit on the tap changes
+between consecutive windows, or a cost per tap change, the schedule is found by dynamic programming.
+"""
+
+import numpy as np
+
+from power_system_simulation.lazy_import import lazy_import
+
+pd = lazy_import("pandas")
+
+
+def line_loss_per_timestep(output_data: dict) -> np.ndarray:
+    """
+    Energy loss of all the lines per timestep, with the weights of the trapezoid rule,
+    so the sum over the timesteps is the total line loss of the whole time series.
+    """
+    p_loss = np.sum(output_data["line"]["p_from"].astype(np.float64) + output_data["line"]["p_to"], axis=1)
+    weights = np.ones(len(p_loss))
+    if len(p_loss) > 1:
+        weights[[0, -1]] = 0.5
+    return weights * p_loss / 1000
+
+
+def voltage_deviation_per_timestep(output_data: dict) -> np.ndarray:
+    """
+    Maximum deviation of the node voltages from 1 p.u. per timestep.
+    """
+    return np.max(np.abs(output_data["node"]["u_pu"].astype(np.float64) - 1), axis=1)
+
+
+def tap_schedule(window_cost: np.ndarray, max_tap_change: int = None, change_cost: float = 0.0) -> np.ndarray:
+    """
+    Find the tap positions of consecutive windows with the minimum total cost by dynamic programming:
+    1.  The transition cost between the tap positions i and j of consecutive windows is change_cost if i != j,
+        and infinite if they are more than max_tap_change positions apart.
+    2.  Forward pass: the minimum cost of every tap position in a window is its window cost plus the minimum
+        over the previous tap positions of their minimum cost and the transition cost.
+    3.  Backward pass: follow the best previous tap positions from the best last tap position.
+
+    Args:
+    window_cost (np.ndarray): Cost of every tap position (rows, in tap order) in every window (columns).
+    max_tap_change (int): Maximum number of tap positions between consecutive windows, unlimited by default.
+    change_cost (float): Cost of every tap change, in the unit of window_cost.
+
+    Returns:
+    np.ndarray: The row of the tap position in every window.
+    """
+    n_taps, n_windows = window_cost.shape
+    distance = np.abs(np.arange(n_taps)[:, None] - np.arange(n_taps)[None, :])
+    transition = np.where(distance > 0, change_cost, 0.0)
+    if max_tap_change is not None:
+        transition[distance > max_tap_change] = np.inf
+    total = window_cost[:, 0].copy()
+    previous = np.zeros((n_taps, n_windows), dtype=np.int64)
+    for window in range(1, n_windows):
+        candidates = total[:, None] + transition
+        previous[:, window] = np.argmin(candidates, axis=0)
+        total = candidates[previous[:, window], np.arange(n_taps)] + window_cost[:, window]
+    schedule = np.empty(n_windows, dtype=np.int64)
+    schedule[-1] = np.argmin(total)
+    for window in range(n_windows - 1, 0, -1):
+        schedule[window - 1] = previous[schedule[window], window]
+    return schedule
+
+
+def schedule_table(
+    cost: np.ndarray,
+    tap_positions: np.ndarray,
+    timestamp,
+    window,
+    sum_windows: bool,
+    max_tap_change: int = None,
+    change_cost: float = 0.0,
+):
+    """
+    Split the criteria per tap position and timestep into windows and find the tap position of every window:
+    1.  Split the tap positions x timesteps matrix into windows of consecutive timesteps with a reshape,
+        the last window is padded if the profile is not a multiple of the window.
+    2.  Reduce every window: the sum of the criteria (line losses), or their maximum (voltage deviations).
+    3.  The optimal tap position of every window is the one with the minimum window criteria.
+    4.  If max_tap_change or change_cost is given, find the schedule with tap_schedule.
+
+    Args:
+    cost (np.ndarray): The criteria of every tap position (rows) at every timestep (columns).
+    tap_positions (np.ndarray): The tap position of every row.
+    timestamp (pd.Index): The timestamps of the columns.
+    window (int or str): The number of timesteps per window, or a duration like "1h" or "1D"
+        which is converted with the timestep of the profiles. The windows start at the first timestep.
+    sum_windows (bool): Sum the criteria per window, otherwise take the maximum.
+    max_tap_change (int): Maximum number of tap positions between consecutive windows, unlimited by default.
+    change_cost (float): Cost of every tap change, in the unit of the criteria.
+
+    Returns:
+    DataFrame: Per window, the "start" timestamp, the scheduled "tap_pos" and its criteria "value",
+        and the "optimal_tap_pos" of the window without the tap change limits.
+    """
+    n_taps, n_timesteps = cost.shape
+    if isinstance(window, str):
+        step = timestamp[1] - timestamp[0] if n_timesteps > 1 else pd.Timedelta(window)
+        window = int(pd.Timedelta(window) / step)
+    window = max(1, min(int(window), n_timesteps))
+    n_windows = -(-n_timesteps // window)
+    padded = np.full((n_taps, n_windows * window), np.nan)
+    padded[:, :n_timesteps] = cost
+    padded = padded.reshape(n_taps, n_windows, window)
+    if sum_windows:
+        window_cost = np.nansum(padded, axis=2)
+    else:
+        window_cost = np.nanmax(padded, axis=2)
+    optimal = np.argmin(window_cost, axis=0)
+    if max_tap_change is None and not change_cost:
+        schedule = optimal
+    else:
+        schedule = tap_schedule(window_cost, max_tap_change, change_cost)
+    return pd.DataFrame(
+        {
+            "start": timestamp[::window],
+            "tap_pos": tap_positions[schedule],
+            "value": window_cost[schedule, np.arange(n_windows)],
+            "optimal_tap_pos": tap_positions[optimal],
+        }
+    )
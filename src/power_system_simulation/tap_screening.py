@@ -0,0 +1,109 @@
+"""
+Sensitivity screening of the optimal tap position
+
+Instead of a time series power flow calculation at every tap position, the calculation is done at a few tap positions.
+Per timestep, the node voltages and the total line loss are fitted with a polynomial in the voltage ratio
+of the transformer, which predicts the optimization criteria at the other tap positions.
+Only the predicted optimum and its neighbours are confirmed with a full calculation.
+"""
+
+import numpy as np
+
+from power_system_simulation.instrumentation import stage
+from power_system_simulation.lazy_import import lazy_import
+
+pd = lazy_import("pandas")
+
+
+def transformer_ratio(transformer: np.ndarray, tap_pos: np.ndarray) -> np.ndarray:
+    """
+    Voltage ratio u1 / u2 of a transformer at the given tap positions.
+    The tap changes the rated voltage of the tap side (0: from side, 1: to side) by
+    direction * (tap_pos - tap_nom) * tap_size, the direction is 1 if tap_max > tap_min and -1 otherwise.
+    """
+    direction = 1 if transformer["tap_max"] > transformer["tap_min"] else -1
+    change = direction * (np.asarray(tap_pos, dtype=np.float64) - transformer["tap_nom"]) * transformer["tap_size"]
+    if transformer["tap_side"] == 0:
+        return (transformer["u1"] + change) / transformer["u2"]
+    return transformer["u1"] / (transformer["u2"] + change)
+
+
+def screen_optimal_tap_position(tap, reducer, minimize_losses: bool, n_fit: int = 3) -> dict:
+    """
+    Find the optimal tap position of an optimal_tap_position study with a sensitivity screening:
+    1.  Run the time series power flow calculation at n_fit tap positions spread over the tap range.
+    2.  Per timestep, fit a polynomial of degree n_fit - 1 in the voltage ratio of the transformer
+        to every node voltage and to the total line loss, see transformer_ratio.
+        The ratio is linear in the tap position for a tap on the from side, but not for a tap on the to side.
+    3.  Predict the optimization criteria at every tap position from the fitted polynomials.
+    4.  Confirm the predicted optimal tap position and its neighbours with a time series power flow calculation.
+        The tap positions of step 1 are already exact.
+    5.  The optimal tap position is the confirmed tap position with the minimum criteria.
+
+    Args:
+    tap (optimal_tap_position): The optimal tap position study.
+    reducer (callable): The optimization criteria of the output of a time series power flow calculation.
+    minimize_losses (bool): Predict the total line loss, otherwise the maximum voltage deviation.
+    n_fit (int): Number of tap positions with a full calculation for the fit, 2 or 3.
+
+    Returns:
+    dict:
+        - "optimal_tap_pos": the optimal confirmed tap position.
+        - "predicted_tap_pos": the tap position with the minimum predicted criteria.
+        - "table": DataFrame with per tap position the predicted and, if calculated, the confirmed criteria,
+          and whether it was used for the fit.
+    """
+    transformer = tap.low_voltage_grid["transformer"]
+    tap_positions = np.arange(
+        min(transformer["tap_min"][0], transformer["tap_max"][0]),
+        max(transformer["tap_min"][0], transformer["tap_max"][0]) + 1,
+    )
+    original_tap_pos = transformer["tap_pos"][0]
+    fit_taps = np.unique(np.round(np.linspace(tap_positions[0], tap_positions[-1], n_fit)).astype(int))
+
+    # full calculation at the fit tap positions
+    confirmed = {}
+    u_pu, p_loss = [], []
+    for tap_pos in fit_taps:
+        transformer["tap_pos"] = [tap_pos]
+        output_data = tap.power_grid_calculation.calculate(tap.low_voltage_grid, tap.load_profile_batch, threading=0)
+        confirmed[int(tap_pos)] = reducer(output_data)
+        u_pu.append(output_data["node"]["u_pu"].ravel())
+        p_loss.append(np.sum(output_data["line"]["p_from"].astype(np.float64) + output_data["line"]["p_to"], axis=1))
+    shape = output_data["node"]["u_pu"].shape
+
+    # sensitivities to the tap position per timestep and node, and prediction of the criteria
+    with stage("post_processing"):
+        degree = len(fit_taps) - 1
+        fit_ratios = transformer_ratio(transformer[0], fit_taps)
+        u_coefficients = np.polyfit(fit_ratios, np.array(u_pu), degree)
+        loss_coefficients = np.polyfit(fit_ratios, np.array(p_loss), degree)
+        predicted = {}
+        for tap_pos in tap_positions:
+            powers = np.vander([transformer_ratio(transformer[0], tap_pos)], degree + 1)[0]
+            if minimize_losses:
+                predicted[int(tap_pos)] = float(np.trapezoid(powers @ loss_coefficients) / 1000)
+            else:
+                u_predicted = (powers @ u_coefficients).reshape(shape)
+                predicted[int(tap_pos)] = float(np.max(np.abs(u_predicted - 1)))
+    predicted_tap_pos = min(predicted, key=predicted.get)
+
+    # confirm the predicted optimum and its neighbours
+    for tap_pos in [predicted_tap_pos - 1, predicted_tap_pos, predicted_tap_pos + 1]:
+        if tap_pos in predicted and tap_pos not in confirmed:
+            confirmed[tap_pos] = tap.tap_position_value(tap_pos, reducer)
+    transformer["tap_pos"] = [original_tap_pos]
+
+    table = pd.DataFrame(
+        {
+            "tap_pos": tap_positions,
+            "predicted": [predicted[int(tap_pos)] for tap_pos in tap_positions],
+            "confirmed": [confirmed.get(int(tap_pos), np.nan) for tap_pos in tap_positions],
+            "fitted": np.isin(tap_positions, fit_taps),
+        }
+    )
+    return {
+        "optimal_tap_pos": min(confirmed, key=confirmed.get),
+        "predicted_tap_pos": predicted_tap_pos,
+        "table": table,
+    }
@@ -0,0 +1,98 @@
+"""
+Top-k worst cases of batch power flow results
+
+Only the k highest line loadings and the k largest node voltage deviations are kept, with their IDs and timestamps.
+The output can be added in chunks of timesteps, the memory of the kept results stays O(k).
+"""
+
+import numpy as np
+
+from power_system_simulation.lazy_import import lazy_import
+
+pd = lazy_import("pandas")
+
+
+def largest(values: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k largest values, sorted from large to small, with np.argpartition instead of a full sort.
+    """
+    if len(values) > k:
+        index = np.argpartition(-values, k - 1)[:k]
+    else:
+        index = np.arange(len(values))
+    return index[np.argsort(-values[index], kind="stable")]
+
+
+class TopK:
+    """
+    Keep the k highest line loadings and the k largest node voltage deviations from 1 p.u.
+    of one or more batch outputs.
+    """
+
+    def __init__(self, k: int):
+        """
+        Args:
+        k (int): Number of worst cases to keep, for the line loadings and the node voltages each.
+        """
+        self.k = k
+        self.kept = {"line": None, "node": None}
+
+    def update(self, output_data: dict, timestamps, case=None):
+        """
+        Add the batch output of some timesteps:
+        1.  Find the k worst cases of the new output with np.argpartition over all timesteps and components.
+        2.  Merge them with the kept worst cases and keep the k worst of them.
+
+        Args:
+        output_data (dict): Batch output dataset, shape (timesteps, components).
+        timestamps (array): The timestamp of every timestep of the output.
+        case: Optional label of the output, for example the alternative line of an N-1 calculation.
+        """
+        timestamps = np.asarray(timestamps)
+        u_pu = output_data["node"]["u_pu"]
+        for component, values, extra in [
+            ("line", output_data["line"]["loading"], {}),
+            ("node", np.abs(u_pu - 1), {"u_pu": u_pu}),
+        ]:
+            index = largest(values.ravel(), self.k)
+            timestep, position = np.unravel_index(index, values.shape)
+            candidates = {
+                "value": values[timestep, position],
+                "id": output_data[component]["id"][timestep, position],
+                "timestamp": timestamps[timestep],
+                "case": np.full(len(index), case, dtype=object),
+            }
+            for name, array in extra.items():
+                candidates[name] = array[timestep, position]
+            if self.kept[component] is not None:
+                candidates = {
+                    name: np.concatenate([self.kept[component][name], array]) for name, array in candidates.items()
+                }
+            keep = largest(candidates["value"], self.k)
+            self.kept[component] = {name: array[keep] for name, array in candidates.items()}
+
+    def tables(self) -> dict:
+        """
+        The kept worst cases, sorted from worst to less bad.
+
+        Returns:
+        dict: Two tables:
+            - "line_loading": Line_ID, Timestamp and loading_pu of the k highest line loadings.
+            - "voltage_deviation": Node_ID, Timestamp, u_pu and deviation_pu of the k largest voltage deviations.
+            Both tables have a case column if the output was added with a case label.
+        """
+        tables = {}
+        for name, component, columns in [
+            ("line_loading", "line", {"Line_ID": "id", "Timestamp": "timestamp", "loading_pu": "value"}),
+            (
+                "voltage_deviation",
+                "node",
+                {"Node_ID": "id", "Timestamp": "timestamp", "u_pu": "u_pu", "deviation_pu": "value"},
+            ),
+        ]:
+            kept = self.kept[component]
+            table = pd.DataFrame({column: kept[field] if kept else [] for column, field in columns.items()})
+            if kept and any(case is not None for case in kept["case"]):
+                table["case"] = kept["case"]
+            tables[name] = table
+        return tables
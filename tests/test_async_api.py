@@ -0,0 +1,104 @@
+import asyncio
+import unittest
+
+import pandas as pd
+
+from power_system_simulation.async_api import StudyQueue
+from power_system_simulation.power_grid_calculation import PowerGridCalculation
+from power_system_simulation.power_system_simulation import n1_calculation, optimal_tap_position
+
+CASE = {
+    "network": "tests/data/small_network/input/input_network_data.json",
+    "meta": "tests/data/small_network/input/meta_data.json",
+    "active": "tests/data/small_network/input/active_power_profile.parquet",
+    "reactive": "tests/data/small_network/input/reactive_power_profile.parquet",
+}
+
+
+class TestMyClass(unittest.TestCase):
+    def test_time_series_case1(self):
+        async def run():
+            queue = StudyQueue(max_workers=2)
+            progress = []
+            job = queue.time_series(CASE, chunk_size=400)
+            job.add_progress_callback(lambda done, total: progress.append((done, total)))
+            # the same request while the job is running is not submitted again
+            self.assertIs(queue.time_series(CASE, chunk_size=400), job)
+            result = await job
+            self.assertEqual(queue.jobs, {})
+            queue.shutdown()
+            return result, progress
+
+        (nodes, lines), progress = asyncio.run(run())
+        self.assertEqual(progress, [(400, 960), (800, 960), (960, 960)])
+        pgc = PowerGridCalculation()
+        pgc.construct_pgm(CASE["network"])
+        pgc.creat_batch_update_dataset(CASE["active"], CASE["reactive"])
+        expected_nodes, expected_lines = pgc.time_series_power_flow_calculation()
+        pd.testing.assert_frame_equal(nodes, expected_nodes)
+        pd.testing.assert_frame_equal(lines, expected_lines)
+
+    def test_studies_case1(self):
+        async def run():
+            queue = StudyQueue(max_workers=2)
+            taps = []
+            alternatives = []
+            tap_job = queue.optimal_tap(CASE, "minimize_line_losses")
+            tap_job.add_progress_callback(lambda done, total: taps.append((done, total)))
+            n1_job = queue.n1(CASE, 18)
+            n1_job.add_progress_callback(lambda done, total: alternatives.append((done, total)))
+            results = await asyncio.gather(tap_job, n1_job)
+            queue.shutdown()
+            return results, taps, alternatives
+
+        (tap, table), taps, alternatives = asyncio.run(run())
+        self.assertEqual(taps, [(i, 5) for i in range(1, 6)])
+        self.assertEqual(alternatives, [(1, 1)])
+        expected_tap = optimal_tap_position(CASE["network"], CASE["active"], CASE["reactive"])
+        self.assertEqual(tap, expected_tap.find_optimal_tap_position("minimize_line_losses"))
+        expected_n1 = n1_calculation(CASE["network"], CASE["meta"], CASE["active"], CASE["reactive"])
+        pd.testing.assert_frame_equal(table, expected_n1.n1_calculate(18))
+
+    def test_cancel_case1(self):
+        async def run():
+            queue = StudyQueue(max_workers=1)
+            progress = []
+            job = queue.optimal_tap(CASE, "minimize_voltage_deviations")
+            # cancel from the event loop after the first tap position, the worker stops at the next one
+            job.add_progress_callback(lambda done, total: (progress.append(done), job.cancel()))
+            with self.assertRaises(asyncio.CancelledError):
+                await job
+            self.assertTrue(job.cancelled())
+            # cancelling a task which awaits a shared job does not cancel the job
+            second = queue.time_series(CASE, chunk_size=480)
+            task = asyncio.ensure_future(self._await(second))
+            await asyncio.sleep(0)
+            task.cancel()
+            nodes, _ = await second
+            # a shared job is only cancelled when every requester cancels it
+            shared = queue.time_series(CASE, chunk_size=240)
+            self.assertIs(queue.time_series(CASE, chunk_size=240), shared)
+            shared.cancel()
+            self.assertFalse(shared.cancelled())
+            nodes_shared, _ = await shared
+            self.assertEqual(len(nodes_shared), 960)
+            other = queue.time_series(CASE, chunk_size=120)
+            queue.time_series(CASE, chunk_size=120).cancel()
+            other.cancel()
+            self.assertTrue(other.cancelled())
+            with self.assertRaises(asyncio.CancelledError):
+                await other
+            queue.shutdown()
+            return progress, nodes
+
+        progress, nodes = asyncio.run(run())
+        self.assertLess(progress[-1], 5)
+        self.assertEqual(len(nodes), 960)
+
+    @staticmethod
+    async def _await(job):
+        return await job
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import json
+import os
+import tempfile
+import unittest
+
+from power_system_simulation.checkpoint import Checkpoint
+from power_system_simulation.power_system_simulation import n1_calculation, optimal_tap_position
+
+PATH_NETWORK = "tests/data/small_network/input/input_network_data.json"
+PATH_META = "tests/data/small_network/input/meta_data.json"
+PATH_ACTIVE = "tests/data/small_network/input/active_power_profile.parquet"
+PATH_REACTIVE = "tests/data/small_network/input/reactive_power_profile.parquet"
+
+
+class TestMyClass(unittest.TestCase):
+    def test_checkpoint_case1(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "checkpoint.jsonl")
+            checkpoint = Checkpoint(path, "abc")
+            checkpoint.add("1", [1.0, 2])
+            checkpoint.add("2", 3.0)
+            # a line which was not completely written when the run was killed
+            with open(path, "a") as file:
+                file.write('{"key": "3", "val')
+            checkpoint = Checkpoint(path, "abc")
+            self.assertEqual(checkpoint.results, {"1": [1.0, 2], "2": 3.0})
+            self.assertIn("1", checkpoint)
+            self.assertIsNone(checkpoint.get("3"))
+            checkpoint.add("3", 4.0)
+            self.assertEqual(Checkpoint(path, "abc").get("3"), 4.0)
+            # a stale checkpoint is never reused
+            self.assertEqual(Checkpoint(path, "def").results, {})
+            self.assertEqual(Checkpoint(path, "abc").results, {})
+
+    def test_resume_case1(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "n1.jsonl")
+            n1 = n1_calculation(PATH_NETWORK, PATH_META, PATH_ACTIVE, PATH_REACTIVE)
+            table = n1.n1_calculate(18, checkpoint_path=path)
+            with open(path) as file:
+                records = [json.loads(line) for line in file]
+            self.assertEqual(len(records), 1 + len(table))
+            # finished alternatives are read from the checkpoint instead of calculated
+            key = records[1]["key"]
+            with open(path, "w") as file:
+                file.write(json.dumps(records[0]) + "\n")
+                file.write(json.dumps({"key": key, "value": [9.0, 0, 1]}) + "\n")
+            resumed = n1.n1_calculate(18, checkpoint_path=path)
+            self.assertEqual(resumed.loc[0, "max__loading_pu"], 9.0)
+            self.assertEqual(resumed.loc[1:, "max__loading_pu"].tolist(), table.loc[1:, "max__loading_pu"].tolist())
+
+            path = os.path.join(tmp, "tap.jsonl")
+            tap = optimal_tap_position(PATH_NETWORK, PATH_ACTIVE, PATH_REACTIVE)
+            optimal = tap.find_optimal_tap_position("minimize_voltage_deviations", checkpoint_path=path)
+            with open(path) as file:
+                fingerprint = json.loads(file.readline())["fingerprint"]
+            checkpoint = Checkpoint(path, fingerprint)
+            self.assertEqual(len(checkpoint.results), 5)
+            other = 5 if optimal != 5 else 1
+            checkpoint.add(f"minimize_voltage_deviations:{other}", -1.0)
+            self.assertEqual(tap.find_optimal_tap_position("minimize_voltage_deviations", checkpoint_path=path), other)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import json
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from power_system_simulation.cli import InvalidManifestError, main, read_manifest, run_case
+
+DIRECTORY = os.path.abspath("tests/data/small_network/input")
+CASE = {
+    "name": "small_network",
+    "network": os.path.join(DIRECTORY, "input_network_data.json"),
+    "meta": os.path.join(DIRECTORY, "meta_data.json"),
+    "active": os.path.join(DIRECTORY, "active_power_profile.parquet"),
+    "reactive": os.path.join(DIRECTORY, "reactive_power_profile.parquet"),
+    "ev": os.path.join(DIRECTORY, "ev_active_power_profile.parquet"),
+}
+STUDIES = [
+    {"study": "validation"},
+    {"study": "time_series"},
+    {"study": "ev_penetration", "p_level": 0.2},
+    {"study": "optimal_tap", "criteria": "minimize_line_losses"},
+    {"study": "n1", "line_id": 18},
+]
+
+
+class TestMyClass(unittest.TestCase):
+    def test_run_case_case1(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            rows = run_case(dict(CASE, studies=STUDIES + [{"study": "n1", "line_id": 1}]), tmp, "power_grid_model")
+            self.assertEqual([row["study"] for row in rows], [study["study"] for study in STUDIES] + ["n1"])
+            self.assertTrue(all(row["status"] == "ok" for row in rows[:-1]))
+            # the failing study is reported and does not stop the case
+            self.assertEqual(rows[-1]["status"], "failed")
+            self.assertIn("IDNotFoundError", rows[-1]["error"])
+            outputs = json.loads(rows[2]["outputs"])
+            self.assertEqual(
+                outputs,
+                ["small_network/2_ev_penetration_nodes.parquet", "small_network/2_ev_penetration_lines.parquet"],
+            )
+            tap = pd.read_parquet(os.path.join(tmp, "small_network", "3_optimal_tap_optimal_tap.parquet"))
+            self.assertIn(tap["optimal_tap_pos"][0], range(1, 6))
+
+    def test_validation_case1(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(CASE["network"]) as file:
+                network = json.load(file)
+            network["data"]["node"][1]["u_rated"] = -400
+            path = os.path.join(tmp, "invalid_network_data.json")
+            with open(path, "w") as file:
+                json.dump(network, file)
+            rows = run_case(dict(CASE, network=path, studies=[{"study": "validation"}]), tmp, "power_grid_model")
+            # invalid PGM input is reported, not raised
+            self.assertEqual(rows[0]["status"], "ok")
+            issues = pd.read_parquet(os.path.join(tmp, "small_network", "0_validation_issues.parquet"))
+            self.assertIn("ValidationException", issues["error"].tolist())
+
+    def test_main_case1(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            manifest = os.path.join(tmp, "manifest.json")
+            with open(manifest, "w") as file:
+                json.dump(
+                    {
+                        "cases": [
+                            CASE,
+                            dict(CASE, name="missing", network="missing.json"),
+                        ],
+                        "studies": [{"study": "validation"}],
+                    },
+                    file,
+                )
+            output = os.path.join(tmp, "results")
+            self.assertEqual(main([manifest, "--output", output, "--workers", "2"]), 1)
+            summary = pd.read_parquet(os.path.join(output, "summary.parquet")).set_index("case")
+            self.assertEqual(summary.loc["small_network", "status"], "ok")
+            self.assertEqual(summary.loc["missing", "status"], "failed")
+            self.assertIn("FileNotFoundError", summary.loc["missing", "error"])
+            self.assertTrue(os.path.exists(os.path.join(output, "small_network", "0_validation_issues.parquet")))
+
+    def test_manifest_case1(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            manifest = os.path.join(tmp, "manifest.json")
+            for content in [
+                {"cases": []},
+                {"cases": [{"network": "a"}]},
+                {"cases": [dict(CASE, studies=[{"study": "x"}])]},
+            ]:
+                with open(manifest, "w") as file:
+                    json.dump(content, file)
+                with self.assertRaises(InvalidManifestError):
+                    read_manifest(manifest)
+            with open(manifest, "w") as file:
+                json.dump(
+                    {"cases": [{"name": "a", "network": "a.json", "studies": [{"study": "n1", "line_id": 3}]}]}, file
+                )
+            case = read_manifest(manifest)[0]
+            self.assertEqual(case["network"], os.path.join(tmp, "a.json"))
+            self.assertEqual(case["studies"], [{"study": "n1", "line_id": 3}])
@@ -1,8 +1,17 @@
+import os
+import tempfile
 import unittest
 
 import networkx as nx
 
-from power_system_simulation.graph_processing import GraphProcessor
+from power_system_simulation.graph_processing import (
+    GraphCycleError,
+    GraphNotFullyConnectedError,
+    GraphProcessor,
+    IDNotFoundError,
+    IDNotUniqueError,
+    InputLengthDoesNotMatchError,
+)
 
 
 class TestMyClass(unittest.TestCase):
@@ -183,6 +192,71 @@ class TestMyClass(unittest.TestCase):
             print("alternative_case4() raise custom error:", e.__class__.__name__)
             print("detail:", e)
 
+    def test_tree_order_case1(self):
+        vertex_ids = [0, 2, 4, 6, 10]
+        edge_ids = [1, 3, 5, 7, 8, 9]
+        edge_vertex_id_pairs = [(0, 2), (0, 4), (0, 6), (2, 4), (4, 10), (2, 10)]
+        edge_enabled = [True, True, True, False, True, False]
+        source_vertex_id = 0
+        gp = GraphProcessor(vertex_ids, edge_ids, edge_vertex_id_pairs, edge_enabled, source_vertex_id)
+        self.assertEqual(gp.find_tree_order(), [(0, 2, 1), (0, 4, 3), (0, 6, 5), (4, 10, 8)])
+
+    def test_topology_file_case1(self):
+        vertex_ids = ["A", "B", "C", "D", "E"]
+        edge_vertex_id_pairs = [("A", "B"), ("B", "C"), ("C", "D"), ("C", "E"), ("B", "E")]
+        edge_ids = [1, 2, 3, 4, 5]
+        edge_enabled = [1, 1, 1, 1, 0]
+        arguments = (vertex_ids, edge_ids, edge_vertex_id_pairs, edge_enabled, "A")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "topology.npz")
+            self.assertIsNone(GraphProcessor.load(path, GraphProcessor.fingerprint(*arguments)))
+            created = GraphProcessor.load_or_create(path, *arguments)
+            self.assertTrue(os.path.exists(path))
+            loaded = GraphProcessor.load_or_create(path, *arguments)
+            self.assertEqual(loaded.find_tree_order(), created.find_tree_order())
+            self.assertEqual(loaded.find_downstream_vertices(3), ["D"])
+            self.assertEqual(loaded.find_alternative_edges(4), created.find_alternative_edges(4))
+            self.assertEqual(loaded.edge_vertex_id_pairs, edge_vertex_id_pairs)
+            self.assertEqual(sorted(loaded.graph.edges), sorted(created.graph.edges))
+            # a changed topology is validated and saved again
+            with self.assertRaises(GraphCycleError):
+                GraphProcessor.load_or_create(path, vertex_ids, edge_ids, edge_vertex_id_pairs, [1] * 5, "A")
+            changed = GraphProcessor.load_or_create(
+                path, vertex_ids, edge_ids, edge_vertex_id_pairs, [1, 1, 1, 0, 1], "A"
+            )
+            self.assertEqual(changed.find_alternative_edges(5), [4])
+            self.assertIsNone(GraphProcessor.load(path, GraphProcessor.fingerprint(*arguments)))
+
+    def test_validate_all_case1(self):
+        vertex_ids = ["A", "B", "C", "D", "E"]
+        edge_vertex_id_pairs = [("A", "B"), ("B", "C"), ("C", "D"), ("C", "E"), ("B", "E")]
+        edge_ids = [1, 2, 3, 4, 5]
+        edge_enabled = [1, 1, 1, 1, 0]
+        source_vertex_id = "A"
+        report = GraphProcessor.validate_all(vertex_ids, edge_ids, edge_vertex_id_pairs, edge_enabled, source_vertex_id)
+        self.assertEqual(report, [])
+
+    def test_validate_all_case2(self):
+        vertex_ids = ["A", "A", "C", "D", "E", "F"]
+        edge_vertex_id_pairs = [("A", "B"), ("A", "C"), ("C", "D"), ("C", "E"), ("D", "E")]
+        edge_ids = [1, 2, 3, 4, 5]
+        edge_enabled = [1, 1, 1, 1, 1, 1]
+        source_vertex_id = "X"
+        report = GraphProcessor.validate_all(vertex_ids, edge_ids, edge_vertex_id_pairs, edge_enabled, source_vertex_id)
+        print("validate_all_case2() return:", report)
+        errors = [(issue["error"], issue["ids"]) for issue in report]
+        self.assertEqual(
+            errors,
+            [
+                (IDNotUniqueError, ["A"]),
+                (IDNotFoundError, ["B"]),
+                (InputLengthDoesNotMatchError, []),
+                (IDNotFoundError, ["X"]),
+                (GraphNotFullyConnectedError, ["F"]),
+                (GraphCycleError, [3, 4, 5]),
+            ],
+        )
+
     # add new cases here with the same structure
 
 
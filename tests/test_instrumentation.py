@@ -0,0 +1,80 @@
+import json
+import threading
+import unittest
+
+import numpy as np
+
+from power_system_simulation.instrumentation import StageProfiler, stage
+from power_system_simulation.power_system_simulation import n1_calculation, optimal_tap_position
+
+
+class TestMyClass(unittest.TestCase):
+    def test_profiler_case1(self):
+        path0 = "tests/data/small_network/input/input_network_data.json"
+        path1 = "tests/data/small_network/input/meta_data.json"
+        path2 = "tests/data/small_network/input/active_power_profile.parquet"
+        path3 = "tests/data/small_network/input/reactive_power_profile.parquet"
+        calls = []
+        with StageProfiler(track_memory=True, callback=lambda *args: calls.append(args)) as profiler:
+            n1 = n1_calculation(path0, path1, path2, path3)
+            n1.n1_calculate(18)
+            opt_tap_pos_inst = optimal_tap_position(path0, path2, path3)
+            opt_tap_pos_inst.find_optimal_tap_position("minimize_voltage_deviations")
+        records = profiler.to_dict()
+        print("profiler_case1() return:", profiler.to_json(indent=2))
+        for name in [
+            "json_parsing",
+            "validation",
+            "parquet_reading",
+            "graph_processing",
+            "model_construction",
+            "power_flow",
+            "post_processing",
+        ]:
+            self.assertGreater(records[name]["calls"], 0)
+            self.assertGreaterEqual(records[name]["seconds"], 0.0)
+            self.assertGreaterEqual(records[name]["peak_mb"], 0.0)
+        self.assertEqual(len(calls), sum(record["calls"] for record in records.values()))
+        self.assertEqual(json.loads(profiler.to_json()), records)
+
+    def test_profiler_case2(self):
+        # nothing is recorded without an active profiler
+        self.assertIs(stage("a"), stage("b"))
+        with StageProfiler(track_memory=True) as profiler:
+            with stage("outer"):
+                with stage("inner"):
+                    inner = np.ones(1_000_000)
+                del inner
+                outer = np.ones(10)
+        records = profiler.to_dict()
+        self.assertGreaterEqual(records["inner"]["peak_mb"], 8.0)
+        self.assertGreaterEqual(records["outer"]["peak_mb"], records["inner"]["peak_mb"])
+        with StageProfiler() as profiler:
+            with stage("outer"):
+                pass
+        self.assertIsNone(profiler.to_dict()["outer"]["peak_mb"])
+
+    def test_profiler_case3(self):
+        # a profiler only records the stages of its own thread
+        entered = threading.Event()
+        done = threading.Event()
+
+        def other_thread():
+            entered.wait()
+            with stage("other"):
+                pass
+            done.set()
+
+        thread = threading.Thread(target=other_thread)
+        thread.start()
+        with StageProfiler() as profiler:
+            entered.set()
+            done.wait()
+            with stage("own"):
+                pass
+        thread.join()
+        self.assertEqual(list(profiler.to_dict()), ["own"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,27 @@
+import subprocess
+import sys
+import unittest
+
+from power_system_simulation.lazy_import import LazyModule, lazy_import
+
+
+class TestMyClass(unittest.TestCase):
+    def test_lazy_import_case1(self):
+        module = lazy_import("json")
+        self.assertIsInstance(module, LazyModule)
+        self.assertEqual(module.dumps([1]), "[1]")
+        self.assertIn("dumps", dir(module))
+
+    def test_lazy_import_case2(self):
+        # the heavy dependencies are not imported with the package
+        code = (
+            "import sys; import power_system_simulation.power_system_simulation; "
+            "print(sorted(name for name in ['networkx', 'scipy', 'pandas', 'pyarrow', 'power_grid_model'] "
+            "if name in sys.modules))"
+        )
+        output = subprocess.check_output([sys.executable, "-c", code], text=True)
+        self.assertEqual(output.strip(), "[]")
+
+
+if __name__ == "__main__":
+    unittest.main()
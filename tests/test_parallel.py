@@ -0,0 +1,67 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from power_system_simulation.power_grid_calculation import calculate_power_flow
+from power_system_simulation.power_system_simulation import ev_penetration_level, n1_calculation, optimal_tap_position
+
+PATH_NETWORK = "tests/data/small_network/input/input_network_data.json"
+PATH_META = "tests/data/small_network/input/meta_data.json"
+PATH_ACTIVE = "tests/data/small_network/input/active_power_profile.parquet"
+PATH_REACTIVE = "tests/data/small_network/input/reactive_power_profile.parquet"
+PATH_EV = "tests/data/small_network/input/ev_active_power_profile.parquet"
+
+
+class TestMyClass(unittest.TestCase):
+    def test_executor_case1(self):
+        tap = optimal_tap_position(PATH_NETWORK, PATH_ACTIVE, PATH_REACTIVE)
+        with tap.executor(max_workers=2) as executor:
+            # the base case is the same as a serial calculation
+            output_data = executor.map([{}])[0]
+            expected = calculate_power_flow(tap.low_voltage_grid, tap.load_profile_batch)
+            np.testing.assert_array_equal(output_data["node"]["u_pu"], expected["node"]["u_pu"])
+            for criteria in ["minimize_line_losses", "minimize_voltage_deviations"]:
+                self.assertEqual(
+                    tap.find_optimal_tap_position(criteria, executor), tap.find_optimal_tap_position(criteria)
+                )
+        self.assertEqual(executor.blocks, [])
+
+    def test_executor_case2(self):
+        for engine in ["power_grid_model", "radial"]:
+            n1 = n1_calculation(PATH_NETWORK, PATH_META, PATH_ACTIVE, PATH_REACTIVE, engine=engine)
+            with n1.executor(max_workers=2) as executor:
+                pd.testing.assert_frame_equal(n1.n1_calculate(18, executor), n1.n1_calculate(18), atol=1e-12)
+
+    def test_executor_case3(self):
+        ev = ev_penetration_level(PATH_NETWORK, PATH_ACTIVE, PATH_REACTIVE, PATH_EV, PATH_META)
+        with ev.executor(max_workers=2) as executor:
+            tables = ev.calculate_levels([0.5, 1.0], executor)
+        expected = ev.calculate_levels([0.5, 1.0])
+        for table, expected_table in zip(tables, expected):
+            pd.testing.assert_frame_equal(table[0], expected_table[0])
+            pd.testing.assert_frame_equal(table[1], expected_table[1])
+
+    def test_executor_case4(self):
+        # the workers apply the profile reduction and the precision of the study
+        tap = optimal_tap_position(
+            PATH_NETWORK, PATH_ACTIVE, PATH_REACTIVE, reduction="kmeans", n_clusters=10, precision="float32"
+        )
+        with tap.executor(max_workers=2) as executor:
+            output_data = executor.map([{}])[0]
+            expected = tap.power_grid_calculation.calculate(tap.low_voltage_grid, tap.load_profile_batch)
+            self.assertEqual(output_data["node"].dtype, expected["node"].dtype)
+            np.testing.assert_array_equal(output_data["node"]["u_pu"], expected["node"]["u_pu"])
+            for criteria in ["minimize_line_losses", "minimize_voltage_deviations"]:
+                pd.testing.assert_frame_equal(
+                    tap.optimal_tap_schedule(criteria, executor=executor), tap.optimal_tap_schedule(criteria)
+                )
+        ev = ev_penetration_level(PATH_NETWORK, PATH_ACTIVE, PATH_REACTIVE, PATH_EV, PATH_META, reduction="unique")
+        with ev.executor(max_workers=2) as executor:
+            tables = ev.calculate_levels([0.5], executor)
+        for table, expected_table in zip(tables[0], ev.calculate_levels([0.5])[0]):
+            pd.testing.assert_frame_equal(table, expected_table)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+from power_grid_model.utils import json_deserialize, json_serialize
+
+from power_system_simulation.graph_processing import IDNotFoundError
+from power_system_simulation.partitioning import PartitionedStudy, partition_grid
+from power_system_simulation.power_grid_calculation import PowerGridCalculation
+from power_system_simulation.power_system_simulation import ev_penetration_level, n1_calculation
+
+PATH_NETWORK = "tests/data/small_network/input/input_network_data.json"
+PATH_META = "tests/data/small_network/input/meta_data.json"
+PATH_ACTIVE = "tests/data/small_network/input/active_power_profile.parquet"
+PATH_REACTIVE = "tests/data/small_network/input/reactive_power_profile.parquet"
+PATH_EV = "tests/data/small_network/input/ev_active_power_profile.parquet"
+OFFSET = 100
+
+
+def write_export(directory: str) -> dict:
+    """
+    Write an export with two copies of the small network behind two transformers on the same MV node.
+    The IDs of the second copy, except the MV node and the source, are shifted by OFFSET.
+    """
+    with open(PATH_NETWORK) as file:
+        grid = json_deserialize(file.read())
+    export = {}
+    for component, array in grid.items():
+        copy = array.copy()
+        if component == "source":
+            export[component] = array
+            continue
+        if component == "node":
+            copy = copy[copy["id"] != 0]
+        copy["id"] += OFFSET
+        for name in ["node", "from_node", "to_node"]:
+            if name in copy.dtype.names:
+                copy[name] = np.where(copy[name] == 0, 0, copy[name] + OFFSET)
+        export[component] = np.concatenate([array, copy])
+    with open(PATH_META) as file:
+        meta = json.load(file)
+    meta["lv_feeders"] += [feeder + OFFSET for feeder in meta["lv_feeders"]]
+    paths = {name: os.path.join(directory, f"{name}.parquet") for name in ["active", "reactive"]}
+    paths["network"] = os.path.join(directory, "input_network_data.json")
+    paths["meta"] = os.path.join(directory, "meta_data.json")
+    with open(paths["network"], "w") as file:
+        file.write(json_serialize(export))
+    with open(paths["meta"], "w") as file:
+        json.dump(meta, file)
+    for name, path in [("active", PATH_ACTIVE), ("reactive", PATH_REACTIVE)]:
+        profile = pd.read_parquet(path)
+        shifted = profile.rename(columns=lambda column: type(column)(int(column) + OFFSET))
+        pd.concat([profile, shifted], axis=1).to_parquet(paths[name])
+    return paths
+
+
+class TestMyClass(unittest.TestCase):
+    def test_partition_grid_case1(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = write_export(tmp)
+            with open(paths["network"]) as file:
+                grid = json_deserialize(file.read())
+            with open(paths["meta"]) as file:
+                meta = json.load(file)
+        partitions = partition_grid(grid, meta)
+        self.assertEqual([subnetwork_meta["transformer"] for _, subnetwork_meta in partitions], [11, 11 + OFFSET])
+        subnetwork, subnetwork_meta = partitions[1]
+        self.assertEqual(subnetwork["node"]["id"].tolist(), [0] + list(range(1 + OFFSET, 10 + OFFSET)))
+        self.assertEqual(subnetwork["line"]["id"].tolist(), list(range(16 + OFFSET, 25 + OFFSET)))
+        self.assertEqual(subnetwork["sym_load"]["id"].tolist(), list(range(12 + OFFSET, 16 + OFFSET)))
+        self.assertEqual(subnetwork["source"]["node"].tolist(), [0])
+        self.assertEqual(subnetwork_meta["lv_feeders"], [16 + OFFSET, 20 + OFFSET])
+        self.assertEqual(subnetwork_meta["lv_busbar"], 1 + OFFSET)
+
+    def test_partitioned_study_case1(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = write_export(tmp)
+            study = PartitionedStudy(
+                paths["network"],
+                paths["meta"],
+                paths["active"],
+                paths["reactive"],
+                PATH_EV,
+                directory=os.path.join(tmp, "partitions"),
+                max_workers=2,
+            )
+            nodes, lines = study.time_series_power_flow_calculation()
+            ev_nodes, ev_lines = study.ev_penetration(0.5)
+            n1 = study.n1_calculate([18, 18 + OFFSET])
+            with self.assertRaises(IDNotFoundError):
+                study.n1_calculate([1000])
+
+        # both LV grids are copies of the small network
+        pgc = PowerGridCalculation()
+        pgc.construct_pgm(PATH_NETWORK)
+        pgc.creat_batch_update_dataset(PATH_ACTIVE, PATH_REACTIVE)
+        expected_nodes, expected_lines = pgc.time_series_power_flow_calculation()
+        pd.testing.assert_frame_equal(nodes, expected_nodes)
+        self.assertEqual(lines["Line_ID"].tolist(), list(range(16, 25)) + list(range(16 + OFFSET, 25 + OFFSET)))
+        np.testing.assert_allclose(lines["energy_loss_kw"][:9], expected_lines["energy_loss_kw"])
+        np.testing.assert_allclose(lines["energy_loss_kw"][9:], expected_lines["energy_loss_kw"])
+
+        ev = ev_penetration_level(PATH_NETWORK, PATH_ACTIVE, PATH_REACTIVE, PATH_EV, PATH_META)
+        expected_ev_nodes, expected_ev_lines = ev.calculate(0.5)
+        pd.testing.assert_frame_equal(ev_nodes, expected_ev_nodes)
+        np.testing.assert_allclose(ev_lines["max__loading_pu"][9:], expected_ev_lines["max__loading_pu"])
+
+        small_n1 = n1_calculation(PATH_NETWORK, PATH_META, PATH_ACTIVE, PATH_REACTIVE)
+        expected_n1 = small_n1.n1_calculate(18)
+        pd.testing.assert_frame_equal(n1[18], expected_n1)
+        self.assertEqual(n1[18 + OFFSET]["alt_Line_ID"].tolist(), [24 + OFFSET])
+        self.assertEqual(n1[18 + OFFSET]["max_Line_ID"].tolist(), (expected_n1["max_Line_ID"] + OFFSET).tolist())
+        np.testing.assert_allclose(n1[18 + OFFSET]["max__loading_pu"], expected_n1["max__loading_pu"])
+
+    def test_temporary_directory_case1(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = write_export(tmp)
+            with PartitionedStudy(paths["network"], paths["meta"], paths["active"], paths["reactive"]) as study:
+                directory = study.directory
+                self.assertTrue(os.path.exists(os.path.join(directory, "11", "input_network_data.json")))
+            self.assertFalse(os.path.exists(directory))
+            # a given directory is kept
+            study = PartitionedStudy(
+                paths["network"], paths["meta"], paths["active"], paths["reactive"], directory=os.path.join(tmp, "p")
+            )
+            study.close()
+            self.assertTrue(os.path.exists(os.path.join(tmp, "p", "11", "meta_data.json")))
+
+
+if __name__ == "__main__":
+    unittest.main()
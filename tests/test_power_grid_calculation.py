@@ -1,5 +1,7 @@
 import json
+import os
 import pprint
+import tempfile
 import unittest
 import warnings
 
@@ -14,6 +16,7 @@ from power_grid_model import CalculationMethod, CalculationType, PowerGridModel,
 from power_grid_model.utils import json_deserialize, json_serialize
 from power_grid_model.validation import assert_valid_batch_data, assert_valid_input_data
 
+import power_system_simulation.power_grid_calculation as PGC
 from power_system_simulation.power_grid_calculation import PowerGridCalculation
 
 
@@ -37,6 +40,176 @@ class TestMyClass(unittest.TestCase):
             print("ini_case1() raise custom error:", e.__class__.__name__)
             print("detail:", e)
 
+    def test_validation_mode_case1(self):
+        path0 = "tests/data/input/input_network_data.json"
+        path1 = "tests/data/input/active_power_profile.parquet"
+        path2 = "tests/data/input/reactive_power_profile.parquet"
+        PGC.clear_validation_cache()
+        pgc = PowerGridCalculation(validation_mode="once")
+        pgc.construct_pgm(path0)
+        pgc.creat_batch_update_dataset(path1, path2)
+        tables_first = pgc.time_series_power_flow_calculation()
+        self.assertEqual(len(PGC._validated_fingerprints), 2)
+        # the same data is not validated again
+        pgc2 = PowerGridCalculation(validation_mode="once")
+        pgc2.construct_pgm(path0)
+        pgc2.creat_batch_update_dataset(path1, path2)
+        tables_second = pgc2.time_series_power_flow_calculation()
+        self.assertEqual(len(PGC._validated_fingerprints), 2)
+        pd.testing.assert_frame_equal(tables_first[1], tables_second[1])
+        # changed update data gets a new fingerprint
+        pgc2.update_data["sym_load"]["p_specified"][0, 0] += 1.0
+        pgc2.time_series_power_flow_calculation()
+        self.assertEqual(len(PGC._validated_fingerprints), 3)
+        # the least recently used fingerprint is forgotten when the cache is full
+        size = PGC.VALIDATION_CACHE_SIZE
+        PGC.VALIDATION_CACHE_SIZE = 3
+        try:
+            pgc.time_series_power_flow_calculation()
+            pgc2.update_data["sym_load"]["p_specified"][0, 0] += 1.0
+            pgc2.time_series_power_flow_calculation()
+            self.assertEqual(len(PGC._validated_fingerprints), 3)
+            self.assertIn("batch" + PGC.dataset_fingerprint(pgc.dataset, pgc.update_data), PGC._validated_fingerprints)
+        finally:
+            PGC.VALIDATION_CACHE_SIZE = size
+        PGC.clear_validation_cache()
+
+    def test_validation_mode_case2(self):
+        path0 = "tests/data/input/input_network_data.json"
+        PGC.clear_validation_cache()
+        PGC.set_validation_mode("off")
+        try:
+            pgc = PowerGridCalculation()
+            pgc.construct_pgm(path0)
+            self.assertEqual(len(PGC._validated_fingerprints), 0)
+        finally:
+            PGC.set_validation_mode("full")
+        with self.assertRaises(PGC.InvalidValidationModeError):
+            PGC.set_validation_mode("sometimes")
+        with self.assertRaises(PGC.InvalidValidationModeError):
+            PowerGridCalculation(validation_mode="sometimes")
+
+    def test_append_case1(self):
+        path0 = "tests/data/small_network/input/input_network_data.json"
+        path1 = "tests/data/small_network/input/active_power_profile.parquet"
+        path2 = "tests/data/small_network/input/reactive_power_profile.parquet"
+        pgc = PowerGridCalculation()
+        pgc.construct_pgm(path0)
+        pgc.creat_batch_update_dataset(path1, path2)
+        tables_full = pgc.time_series_power_flow_calculation()
+
+        active = pd.read_parquet(path1)
+        reactive = pd.read_parquet(path2)
+        pgc_append = PowerGridCalculation()
+        pgc_append.construct_pgm(path0)
+        with tempfile.TemporaryDirectory() as tmp:
+            # three batches of different length
+            for i, rows in enumerate([slice(0, 100), slice(100, 101), slice(101, None)]):
+                active.iloc[rows].to_parquet(os.path.join(tmp, f"active_{i}.parquet"))
+                reactive.iloc[rows].to_parquet(os.path.join(tmp, f"reactive_{i}.parquet"))
+                tables = pgc_append.append_time_series(
+                    os.path.join(tmp, f"active_{i}.parquet"), os.path.join(tmp, f"reactive_{i}.parquet")
+                )
+            pd.testing.assert_frame_equal(tables[0], tables_full[0])
+            pd.testing.assert_frame_equal(tables[1], tables_full[1], rtol=1e-12)
+            # the load IDs should not change between batches
+            active.iloc[:10, ::-1].to_parquet(os.path.join(tmp, "active_wrong.parquet"))
+            reactive.iloc[:10, ::-1].to_parquet(os.path.join(tmp, "reactive_wrong.parquet"))
+            timestamp, update_data = pgc_append.timestamp, pgc_append.update_data
+            with self.assertRaises(PGC.TwoProfilesDoesNotHaveMatchingTimestampsOrLoadIds):
+                pgc_append.append_time_series(
+                    os.path.join(tmp, "active_wrong.parquet"), os.path.join(tmp, "reactive_wrong.parquet")
+                )
+            # the batches should follow each other in time
+            with self.assertRaises(PGC.TwoProfilesDoesNotHaveMatchingTimestampsOrLoadIds):
+                pgc_append.append_time_series(
+                    os.path.join(tmp, "active_2.parquet"), os.path.join(tmp, "reactive_2.parquet")
+                )
+            # a rejected batch does not change the state
+            self.assertIs(pgc_append.timestamp, timestamp)
+            self.assertIs(pgc_append.update_data, update_data)
+            pd.testing.assert_frame_equal(pgc_append._appended_tables[0], tables_full[0])
+            pgc_append.reset_time_series()
+            tables = pgc_append.append_time_series(
+                os.path.join(tmp, "active_wrong.parquet"), os.path.join(tmp, "reactive_wrong.parquet")
+            )
+            self.assertEqual(len(tables[0]), 10)
+
+    def test_projection_case1(self):
+        path0 = "tests/data/small_network/input/input_network_data.json"
+        path1 = "tests/data/small_network/input/active_power_profile.parquet"
+        path2 = "tests/data/small_network/input/reactive_power_profile.parquet"
+        pgc = PowerGridCalculation()
+        pgc.construct_pgm(path0)
+        pgc.creat_batch_update_dataset(path1, path2)
+        tables = pgc.time_series_power_flow_calculation()
+        with tempfile.TemporaryDirectory() as tmp:
+            # wide profiles with many columns of loads which are not in the grid
+            for path, name in [(path1, "active.parquet"), (path2, "reactive.parquet")]:
+                df = pd.read_parquet(path)
+                unused = pd.DataFrame(1.0, index=df.index, columns=range(1000, 1500))
+                pd.concat([unused, df], axis=1).to_parquet(os.path.join(tmp, name))
+            pgc_wide = PowerGridCalculation()
+            pgc_wide.construct_pgm(path0)
+            update_data = pgc_wide.creat_batch_update_dataset(
+                os.path.join(tmp, "active.parquet"), os.path.join(tmp, "reactive.parquet")
+            )
+            np.testing.assert_array_equal(update_data["sym_load"]["id"], pgc.update_data["sym_load"]["id"])
+            tables_wide = pgc_wide.time_series_power_flow_calculation()
+        pd.testing.assert_frame_equal(tables[0], tables_wide[0])
+        pd.testing.assert_frame_equal(tables[1], tables_wide[1])
+
+    def test_export_case1(self):
+        path0 = "tests/data/small_network/input/input_network_data.json"
+        path1 = "tests/data/small_network/input/active_power_profile.parquet"
+        path2 = "tests/data/small_network/input/reactive_power_profile.parquet"
+        pgc = PowerGridCalculation()
+        pgc.construct_pgm(path0)
+        pgc.creat_batch_update_dataset(path1, path2)
+        output_data = pgc.calculate(pgc.dataset, pgc.update_data)
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = pgc.export_time_series(tmp, chunk_size=100)
+            # one partition per day
+            self.assertEqual(len(os.listdir(paths["node"])), 10)
+            self.assertIn("period=2025-01-03", os.listdir(paths["line"]))
+            nodes = pd.read_parquet(paths["node"]).sort_values(["Timestamp", "id"])
+            lines = pd.read_parquet(paths["line"]).sort_values(["Timestamp", "id"])
+            day = pd.read_parquet(paths["line"], filters=[("period", "=", "2025-01-03")])
+        n_timesteps, n_nodes = output_data["node"].shape
+        self.assertEqual(len(nodes), n_timesteps * n_nodes)
+        np.testing.assert_array_equal(
+            nodes["u_pu"].to_numpy().reshape(n_timesteps, n_nodes), output_data["node"]["u_pu"]
+        )
+        np.testing.assert_array_equal(nodes["id"].to_numpy()[:n_nodes], output_data["node"]["id"][0])
+        for name in ["loading", "p_from", "p_to"]:
+            np.testing.assert_array_equal(lines[name].to_numpy().reshape(n_timesteps, -1), output_data["line"][name])
+        self.assertEqual(len(day), 96 * output_data["line"].shape[1])
+
+    def test_export_case2(self):
+        path0 = "tests/data/small_network/input/input_network_data.json"
+        path1 = "tests/data/small_network/input/active_power_profile.parquet"
+        path2 = "tests/data/small_network/input/reactive_power_profile.parquet"
+        pgc = PowerGridCalculation()
+        pgc.construct_pgm(path0)
+        pgc.creat_batch_update_dataset(path1, path2)
+        output_data = pgc.calculate(pgc.dataset, pgc.update_data)
+        n_timesteps, n_nodes = output_data["node"].shape
+        with tempfile.TemporaryDirectory() as tmp:
+            # a second export into the same directory replaces the first one
+            pgc.export_time_series(tmp, chunk_size=100)
+            paths = pgc.export_time_series(tmp)
+            self.assertEqual(len(pd.read_parquet(paths["node"])), n_timesteps * n_nodes)
+            paths = pgc.export_time_series(tmp, chunk_size=100, layout="wide")
+            nodes = pd.read_parquet(paths["node"]).sort_values("Timestamp")
+            lines = pd.read_parquet(paths["line"]).sort_values("Timestamp")
+            with self.assertRaises(PGC.InvalidLayoutError):
+                pgc.export_time_series(tmp, layout="tall")
+        self.assertEqual(len(nodes), n_timesteps)
+        for position, node_id in enumerate(output_data["node"]["id"][0]):
+            np.testing.assert_array_equal(nodes[f"u_pu_{node_id}"], output_data["node"]["u_pu"][:, position])
+        for position, line_id in enumerate(output_data["line"]["id"][0]):
+            np.testing.assert_array_equal(lines[f"p_to_{line_id}"], output_data["line"]["p_to"][:, position])
+
 
 if __name__ == "__main__":
     unittest.main()
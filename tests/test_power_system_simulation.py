@@ -1,5 +1,8 @@
 import json
+import os
 import pprint
+import tempfile
+import types
 import unittest
 import warnings
 
@@ -11,15 +14,25 @@ with warnings.catch_warnings(action="ignore", category=DeprecationWarning):
     from pandas import DataFrame
 
 from power_grid_model.utils import json_deserialize, json_serialize
+from power_grid_model.validation import ValidationException
 
 import power_system_simulation.graph_processing as GP
 import power_system_simulation.power_grid_calculation as PGC
+from power_system_simulation.graph_processing import GraphCycleError
 from power_system_simulation.power_system_simulation import (
+    InvalidIDs,
+    InvalidLVFeederID,
+    MismatchedIDs,
+    MismatchedTimetamps,
+    MoreThanOneTransformerOrSource,
+    NotEnoughEVChargingProfiles,
+    OptimalTapPositionCriteriaError,
     ev_penetration_level,
     input_data_validity_check,
     n1_calculation,
     optimal_tap_position,
 )
+from power_system_simulation.tap_schedule import tap_schedule
 
 
 class TestMyClass(unittest.TestCase):
@@ -158,6 +171,299 @@ class TestMyClass(unittest.TestCase):
             print("detail:", e)
             pass
 
+    def test_check_matching_case1(self):
+        path0 = "tests/data/small_network/input/input_network_data.json"
+        path1 = "tests/data/small_network/input/meta_data.json"
+        path2 = "tests/data/small_network/input/active_power_profile.parquet"
+        path3 = "tests/data/small_network/input/reactive_power_profile.parquet"
+        path4 = "tests/data/small_network/input/ev_active_power_profile.parquet"
+        pss = input_data_validity_check(path0)
+        pss.check_grid(path1)
+        pss.check_matching(path2, path3, path4)
+        pss.check_ev_charging_profiles()
+        df = pd.read_parquet(path2)
+        with tempfile.TemporaryDirectory() as tmp:
+            path_short = os.path.join(tmp, "short.parquet")
+            df.iloc[:-1].to_parquet(path_short)
+            with self.assertRaises(MismatchedTimetamps):
+                pss.check_matching(path2, path3, path_short)
+            with self.assertRaises(MismatchedTimetamps):
+                pss.check_matching(path2, path_short, path4)
+            path_ids = os.path.join(tmp, "ids.parquet")
+            df.rename(columns={12: 99}).to_parquet(path_ids)
+            with self.assertRaises(MismatchedIDs):
+                pss.check_matching(path2, path_ids, path4)
+            with self.assertRaises(InvalidIDs):
+                pss.check_matching(path_ids, path_ids, path4)
+            path_ev = os.path.join(tmp, "ev.parquet")
+            df.iloc[:, :2].to_parquet(path_ev)
+            pss.check_matching(path2, path3, path_ev)
+            with self.assertRaises(NotEnoughEVChargingProfiles):
+                pss.check_ev_charging_profiles()
+
+    def test_check_grid_case1(self):
+        path0 = "tests/data/small_network/input/input_network_data.json"
+        path1 = "tests/data/small_network/input/meta_data_wrong.json"
+        pss = input_data_validity_check(path0)
+        with self.assertRaises(InvalidLVFeederID):
+            pss.check_grid(path1)
+
+    def test_validate_all_case1(self):
+        path0 = "tests/data/small_network/input/input_network_data.json"
+        path1 = "tests/data/small_network/input/meta_data.json"
+        path2 = "tests/data/small_network/input/active_power_profile.parquet"
+        path3 = "tests/data/small_network/input/reactive_power_profile.parquet"
+        path4 = "tests/data/small_network/input/ev_active_power_profile.parquet"
+        pss = input_data_validity_check(path0)
+        self.assertEqual(pss.validate_all(path1, path2, path3, path4, strict=True), [])
+
+    def test_validate_all_case2(self):
+        path0 = "tests/data/small_network/input/input_network_data_wrong.json"
+        path1 = "tests/data/small_network/input/meta_data_wrong.json"
+        path2 = "tests/data/small_network/input/active_power_profile.parquet"
+        path3 = "tests/data/small_network/input/reactive_power_profile.parquet"
+        pss = input_data_validity_check(path0, validation_mode="off")
+        pss.grid["transformer"]["to_node"] = 2
+        pss.grid["line"]["to_status"] = 1
+        pss.grid["node"]["u_rated"][0] = -1.0
+        df = pd.read_parquet(path2)
+        with tempfile.TemporaryDirectory() as tmp:
+            path_ids = os.path.join(tmp, "ids.parquet")
+            df.iloc[:-1, :2].rename(columns={12: 99}).to_parquet(path_ids)
+            report = pss.validate_all(path1, path2, path_ids, path_ids)
+            print("validate_all_case2() return:", report)
+            errors = [issue["error"].__name__ for issue in report]
+            self.assertEqual(
+                errors,
+                [
+                    "ValidationException",
+                    "MoreThanOneTransformerOrSource",
+                    "InvalidLVFeederID",
+                    "MismatchFromAndToNodes",
+                    "GraphCycleError",
+                    "MismatchedTimetamps",
+                    "MismatchedIDs",
+                    "NotEnoughEVChargingProfiles",
+                ],
+            )
+            with self.assertRaises(ValidationException):
+                pss.validate_all(path1, path2, path_ids, path_ids, strict=True)
+        pss.grid["node"]["u_rated"][0] = 10500.0
+        with self.assertRaises(MoreThanOneTransformerOrSource):
+            pss.validate_all(path1, path2, path3, path3, strict=True)
+
+    def test_validate_all_case3(self):
+        path0 = "tests/data/small_network/input/input_network_data.json"
+        path1 = "tests/data/small_network/input/meta_data.json"
+        path2 = "tests/data/small_network/input/active_power_profile.parquet"
+        path3 = "tests/data/small_network/input/reactive_power_profile.parquet"
+        path4 = "tests/data/small_network/input/ev_active_power_profile.parquet"
+        pss = input_data_validity_check(path0)
+        pss.grid["line"]["to_status"] = 1
+        report = pss.validate_all(path1, path2, path3, path4)
+        self.assertEqual(report[0]["ids"], [16, 18, 20, 22, 24])
+        with self.assertRaises(GraphCycleError):
+            pss.validate_all(path1, path2, path3, path4, strict=True)
+
+    def test_engine_case1(self):
+        path0 = "tests/data/small_network/input/input_network_data.json"
+        path1 = "tests/data/small_network/input/meta_data.json"
+        path2 = "tests/data/small_network/input/active_power_profile.parquet"
+        path3 = "tests/data/small_network/input/reactive_power_profile.parquet"
+        results = []
+        for engine in ["power_grid_model", "radial"]:
+            tap = optimal_tap_position(path0, path2, path3, engine=engine)
+            n1 = n1_calculation(path0, path1, path2, path3, engine=engine)
+            results.append((tap.find_optimal_tap_position("minimize_line_losses"), n1.n1_calculate(18)))
+        self.assertEqual(results[0][0], results[1][0])
+        pd.testing.assert_frame_equal(results[0][1], results[1][1], atol=1e-8)
+
+    def test_hosting_capacity_case1(self):
+        path0 = "tests/data/small_network/input/input_network_data.json"
+        path1 = "tests/data/small_network/input/meta_data.json"
+        path2 = "tests/data/small_network/input/active_power_profile.parquet"
+        path3 = "tests/data/small_network/input/reactive_power_profile.parquet"
+        path4 = "tests/data/small_network/input/ev_active_power_profile.parquet"
+        ev = ev_penetration_level(path0, path2, path3, path4, path1)
+        # repeated calculations start from the original load profile
+        tables_first = ev.calculate(0.5)
+        tables_second = ev.calculate(0.5)
+        pd.testing.assert_frame_equal(tables_first[1], tables_second[1])
+        result = ev.hosting_capacity((0.9, 1.1), 0.00168)
+        print("hosting_capacity_case1() return:", result)
+        # the loading limit binds at 2 EVs per feeder, every level below 1.0 has 1 EV per feeder
+        self.assertEqual(result["violating_p_level"], 1.0)
+        self.assertLess(result["p_level"], 1.0)
+        self.assertAlmostEqual(result["p_level"], 1.0)
+        self.assertEqual(ev.evs_per_feeder(result["p_level"]), result["evs_per_feeder"])
+        for p_level, within in [(0.75, True), (result["p_level"], True), (result["violating_p_level"], False)]:
+            _, lines = ev.calculate(p_level)
+            self.assertEqual(lines["max__loading_pu"].max() <= 0.00168, within)
+        self.assertIsNone(result["node_id"])
+        self.assertIn(result["line_id"], ev.grid["line"]["id"])
+        self.assertIsNotNone(result["timestamp"])
+        self.assertEqual(ev.hosting_capacity((0.9, 1.1), 1.0)["p_level"], 1.0)
+        result = ev.hosting_capacity((0.95, 1.05), 1.0)
+        self.assertIsNone(result["p_level"])
+        self.assertEqual(result["node_id"], 1)
+
+    def test_tap_screening_case1(self):
+        path0 = "tests/data/small_network/input/input_network_data.json"
+        path2 = "tests/data/small_network/input/active_power_profile.parquet"
+        path3 = "tests/data/small_network/input/reactive_power_profile.parquet"
+        tap = optimal_tap_position(path0, path2, path3)
+        for criteria in ["minimize_line_losses", "minimize_voltage_deviations"]:
+            result = tap.screen_optimal_tap_position(criteria)
+            self.assertEqual(result["optimal_tap_pos"], tap.find_optimal_tap_position(criteria))
+            table = result["table"].dropna()
+            self.assertTrue(table["fitted"].sum() == 3 and len(table) == 4)
+            np.testing.assert_allclose(table["predicted"], table["confirmed"], rtol=1e-2)
+        self.assertEqual(tap.low_voltage_grid["transformer"]["tap_pos"][0], 3)
+        with self.assertRaises(OptimalTapPositionCriteriaError):
+            tap.screen_optimal_tap_position("maximize_line_losses")
+
+    def test_tap_screening_case2(self):
+        # tap on the to side, the ratio is not linear in the tap position
+        path2 = "tests/data/small_network/input/active_power_profile.parquet"
+        path3 = "tests/data/small_network/input/reactive_power_profile.parquet"
+        with open("tests/data/small_network/input/input_network_data.json") as file:
+            network = json.load(file)
+        network["data"]["transformer"][0].update(tap_side=1, tap_size=10)
+        with tempfile.TemporaryDirectory() as tmp:
+            path0 = os.path.join(tmp, "input_network_data.json")
+            with open(path0, "w") as file:
+                json.dump(network, file)
+            tap = optimal_tap_position(path0, path2, path3)
+        for criteria in ["minimize_line_losses", "minimize_voltage_deviations"]:
+            result = tap.screen_optimal_tap_position(criteria)
+            self.assertEqual(result["optimal_tap_pos"], tap.find_optimal_tap_position(criteria))
+            table = result["table"].dropna()
+            np.testing.assert_allclose(table["predicted"], table["confirmed"], rtol=1e-3)
+
+    def test_window_case1(self):
+        path0 = "tests/data/small_network/input/input_network_data.json"
+        path1 = "tests/data/small_network/input/meta_data.json"
+        path2 = "tests/data/small_network/input/active_power_profile.parquet"
+        path3 = "tests/data/small_network/input/reactive_power_profile.parquet"
+        path4 = "tests/data/small_network/input/ev_active_power_profile.parquet"
+        ev = ev_penetration_level(path0, path2, path3, path4, path1, start="2025-01-03", end="2025-01-04")
+        self.assertEqual(ev.ev.shape[0], 96)
+        nodes, _ = ev.calculate(0.5)
+        self.assertEqual(len(nodes), 96)
+        self.assertEqual(nodes["Timestamp"].min(), pd.Timestamp("2025-01-03"))
+        n1 = n1_calculation(path0, path1, path2, path3, start="2025-01-03", end="2025-01-04")
+        table = n1.n1_calculate(18)
+        self.assertTrue(all(pd.Timestamp("2025-01-03") <= t < pd.Timestamp("2025-01-04") for t in table["max_time"]))
+        tap = optimal_tap_position(path0, path2, path3, start="2025-01-03", end="2025-01-04")
+        self.assertEqual(tap.load_profile_batch["sym_load"].shape[0], 96)
+
+    def test_topology_cache_case1(self):
+        path0 = "tests/data/small_network/input/input_network_data.json"
+        path1 = "tests/data/small_network/input/meta_data.json"
+        path2 = "tests/data/small_network/input/active_power_profile.parquet"
+        path3 = "tests/data/small_network/input/reactive_power_profile.parquet"
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "topology.npz")
+            n1 = n1_calculation(path0, path1, path2, path3, topology_cache=path)
+            self.assertTrue(os.path.exists(path))
+            n1_cached = n1_calculation(path0, path1, path2, path3, topology_cache=path)
+            self.assertEqual(n1_cached.gp.find_tree_order(), n1.gp.find_tree_order())
+            pd.testing.assert_frame_equal(n1_cached.n1_calculate(18), n1.n1_calculate(18))
+            pss = input_data_validity_check(path0, topology_cache=path)
+            pss.check_grid(path1)
+            pss.check_graph()
+            self.assertEqual(pss.gp.edge_ids, n1.gp.edge_ids)
+
+    def test_n1_incremental_case1(self):
+        path0 = "tests/data/small_network/input/input_network_data.json"
+        path1 = "tests/data/small_network/input/meta_data.json"
+        path2 = "tests/data/small_network/input/active_power_profile.parquet"
+        path3 = "tests/data/small_network/input/reactive_power_profile.parquet"
+        n1 = n1_calculation(path0, path1, path2, path3)
+        for line_id in [16, 18, 20, 22]:
+            full = n1.n1_calculate(line_id)
+            incremental = n1.n1_calculate(line_id, incremental=True)
+            # the line with the maximum loading is reported by its ID
+            position = {line: p for p, line in enumerate(n1.grid["line"]["id"].tolist())}
+            for line_alt, max_line, max_loading in full[["alt_Line_ID", "max_Line_ID", "max__loading_pu"]].values:
+                loading = n1._alternative_output(line_id, line_alt)["line"]["loading"]
+                self.assertAlmostEqual(loading[:, position[max_line]].max(), max_loading)
+            pd.testing.assert_frame_equal(incremental, full, rtol=1e-2)
+            # the estimated currents of the fundamental cycle are close to the full calculation
+            loading = n1._alternative_output(line_id, 24)["line"]["loading"]
+            transferred = n1._base_case.oriented_current(position[line_id])
+            estimate = np.abs(transferred) / n1.grid["line"]["i_n"][position[24]]
+            np.testing.assert_allclose(estimate, loading[:, position[24]], atol=1e-2 * loading.max())
+        # without tolerance every alternative is calculated in full
+        pd.testing.assert_frame_equal(n1.n1_calculate(18, incremental=True, voltage_tolerance=0.0), n1.n1_calculate(18))
+
+    def test_n1_incremental_case2(self):
+        path0 = "tests/data/small_network/input/input_network_data.json"
+        path1 = "tests/data/small_network/input/meta_data.json"
+        path2 = "tests/data/small_network/input/active_power_profile.parquet"
+        path3 = "tests/data/small_network/input/reactive_power_profile.parquet"
+        n1 = n1_calculation(path0, path1, path2, path3)
+        # the values are calculated one alternative at a time
+        self.assertIsInstance(n1._incremental_values(18, [24], 1.0), types.GeneratorType)
+        with tempfile.TemporaryDirectory() as tmp:
+            checkpoint_path = os.path.join(tmp, "n1.checkpoint")
+            estimate = n1.n1_calculate(18, checkpoint_path=checkpoint_path, incremental=True, voltage_tolerance=1.0)
+            # the estimates of another tolerance are not reused
+            full = n1.n1_calculate(18, checkpoint_path=checkpoint_path, incremental=True, voltage_tolerance=0.0)
+        pd.testing.assert_frame_equal(full, n1.n1_calculate(18))
+        self.assertNotEqual(estimate["max__loading_pu"][0], full["max__loading_pu"][0])
+        # new update data replaces the base case
+        base_case = n1._base_case
+        n1.update_data = {"sym_load": n1.update_data["sym_load"].copy()}
+        n1.update_data["sym_load"]["p_specified"] *= 2
+        doubled = n1.n1_calculate(18, incremental=True, voltage_tolerance=1.0)
+        self.assertIsNot(n1._base_case, base_case)
+        self.assertGreater(doubled["max__loading_pu"][0], estimate["max__loading_pu"][0])
+
+    def test_tap_schedule_case1(self):
+        path0 = "tests/data/small_network/input/input_network_data.json"
+        path2 = "tests/data/small_network/input/active_power_profile.parquet"
+        path3 = "tests/data/small_network/input/reactive_power_profile.parquet"
+        tap = optimal_tap_position(path0, path2, path3)
+        progress = []
+        daily = tap.optimal_tap_schedule(
+            "minimize_line_losses", window="1D", progress=lambda done, total: progress.append(done)
+        )
+        self.assertEqual(progress, [1, 2, 3, 4, 5])
+        self.assertEqual(len(daily), 10)
+        self.assertEqual(daily["start"][1], pd.Timestamp("2025-01-02"))
+        self.assertTrue(np.all(daily["tap_pos"] == daily["optimal_tap_pos"]))
+        # one window over the whole profile is the optimum of find_optimal_tap_position
+        optimal_tap_pos = tap.find_optimal_tap_position("minimize_line_losses")
+        whole = tap.optimal_tap_schedule("minimize_line_losses", window=960)
+        self.assertEqual(whole["tap_pos"].tolist(), [optimal_tap_pos])
+        # without tap changes, the schedule is the tap position with the minimum total loss
+        fixed = tap.optimal_tap_schedule("minimize_line_losses", window="1D", max_tap_change=0)
+        self.assertEqual(set(fixed["tap_pos"]), {optimal_tap_pos})
+        np.testing.assert_allclose(fixed["value"].sum(), whole["value"][0])
+        hourly = tap.optimal_tap_schedule("minimize_voltage_deviations", window="1h", max_tap_change=1)
+        self.assertEqual(len(hourly), 240)
+        self.assertTrue(np.all(np.abs(np.diff(hourly["tap_pos"])) <= 1))
+        fixed = tap.optimal_tap_schedule("minimize_voltage_deviations", window="1h", max_tap_change=0)
+        self.assertLessEqual(hourly["value"].sum(), fixed["value"].sum())
+        self.assertEqual(tap.low_voltage_grid["transformer"]["tap_pos"][0], 3)
+        with self.assertRaises(OptimalTapPositionCriteriaError):
+            tap.optimal_tap_schedule("maximize_line_losses")
+
+    def test_tap_schedule_case2(self):
+        rng = np.random.default_rng(0)
+        window_cost = rng.random((4, 5))
+        for max_tap_change, change_cost in [(None, 0.3), (1, 0.0), (1, 0.2), (0, 0.0)]:
+            best = None
+            for schedule in np.ndindex(*[4] * 5):
+                steps = np.abs(np.diff(schedule))
+                if max_tap_change is not None and np.any(steps > max_tap_change):
+                    continue
+                total = window_cost[list(schedule), range(5)].sum() + change_cost * np.count_nonzero(steps)
+                if best is None or total < best[0]:
+                    best = (total, list(schedule))
+            self.assertEqual(tap_schedule(window_cost, max_tap_change, change_cost).tolist(), best[1])
+
 
 if __name__ == "__main__":
     unittest.main()
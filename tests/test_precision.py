@@ -0,0 +1,56 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from power_system_simulation.power_grid_calculation import PowerGridCalculation
+from power_system_simulation.power_system_simulation import ev_penetration_level, optimal_tap_position
+from power_system_simulation.precision import InvalidPrecisionError, compact, is_compact, to_pgm
+
+PATH_NETWORK = "tests/data/small_network/input/input_network_data.json"
+PATH_META = "tests/data/small_network/input/meta_data.json"
+PATH_ACTIVE = "tests/data/small_network/input/active_power_profile.parquet"
+PATH_REACTIVE = "tests/data/small_network/input/reactive_power_profile.parquet"
+PATH_EV = "tests/data/small_network/input/ev_active_power_profile.parquet"
+
+
+class TestMyClass(unittest.TestCase):
+    def test_compact_case1(self):
+        pgc = PowerGridCalculation()
+        pgc.construct_pgm(PATH_NETWORK)
+        update_data = pgc.creat_batch_update_dataset(PATH_ACTIVE, PATH_REACTIVE)
+        small = compact(update_data)
+        self.assertTrue(is_compact(small))
+        self.assertFalse(is_compact(update_data))
+        self.assertEqual(small["sym_load"]["p_specified"].dtype, np.float32)
+        self.assertEqual(small["sym_load"]["id"].dtype, update_data["sym_load"]["id"].dtype)
+        self.assertLess(small["sym_load"].nbytes, 0.6 * update_data["sym_load"].nbytes)
+        back = to_pgm(small)
+        self.assertEqual(back["sym_load"].dtype, update_data["sym_load"].dtype)
+        np.testing.assert_allclose(back["sym_load"]["p_specified"], update_data["sym_load"]["p_specified"], rtol=6e-8)
+        self.assertIs(to_pgm(update_data), update_data)
+
+    def test_float32_case1(self):
+        tables = []
+        for precision in ["float64", "float32"]:
+            pgc = PowerGridCalculation(precision=precision)
+            pgc.construct_pgm(PATH_NETWORK)
+            pgc.creat_batch_update_dataset(PATH_ACTIVE, PATH_REACTIVE)
+            tables.append(pgc.time_series_power_flow_calculation())
+            output_data = pgc.calculate(pgc.dataset, pgc.update_data)
+            self.assertEqual(output_data["node"]["u_pu"].dtype, np.dtype(precision))
+        for full, small in zip(tables[0], tables[1]):
+            pd.testing.assert_frame_equal(full, small, check_dtype=False, rtol=1e-4)
+        with self.assertRaises(InvalidPrecisionError):
+            PowerGridCalculation(precision="float16")
+
+    def test_float32_studies_case1(self):
+        ev = ev_penetration_level(PATH_NETWORK, PATH_ACTIVE, PATH_REACTIVE, PATH_EV, PATH_META, precision="float32")
+        self.assertEqual(ev.ev.dtype, np.float32)
+        _, lines = ev.calculate(0.5)
+        self.assertTrue(np.all(lines["energy_loss_kw"] > 0))
+        results = []
+        for precision in ["float64", "float32"]:
+            tap = optimal_tap_position(PATH_NETWORK, PATH_ACTIVE, PATH_REACTIVE, precision=precision)
+            results.append(tap.find_optimal_tap_position("minimize_line_losses"))
+        self.assertEqual(results[0], results[1])
@@ -0,0 +1,100 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from power_system_simulation.profile_io import (
+    read_profile_metadata,
+    read_profile_values,
+    read_profiles_metadata,
+    read_profiles_values,
+    read_sparse_profiles,
+    same_values,
+)
+
+
+class TestMyClass(unittest.TestCase):
+    def test_metadata_case1(self):
+        path = "tests/data/small_network/input/active_power_profile.parquet"
+        df = pd.read_parquet(path)
+        timestamps, ids = read_profile_metadata(path)
+        self.assertTrue(same_values(timestamps, df.index.to_numpy()))
+        self.assertTrue(same_values(ids, df.columns.to_numpy()))
+
+    def test_metadata_case2(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            # range index is stored as metadata only
+            path = os.path.join(tmp, "range_index.parquet")
+            pd.DataFrame({"a": [1.0, 2.0, 3.0]}).to_parquet(path)
+            timestamps, ids = read_profile_metadata(path)
+            self.assertTrue(same_values(timestamps, np.arange(3)))
+            self.assertEqual(ids.tolist(), ["a"])
+            # file without pandas metadata
+            path = os.path.join(tmp, "no_index.parquet")
+            pq.write_table(pa.table({"1": [1.0, 2.0]}), path)
+            timestamps, ids = read_profile_metadata(path)
+            self.assertTrue(same_values(timestamps, np.arange(2)))
+            self.assertEqual(ids.tolist(), [1])
+
+    def test_sparse_case1(self):
+        path = "tests/data/small_network/input/ev_active_power_profile.parquet"
+        df = pd.read_parquet(path)
+        profiles = read_sparse_profiles(path)
+        self.assertEqual(profiles.shape, df.shape)
+        self.assertEqual(profiles.nnz, np.count_nonzero(df.to_numpy()))
+        np.testing.assert_array_equal(profiles.toarray(), df.to_numpy())
+
+    def test_values_case1(self):
+        paths = [
+            "tests/data/small_network/input/active_power_profile.parquet",
+            "tests/data/small_network/input/reactive_power_profile.parquet",
+        ]
+        dfs = [pd.read_parquet(path) for path in paths]
+        metadata = read_profiles_metadata(paths)
+        for (timestamps, ids), df in zip(metadata, dfs):
+            self.assertTrue(same_values(timestamps, df.index.to_numpy()))
+            self.assertTrue(same_values(ids, df.columns.to_numpy()))
+        for values, df in zip(read_profiles_values(paths), dfs):
+            np.testing.assert_array_equal(values, df.to_numpy())
+        # projection to some IDs, in the given order
+        ids = dfs[0].columns.to_numpy()[::-2]
+        for values, df in zip(read_profiles_values(paths, ids), dfs):
+            np.testing.assert_array_equal(values, df[ids].to_numpy())
+        self.assertEqual(read_profile_values(paths[0], []).shape, (len(dfs[0]), 0))
+        with self.assertRaises(KeyError):
+            read_profile_values(paths[0], [999])
+
+    def test_window_case1(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            # one row group per day
+            df = pd.read_parquet("tests/data/small_network/input/ev_active_power_profile.parquet")
+            path = os.path.join(tmp, "profile.parquet")
+            df.to_parquet(path, row_group_size=96)
+            window = df.loc["2025-01-02":"2025-01-03 23:59"]
+            timestamps, ids = read_profile_metadata(path, "2025-01-02", "2025-01-04")
+            self.assertTrue(same_values(timestamps, window.index.to_numpy()))
+            self.assertTrue(same_values(ids, df.columns.to_numpy()))
+            np.testing.assert_array_equal(read_profile_values(path, start="2025-01-02", end="2025-01-04"), window)
+            np.testing.assert_array_equal(read_profile_values(path, [], "2025-01-02", "2025-01-04").shape, (192, 0))
+            np.testing.assert_array_equal(read_profile_values(path, end="2025-01-02"), df.loc[:"2025-01-01 23:59"])
+            np.testing.assert_array_equal(read_sparse_profiles(path, "2025-01-02", "2025-01-04").toarray(), window)
+            # a window needs a timestamp index
+            path = os.path.join(tmp, "range_index.parquet")
+            pd.DataFrame({"1": [1.0, 2.0, 3.0]}).to_parquet(path)
+            with self.assertRaises(ValueError):
+                read_profile_metadata(path, start="2025-01-01")
+            with self.assertRaises(ValueError):
+                read_profile_values(path, start="2025-01-01")
+
+    def test_same_values_case1(self):
+        self.assertTrue(same_values(np.array([1, 2]), np.array([1, 2])))
+        self.assertFalse(same_values(np.array([1, 2]), np.array([1, 3])))
+        self.assertFalse(same_values(np.array([1, 2]), np.array([1, 2, 3])))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+from power_grid_model import CalculationMethod, PowerGridModel
+
+from power_system_simulation.power_grid_calculation import PowerGridCalculation
+from power_system_simulation.power_system_simulation import optimal_tap_position
+from power_system_simulation.profile_reduction import (
+    InvalidReductionMethodError,
+    ProfileReduction,
+    compare_outputs,
+)
+
+PATH_NETWORK = "tests/data/small_network/input/input_network_data.json"
+PATH_ACTIVE = "tests/data/small_network/input/active_power_profile.parquet"
+PATH_REACTIVE = "tests/data/small_network/input/reactive_power_profile.parquet"
+
+
+class TestMyClass(unittest.TestCase):
+    def setUp(self):
+        pgc = PowerGridCalculation()
+        self.grid = pgc.construct_pgm(PATH_NETWORK)
+        update_data = pgc.creat_batch_update_dataset(PATH_ACTIVE, PATH_REACTIVE)
+        # repeat the profile, every timestep occurs twice
+        self.update_data = {"sym_load": np.concatenate([update_data["sym_load"]] * 2)}
+        self.full_output = PowerGridModel(self.grid).calculate_power_flow(
+            update_data=self.update_data, calculation_method=CalculationMethod.newton_raphson
+        )
+
+    def reduced_output(self, reduction):
+        output = PowerGridModel(self.grid).calculate_power_flow(
+            update_data=reduction.update_data, calculation_method=CalculationMethod.newton_raphson
+        )
+        return output, reduction.expand(output)
+
+    def test_unique_case1(self):
+        reduction = ProfileReduction(self.update_data)
+        n_timesteps = len(self.update_data["sym_load"])
+        self.assertEqual(len(reduction.weights), n_timesteps // 2)
+        self.assertTrue(np.all(reduction.weights == 2))
+        output, expanded = self.reduced_output(reduction)
+        for component in ["node", "line"]:
+            np.testing.assert_array_equal(expanded[component], self.full_output[component])
+        # the weighted energy loss is the trapezoid rule over the full timeline
+        p_loss = self.full_output["line"]["p_from"] + self.full_output["line"]["p_to"]
+        np.testing.assert_allclose(reduction.energy_loss(output), np.trapezoid(p_loss, axis=0) / 1000)
+        error = reduction.input_deviation()
+        self.assertEqual(error["max_p_deviation"], 0.0)
+        self.assertEqual(error["reduction_factor"], 2.0)
+        self.assertEqual(compare_outputs(self.full_output, expanded)["max_u_pu_error"], 0.0)
+
+    def test_cluster_case1(self):
+        for method in ["kmeans", "histogram"]:
+            reduction = ProfileReduction(self.update_data, method=method, n_clusters=5)
+            self.assertLessEqual(len(reduction.weights), 5)
+            self.assertEqual(reduction.weights.sum(), len(self.update_data["sym_load"]))
+            _, expanded = self.reduced_output(reduction)
+            self.assertEqual(expanded["node"].shape, self.full_output["node"].shape)
+            error = reduction.input_deviation()
+            self.assertGreater(error["max_p_deviation"], 0.0)
+            self.assertLess(compare_outputs(self.full_output, expanded)["max_u_pu_error"], 0.1)
+        with self.assertRaises(InvalidReductionMethodError):
+            ProfileReduction(self.update_data, method="median")
+        with self.assertRaises(ValueError):
+            ProfileReduction(self.update_data, method="kmeans")
+
+    def test_studies_case1(self):
+        pgc = PowerGridCalculation(reduction="unique")
+        pgc.construct_pgm(PATH_NETWORK)
+        pgc.creat_batch_update_dataset(PATH_ACTIVE, PATH_REACTIVE)
+        tables = pgc.time_series_power_flow_calculation()
+        pgc_full = PowerGridCalculation()
+        pgc_full.construct_pgm(PATH_NETWORK)
+        pgc_full.creat_batch_update_dataset(PATH_ACTIVE, PATH_REACTIVE)
+        tables_full = pgc_full.time_series_power_flow_calculation()
+        pd.testing.assert_frame_equal(tables[0], tables_full[0])
+        pd.testing.assert_frame_equal(tables[1], tables_full[1])
+        self.assertEqual(pgc.reduction_input_deviation["max_p_deviation"], 0.0)
+        self.assertIsNone(pgc_full.reduction_input_deviation)
+        # the energy losses of a clustered calculation use the weights of the scenarios, also in chunks
+        pgc = PowerGridCalculation(reduction="kmeans", n_clusters=20)
+        pgc.construct_pgm(PATH_NETWORK)
+        pgc.creat_batch_update_dataset(PATH_ACTIVE, PATH_REACTIVE)
+        _, lines = pgc.time_series_power_flow_calculation()
+        np.testing.assert_allclose(lines["energy_loss_kw"], pgc.profile_reduction.energy_loss(pgc.reduced_output_data))
+        _, chunked = pgc.time_series_power_flow_calculation(chunk_size=480)
+        expanded = pgc.result_tables(pgc.calculate(pgc.dataset, pgc.update_data))[1]
+        np.testing.assert_allclose(lines["energy_loss_kw"], expanded["energy_loss_kw"])
+        self.assertLess(np.max(np.abs(chunked["energy_loss_kw"] / tables_full[1]["energy_loss_kw"] - 1)), 0.1)
+        tap = optimal_tap_position(PATH_NETWORK, PATH_ACTIVE, PATH_REACTIVE, reduction="histogram", n_clusters=10)
+        self.assertIn(tap.find_optimal_tap_position("minimize_voltage_deviations"), range(1, 6))
+        # the reduction is calculated once for all tap positions
+        self.assertIsNotNone(tap.power_grid_calculation.profile_reduction)
+        self.assertLessEqual(tap.power_grid_calculation.reduction_input_deviation["scenarios"], 10)
+        self.assertGreater(tap.power_grid_calculation.reduction_input_deviation["relative_p_deviation"], 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
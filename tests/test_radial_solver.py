@@ -0,0 +1,82 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+from power_grid_model import CalculationMethod, PowerGridModel, initialize_array
+
+from power_system_simulation.graph_processing import GraphCycleError
+from power_system_simulation.power_grid_calculation import PowerGridCalculation
+from power_system_simulation.radial_solver import (
+    RadialPowerFlow,
+    RadialSolverNotApplicableError,
+    RadialSolverNotConvergedError,
+)
+
+PATH_NETWORK = "tests/data/small_network/input/input_network_data.json"
+PATH_ACTIVE = "tests/data/small_network/input/active_power_profile.parquet"
+PATH_REACTIVE = "tests/data/small_network/input/reactive_power_profile.parquet"
+
+
+class TestMyClass(unittest.TestCase):
+    def setUp(self):
+        pgc = PowerGridCalculation()
+        self.grid = pgc.construct_pgm(PATH_NETWORK)
+        self.update_data = pgc.creat_batch_update_dataset(PATH_ACTIVE, PATH_REACTIVE)
+
+    def assert_same_output(self, expected, actual):
+        for component, attributes in [
+            ("node", ["u_pu", "u_angle", "p", "q"]),
+            ("line", ["i_from", "i_to", "p_from", "p_to", "q_from", "loading"]),
+            ("transformer", ["p_from", "q_to", "loading"]),
+        ]:
+            np.testing.assert_array_equal(actual[component]["id"], expected[component]["id"])
+            for attribute in attributes:
+                scale = max(np.max(np.abs(expected[component][attribute])), 1.0)
+                np.testing.assert_allclose(
+                    actual[component][attribute], expected[component][attribute], rtol=0, atol=1e-6 * scale
+                )
+
+    def test_batch_case1(self):
+        expected = PowerGridModel(self.grid).calculate_power_flow(
+            update_data=self.update_data, calculation_method=CalculationMethod.newton_raphson
+        )
+        actual = RadialPowerFlow(self.grid, chunk_size=7).calculate_power_flow(self.update_data)
+        self.assert_same_output(expected, actual)
+        # the line connected at one side only carries no current at the open side
+        self.assertTrue(np.all(actual["line"]["i_to"][:, self.grid["line"]["id"] == 24] == 0.0))
+
+    def test_single_case1(self):
+        expected = PowerGridModel(self.grid).calculate_power_flow(calculation_method=CalculationMethod.newton_raphson)
+        actual = RadialPowerFlow(self.grid).calculate_power_flow()
+        self.assertEqual(actual["node"].shape, (len(self.grid["node"]),))
+        self.assert_same_output(expected, actual)
+
+    def test_error_case1(self):
+        solver = RadialPowerFlow(self.grid, max_iterations=1)
+        with self.assertRaises(RadialSolverNotConvergedError):
+            solver.calculate_power_flow(self.update_data)
+        update_line = initialize_array("update", "line", (1, 1))
+        update_line["id"] = 24
+        with self.assertRaises(RadialSolverNotApplicableError):
+            RadialPowerFlow(self.grid).calculate_power_flow({"line": update_line})
+        # a cycle makes the grid not radial
+        grid = dict(self.grid)
+        grid["line"] = self.grid["line"].copy()
+        grid["line"]["from_status"] = 1
+        grid["line"]["to_status"] = 1
+        with self.assertRaises(GraphCycleError):
+            RadialPowerFlow(grid)
+
+    def test_engine_case1(self):
+        tables = []
+        for engine in ["power_grid_model", "radial"]:
+            pgc = PowerGridCalculation(engine=engine)
+            pgc.construct_pgm(PATH_NETWORK)
+            pgc.creat_batch_update_dataset(PATH_ACTIVE, PATH_REACTIVE)
+            tables.append(pgc.time_series_power_flow_calculation())
+        pd.testing.assert_frame_equal(tables[0][0], tables[1][0], atol=1e-8)
+        pd.testing.assert_frame_equal(tables[0][1], tables[1][1], atol=1e-6)
+
+
+if __name__ == "__main__":
+    unittest.main()
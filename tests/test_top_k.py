@@ -0,0 +1,57 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+from power_grid_model import CalculationMethod, PowerGridModel
+
+from power_system_simulation.power_grid_calculation import PowerGridCalculation
+from power_system_simulation.power_system_simulation import n1_calculation
+from power_system_simulation.top_k import TopK, largest
+
+PATH_NETWORK = "tests/data/small_network/input/input_network_data.json"
+PATH_META = "tests/data/small_network/input/meta_data.json"
+PATH_ACTIVE = "tests/data/small_network/input/active_power_profile.parquet"
+PATH_REACTIVE = "tests/data/small_network/input/reactive_power_profile.parquet"
+
+
+class TestMyClass(unittest.TestCase):
+    def test_largest_case1(self):
+        values = np.array([3.0, 1.0, 5.0, 4.0, 2.0])
+        self.assertEqual(largest(values, 3).tolist(), [2, 3, 0])
+        self.assertEqual(largest(values, 10).tolist(), [2, 3, 0, 4, 1])
+
+    def test_top_k_case1(self):
+        pgc = PowerGridCalculation()
+        grid = pgc.construct_pgm(PATH_NETWORK)
+        update_data = pgc.creat_batch_update_dataset(PATH_ACTIVE, PATH_REACTIVE)
+        output_data = PowerGridModel(grid).calculate_power_flow(
+            update_data=update_data, calculation_method=CalculationMethod.newton_raphson
+        )
+        # the full sort of all the loadings
+        loading = output_data["line"]["loading"]
+        order = np.argsort(-loading.ravel(), kind="stable")[:5]
+        timestep, line = np.unravel_index(order, loading.shape)
+
+        tables = pgc.top_k_power_flow(k=5)
+        np.testing.assert_array_equal(tables["line_loading"]["loading_pu"], loading[timestep, line])
+        np.testing.assert_array_equal(tables["line_loading"]["Line_ID"], output_data["line"]["id"][timestep, line])
+        np.testing.assert_array_equal(tables["line_loading"]["Timestamp"], pgc.timestamp[timestep])
+        deviation = np.abs(output_data["node"]["u_pu"] - 1)
+        np.testing.assert_allclose(tables["voltage_deviation"]["deviation_pu"], np.sort(deviation.ravel())[::-1][:5])
+        # streaming in chunks gives the same result
+        tables_chunked = pgc.top_k_power_flow(k=5, chunk_size=7)
+        pd.testing.assert_frame_equal(tables_chunked["line_loading"], tables["line_loading"])
+        pd.testing.assert_frame_equal(tables_chunked["voltage_deviation"], tables["voltage_deviation"])
+        self.assertEqual(len(TopK(3).tables()["line_loading"]), 0)
+
+    def test_n1_top_k_case1(self):
+        n1 = n1_calculation(PATH_NETWORK, PATH_META, PATH_ACTIVE, PATH_REACTIVE)
+        tables = n1.n1_top_k(18, k=3)
+        table = n1.n1_calculate(18)
+        self.assertEqual(tables["line_loading"]["loading_pu"][0], table["max__loading_pu"].max())
+        self.assertIn(tables["line_loading"]["case"][0], table["alt_Line_ID"].tolist())
+        self.assertEqual(len(tables["voltage_deviation"]), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()